@@ -2,7 +2,148 @@
 # when this microservice starts, it reads these settings to know its name and version.
 # This microservice will have rules that it follow when it starts calls router.py functions.
 
+import os
+
 MICROSERVICE_NAME = "OptimaAI Underwriter"
 MICROSERVICE_VERSION = "0.1.0"
 
 # These settings tell the microservice its identity and how it should behave when it starts.
+
+# ------------------------------------------------------------
+# AI ENGINE (Groq) SETTINGS
+# ------------------------------------------------------------
+# Maximum number of LLM calls a single worker keeps in flight on the
+# async /receive path. Requests above the cap wait their turn instead of
+# opening more connections to the provider.
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "200"))
+
+# Maximum number of submissions from one /receive/batch call that run
+# through process_data at the same time.
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+
+# ------------------------------------------------------------
+# PDF RENDERING SETTINGS
+# ------------------------------------------------------------
+# Number of worker processes used to render compliance PDFs, per API
+# worker. Every uvicorn worker (WEB_CONCURRENCY) starts its own pool, so
+# the default splits the CPUs between them and stays small.
+# 0 renders inline in a thread of the API worker instead.
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+PDF_RENDER_WORKERS = int(os.getenv(
+    "PDF_RENDER_WORKERS",
+    str(min(4, max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY))),
+))
+
+# ------------------------------------------------------------
+# GROQ HTTP CLIENT SETTINGS
+# ------------------------------------------------------------
+# One process-wide client is shared by every request; these size its
+# keep-alive connection pool and bound each call.
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+GROQ_POOL_SIZE = int(os.getenv("GROQ_POOL_SIZE", "100"))
+GROQ_KEEPALIVE_CONNECTIONS = int(os.getenv("GROQ_KEEPALIVE_CONNECTIONS", "20"))
+GROQ_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("GROQ_KEEPALIVE_EXPIRY_SECONDS", "30"))
+GROQ_CONNECT_TIMEOUT_SECONDS = float(os.getenv("GROQ_CONNECT_TIMEOUT_SECONDS", "5"))
+GROQ_TIMEOUT_SECONDS = float(os.getenv("GROQ_TIMEOUT_SECONDS", "60"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "2"))
+
+# ------------------------------------------------------------
+# AI INSIGHT CACHE SETTINGS
+# ------------------------------------------------------------
+# Insights are generated at temperature 0, so identical contexts can be
+# answered from cache. The SQLite tier is off unless a path is set.
+INSIGHT_CACHE_ENABLED = os.getenv("INSIGHT_CACHE_ENABLED", "1") == "1"
+INSIGHT_CACHE_TTL_SECONDS = float(os.getenv("INSIGHT_CACHE_TTL_SECONDS", "86400"))
+INSIGHT_CACHE_MAX_BYTES = int(os.getenv("INSIGHT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+INSIGHT_CACHE_SQLITE_PATH = os.getenv("INSIGHT_CACHE_SQLITE_PATH") or None
+INSIGHT_CACHE_SQLITE_MAX_BYTES = int(os.getenv("INSIGHT_CACHE_SQLITE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# ------------------------------------------------------------
+# AI PROMPT CONTEXT SETTINGS
+# ------------------------------------------------------------
+# The underwriting context is compacted to the fields the selected prompt
+# uses and trimmed to roughly this many tokens before it is sent.
+AI_CONTEXT_COMPACTION_ENABLED = os.getenv("AI_CONTEXT_COMPACTION_ENABLED", "1") == "1"
+AI_CONTEXT_TOKEN_BUDGET = int(os.getenv("AI_CONTEXT_TOKEN_BUDGET", "1500"))
+
+# ------------------------------------------------------------
+# AI LATENCY SLO
+# ------------------------------------------------------------
+# Total time the insights step may take. When exceeded (or the provider
+# errors) the response uses the deterministic build_ai_insights block,
+# flagged as fallback. 0 disables the budget.
+AI_LATENCY_BUDGET_SECONDS = float(os.getenv("AI_LATENCY_BUDGET_SECONDS", "8"))
+# Async path only: if the first request has not answered after this many
+# seconds (≈ provider p95), send a second identical request and use
+# whichever answers first. 0 disables hedging.
+AI_HEDGE_AFTER_SECONDS = float(os.getenv("AI_HEDGE_AFTER_SECONDS", "0"))
+
+# ------------------------------------------------------------
+# AI BATCH INSIGHTS
+# ------------------------------------------------------------
+# Batch mode packs several submissions into one LLM request. Batch size
+# adapts so prompt + expected output stay inside the model context window.
+AI_MODEL_CONTEXT_TOKENS = int(os.getenv("AI_MODEL_CONTEXT_TOKENS", "8192"))
+AI_BATCH_OUTPUT_TOKENS_PER_ITEM = int(os.getenv("AI_BATCH_OUTPUT_TOKENS_PER_ITEM", "160"))
+AI_BATCH_MAX_ITEMS = int(os.getenv("AI_BATCH_MAX_ITEMS", "20"))
+# /receive/renewal runs submissions through batched insights this many at
+# a time, streaming each chunk's results as it finishes.
+RENEWAL_CHUNK_SIZE = int(os.getenv("RENEWAL_CHUNK_SIZE", "100"))
+
+# ------------------------------------------------------------
+# AI OUTPUT FORMAT
+# ------------------------------------------------------------
+# "delimited": four fields separated by '||' (prompt default)
+# "json": JSON-mode request validated against INSIGHTS_SCHEMA, with at
+#         most one repair retry using a shortened prompt; a reply still
+#         invalid after it is replaced by the deterministic insights
+# /receive/stream always uses "delimited", so fields can be sent as each
+# delimiter arrives.
+AI_OUTPUT_MODE = os.getenv("AI_OUTPUT_MODE", "delimited")
+
+# ------------------------------------------------------------
+# LLM RATE LIMITS (shared by all workers on the host)
+# ------------------------------------------------------------
+# Token buckets live in a SQLite file so every uvicorn worker draws from
+# the same provider quota. 0 disables a limit; both 0 disables the limiter.
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+LLM_RATE_LIMIT_DB = os.getenv("LLM_RATE_LIMIT_DB", "/tmp/optimaai_llm_rate_limit.db")
+# Share of each bucket held back for interactive requests; batch requests
+# only proceed while at least this fraction would remain.
+LLM_BATCH_RESERVE_FRACTION = float(os.getenv("LLM_BATCH_RESERVE_FRACTION", "0.2"))
+
+# ------------------------------------------------------------
+# NORMALIZER SETTINGS
+# ------------------------------------------------------------
+# Max cached resolution plans per scope (payload / driver / vehicle),
+# one per distinct payload shape (schema fingerprint).
+NORMALIZER_PLAN_CACHE_SIZE = int(os.getenv("NORMALIZER_PLAN_CACHE_SIZE", "256"))
+
+# ------------------------------------------------------------
+# FLEET SCORING SETTINGS
+# ------------------------------------------------------------
+# How driver × vehicle scores combine into one score per vehicle:
+#   "max"           - the highest-risk assigned driver (lowest score)
+#   "exposure_mean" - mean over assigned drivers weighted by their
+#                     exposure share of the vehicle
+FLEET_SCORE_AGGREGATION = os.getenv("FLEET_SCORE_AGGREGATION", "max")
+
+# ------------------------------------------------------------
+# RATING TABLE SETTINGS
+# ------------------------------------------------------------
+# JSON rating table used by the risk score model; unset uses the bundled
+# app/services/underwriting_engine/rating_tables/default.json.
+RATING_TABLE_PATH = os.getenv("RATING_TABLE_PATH") or None
+# How often (seconds) the table file is checked for changes; a changed
+# file is validated and swapped in without a restart. 0 disables reloads.
+RATING_TABLE_RELOAD_SECONDS = float(os.getenv("RATING_TABLE_RELOAD_SECONDS", "5"))
+
+# ------------------------------------------------------------
+# VEHICLE CLASSIFICATION SETTINGS
+# ------------------------------------------------------------
+# JSON vehicle class table (classes + make/model aliases); unset uses the
+# bundled app/services/vehicle_classes/default.json.
+VEHICLE_CLASSES_PATH = os.getenv("VEHICLE_CLASSES_PATH") or None
+# Max memoized (make, model, year) -> class results.
+VEHICLE_CLASS_CACHE_SIZE = int(os.getenv("VEHICLE_CLASS_CACHE_SIZE", "8192"))
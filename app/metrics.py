@@ -0,0 +1,176 @@
+# app/metrics.py
+#
+# Lightweight in-process metrics for the OptimaAI Underwriter.
+# - stage_timer(): times a pipeline stage (count, sum, errors, histogram
+#   buckets; p50/p95/p99 of recent samples in snapshot())
+# - increment(): plain counters (cache hits, retries, ...)
+# - render_prometheus(): Prometheus text format for GET /metrics
+#
+# Each observation is a perf_counter() pair plus a deque append under a
+# lock, so the timers are cheap enough to leave on in production.
+#
+# Stage latencies are exported as Prometheus histograms over fixed bucket
+# bounds, so series from several uvicorn workers can be summed and
+# quantiles computed server-side (histogram_quantile).
+
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Number of most recent samples per stage used for quantiles.
+RESERVOIR_SIZE = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Histogram bucket upper bounds in seconds (+Inf is implicit).
+BUCKET_BOUNDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+_stages = {}
+_counters = {}
+_local = threading.local()
+
+
+class _StageStats:
+    __slots__ = ("count", "total", "errors", "samples", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.samples = deque(maxlen=RESERVOIR_SIZE)
+        # Per-bucket (non-cumulative) counts; the last slot is +Inf
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+
+# ------------------------------------------------------------
+# RECORDING
+# ------------------------------------------------------------
+def observe(stage, seconds, error=False):
+    """
+    Records one stage duration. Inside collect_observations() the sample is
+    buffered for the caller instead (used by PDF worker processes).
+    """
+    buffer = getattr(_local, "buffer", None)
+    if buffer is not None:
+        buffer.append((stage, seconds, error))
+        return
+
+    with _lock:
+        stats = _stages.get(stage)
+        if stats is None:
+            stats = _stages[stage] = _StageStats()
+        stats.count += 1
+        stats.total += seconds
+        stats.samples.append(seconds)
+        stats.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        if error:
+            stats.errors += 1
+
+
+@contextmanager
+def stage_timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        observe(stage, time.perf_counter() - start, error=True)
+        raise
+    observe(stage, time.perf_counter() - start)
+
+
+def increment(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+# ------------------------------------------------------------
+# CROSS-PROCESS HAND-OFF
+# ------------------------------------------------------------
+@contextmanager
+def collect_observations():
+    """
+    Buffers observations made in this thread and yields the list.
+    Worker processes return it alongside their result so the API process
+    can record it with record_observations().
+    """
+    _local.buffer = []
+    try:
+        yield _local.buffer
+    finally:
+        _local.buffer = None
+
+
+def record_observations(observations):
+    for stage, seconds, error in observations:
+        observe(stage, seconds, error)
+
+
+# ------------------------------------------------------------
+# EXPORT
+# ------------------------------------------------------------
+def _quantile(sorted_samples, q):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(q * len(sorted_samples)))
+    return sorted_samples[index]
+
+
+def snapshot():
+    """
+    Returns {"stages": {stage: {...}}, "counters": {...}} for debugging/tests.
+    """
+    with _lock:
+        stages = {
+            name: (s.count, s.total, s.errors, sorted(s.samples), list(s.buckets))
+            for name, s in _stages.items()
+        }
+        counters = dict(_counters)
+
+    return {
+        "stages": {
+            name: {
+                "count": count,
+                "sum": total,
+                "errors": errors,
+                "buckets": buckets,
+                **{f"p{int(q * 100)}": _quantile(samples, q) for q in QUANTILES},
+            }
+            for name, (count, total, errors, samples, buckets) in stages.items()
+        },
+        "counters": counters,
+    }
+
+
+def render_prometheus():
+    data = snapshot()
+    lines = [
+        "# HELP optimaai_stage_seconds Latency of underwriting pipeline stages.",
+        "# TYPE optimaai_stage_seconds histogram",
+    ]
+    for stage, s in sorted(data["stages"].items()):
+        cumulative = 0
+        for bound, count in zip(BUCKET_BOUNDS + ("+Inf",), s["buckets"]):
+            cumulative += count
+            le = bound if isinstance(bound, str) else f"{bound:g}"
+            lines.append(f'optimaai_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+        lines.append(f'optimaai_stage_seconds_sum{{stage="{stage}"}} {s["sum"]:.6f}')
+        lines.append(f'optimaai_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+
+    lines.append("# HELP optimaai_stage_errors_total Stage executions that raised.")
+    lines.append("# TYPE optimaai_stage_errors_total counter")
+    for stage, s in sorted(data["stages"].items()):
+        lines.append(f'optimaai_stage_errors_total{{stage="{stage}"}} {s["errors"]}')
+
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f"# TYPE optimaai_{name}_total counter")
+        lines.append(f"optimaai_{name}_total {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+        _counters.clear()
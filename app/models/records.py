@@ -0,0 +1,187 @@
+# app/models/records.py
+#
+# Compact canonical records passed through the underwriting pipeline.
+#
+# normalize_records() builds these instead of nested dicts: one slotted
+# object per customer/driver/vehicle/coverage/policy, holding the
+# normalized fields plus a reference to the insurer's raw block. Nothing
+# is copied into JSON shape until the response is encoded - routers pass
+# json_default to json.dumps, which calls to_json() on each record.
+
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(slots=True)
+class Customer:
+    firstName: str
+    lastName: str
+    age: Any
+    licenseNumber: str
+    street: str
+    city: str
+    state: str
+    zip: str
+    raw: Any
+
+    def to_json(self):
+        return {
+            "firstName": self.firstName,
+            "lastName": self.lastName,
+            "age": self.age,
+            "licenseNumber": self.licenseNumber,
+            "address": {
+                "street": self.street,
+                "city": self.city,
+                "state": self.state,
+                "zip": self.zip
+            },
+            "raw": self.raw
+        }
+
+
+@dataclass(slots=True)
+class Driver:
+    firstName: str
+    lastName: str
+    age: Any
+    licenseNumber: str
+    accidents: Any
+    violations: Any
+    majorViolation: Any
+    raw: Any
+
+    def normalized(self):
+        return {
+            "firstName": self.firstName,
+            "lastName": self.lastName,
+            "age": self.age,
+            "licenseNumber": self.licenseNumber,
+            "accidents": self.accidents,
+            "violations": self.violations,
+            "majorViolation": self.majorViolation
+        }
+
+    def to_json(self):
+        return {"raw": self.raw, "normalized": self.normalized()}
+
+
+@dataclass(slots=True)
+class Vehicle:
+    vin: Any
+    year: Any
+    make: Any
+    model: Any
+    annualMileage: Any
+    raw: Any
+
+    def normalized(self):
+        return {
+            "vin": self.vin,
+            "year": self.year,
+            "make": self.make,
+            "model": self.model,
+            "annualMileage": self.annualMileage
+        }
+
+    def to_json(self):
+        return {"raw": self.raw, "normalized": self.normalized()}
+
+
+@dataclass(slots=True)
+class Coverage:
+    liabilityLimit: Any
+    collisionDeductible: Any
+    comprehensiveDeductible: Any
+    deductible: Any
+    coverageType: Any
+    raw: Any
+
+    def to_json(self):
+        return {
+            "liabilityLimit": self.liabilityLimit,
+            "collisionDeductible": self.collisionDeductible,
+            "comprehensiveDeductible": self.comprehensiveDeductible,
+            "deductible": self.deductible,
+            "coverageType": self.coverageType,
+            "raw": self.raw
+        }
+
+
+@dataclass(slots=True)
+class Policy:
+    state: Any
+    effectiveDate: Any
+    expirationDate: Any
+    transactionId: Any
+    sourceSystem: Any
+    raw: Any
+
+    def to_json(self):
+        return {
+            "state": self.state,
+            "effectiveDate": self.effectiveDate,
+            "expirationDate": self.expirationDate,
+            "transactionId": self.transactionId,
+            "sourceSystem": self.sourceSystem,
+            "raw": self.raw
+        }
+
+
+@dataclass(slots=True)
+class UnderwritingVehicle:
+    """
+    underwriting.details.vehicles[] row.
+    """
+    vehicle: Vehicle
+    riskScore: Any
+    premium: Any
+    eligibility: str
+
+    def to_json(self):
+        return {
+            "raw": self.vehicle.raw,
+            "normalized": self.vehicle.normalized(),
+            "rulesResult": {
+                "rulesFired": [],
+                "status": "rules evaluated (placeholder)"
+            },
+            "riskScore": self.riskScore,
+            "premium": self.premium,
+            "eligibility": self.eligibility,
+        }
+
+
+@dataclass(slots=True)
+class UnderwritingDriver:
+    """
+    underwriting.details.drivers[] row; the flat fields are read from the
+    raw driver block when serialized.
+    """
+    driver: Driver
+
+    def to_json(self):
+        raw = self.driver.raw
+        return {
+            "raw": raw,
+            "normalized": self.driver.normalized(),
+            "firstName": raw.get("firstName"),
+            "lastName": raw.get("lastName"),
+            "age": raw.get("age"),
+            "licenseNumber": raw.get("licenseNumber"),
+            "yearsLicensed": raw.get("yearsLicensed"),
+            "accidents": raw.get("accidents"),
+            "violations": raw.get("violations"),
+            "claims": raw.get("claims"),
+            "isPrimaryDriver": raw.get("isPrimaryDriver"),
+        }
+
+
+def json_default(value):
+    """
+    json.dumps default= hook: records serialize to today's JSON shape,
+    anything else falls back to str() as before.
+    """
+    if hasattr(value, "to_json"):
+        return value.to_json()
+    return str(value)
@@ -0,0 +1,19 @@
+# app/normalizer/alias_paths.py
+#
+# Alias path table for normalize_incoming_json, loaded from the declarative
+# spec in specs/default.json.
+# Keys are canonical field names; values are the insurer JSON paths tried in
+# order. "driver.*" and "vehicle.*" paths are relative to one list item.
+
+import json
+import os
+
+SPEC_DIR = os.path.join(os.path.dirname(__file__), "specs")
+
+with open(os.path.join(SPEC_DIR, "default.json"), "r") as f:
+    _DEFAULT_SPEC = json.load(f)
+
+ALIAS_PATHS = _DEFAULT_SPEC["aliases"]
+
+# Fields looked up with find_list (first list wins) instead of find_value.
+LIST_FIELDS = set(_DEFAULT_SPEC["listFields"])
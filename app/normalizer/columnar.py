@@ -0,0 +1,224 @@
+# app/normalizer/columnar.py
+#
+# Columnar bulk normalization for portfolio-scale batches.
+#
+# normalize_columnar resolves each payload exactly like
+# normalize_incoming_json (same carrier specs, plan cache and `or` defaults)
+# but keeps only the fields scoring and analytics read, as columns:
+#   - numeric fields -> float64 NumPy arrays, NaN where missing/unparseable
+#   - string fields  -> dictionary-encoded columns (int32 codes into a list
+#                       of interned values), so repeated makes, states and
+#                       coverage types are stored once per batch
+# No `raw` references are kept. Drivers and vehicles are flat tables with a
+# `submission` row index and CSR-style offsets per submission.
+
+import math
+import sys
+from array import array
+
+import numpy as np
+
+from .normalizer import _resolvers, normalize_coverage, normalize_driver, normalize_vehicle
+
+MISSING_CODE = -1
+
+
+def to_number(value):
+    """
+    float for numeric-looking values, NaN otherwise. Booleans are numbers
+    (True -> 1.0), matching how the scoring code compares them.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace(",", ""))
+        except ValueError:
+            return math.nan
+    return math.nan
+
+
+class StringColumn:
+    """
+    Dictionary-encoded string column: codes[i] indexes into values, or is
+    MISSING_CODE for None.
+    """
+
+    __slots__ = ("codes", "values")
+
+    def __init__(self, codes, values):
+        self.codes = codes
+        self.values = values
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        code = self.codes[index]
+        return None if code == MISSING_CODE else self.values[code]
+
+    def to_list(self):
+        values = self.values
+        return [None if code == MISSING_CODE else values[code] for code in self.codes.tolist()]
+
+    def equals(self, value):
+        """
+        Boolean mask of rows equal to `value`, without decoding.
+        """
+        try:
+            code = self.values.index(value)
+        except ValueError:
+            return np.zeros(len(self.codes), dtype=bool)
+        return self.codes == code
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + sum(sys.getsizeof(v) for v in self.values)
+
+
+class _StringBuilder:
+    __slots__ = ("codes", "values", "index")
+
+    def __init__(self):
+        self.codes = array("i")
+        self.values = []
+        self.index = {}
+
+    def append(self, value):
+        if value is None:
+            self.codes.append(MISSING_CODE)
+            return
+        if not isinstance(value, str):
+            value = str(value)
+        code = self.index.get(value)
+        if code is None:
+            code = len(self.values)
+            value = sys.intern(value)
+            self.index[value] = code
+            self.values.append(value)
+        self.codes.append(code)
+
+    def build(self):
+        return StringColumn(np.frombuffer(self.codes, dtype=np.int32).copy(), self.values)
+
+
+class _Table:
+    """
+    Named columns being filled row by row.
+    """
+
+    def __init__(self, numeric, strings, flags=()):
+        self.numeric = {name: array("d") for name in numeric}
+        self.strings = {name: _StringBuilder() for name in strings}
+        self.flags = {name: array("b") for name in flags}
+
+    def build(self):
+        columns = {name: np.frombuffer(col, dtype=np.float64).copy() for name, col in self.numeric.items()}
+        columns.update((name, np.frombuffer(col, dtype=np.int8).astype(bool)) for name, col in self.flags.items())
+        columns.update((name, col.build()) for name, col in self.strings.items())
+        return columns
+
+
+class ColumnarBatch:
+    """
+    Normalized batch as three column tables.
+
+    submissions[...]  one row per payload
+    drivers[...]      one row per driver; drivers["submission"] is the row's
+                      payload index, driver_offsets[i]:driver_offsets[i + 1]
+                      are payload i's drivers
+    vehicles[...]     same layout as drivers
+    """
+
+    def __init__(self, submissions, drivers, vehicles, driver_offsets, vehicle_offsets):
+        self.submissions = submissions
+        self.drivers = drivers
+        self.vehicles = vehicles
+        self.driver_offsets = driver_offsets
+        self.vehicle_offsets = vehicle_offsets
+
+    def __len__(self):
+        return len(self.driver_offsets) - 1
+
+    @property
+    def nbytes(self):
+        total = self.driver_offsets.nbytes + self.vehicle_offsets.nbytes
+        for table in (self.submissions, self.drivers, self.vehicles):
+            for column in table.values():
+                total += column.nbytes
+        return total
+
+
+def normalize_columnar(payloads):
+    """
+    Normalize an iterable of raw insurer payloads into a ColumnarBatch.
+    Payloads are consumed one at a time, so a generator works.
+    """
+    submissions = _Table(
+        numeric=("customerAge", "liabilityLimit", "deductible"),
+        strings=("state", "zip", "coverageType", "sourceSystem"),
+    )
+    drivers = _Table(
+        numeric=("age", "accidents", "violations"),
+        strings=("firstName", "lastName", "licenseNumber"),
+        flags=("majorViolation",),
+    )
+    vehicles = _Table(
+        numeric=("year", "annualMileage"),
+        strings=("vin", "make", "model"),
+    )
+    driver_submission = array("q")
+    vehicle_submission = array("q")
+    driver_offsets = array("q", [0])
+    vehicle_offsets = array("q", [0])
+
+    for row, raw_json in enumerate(payloads):
+        payload_resolver, driver_resolver, vehicle_resolver = _resolvers(raw_json)
+        source = payload_resolver(raw_json)
+
+        raw_coverage = raw_json.get("coverage", {})
+        coverage = normalize_coverage(raw_coverage, source)
+
+        submissions.numeric["customerAge"].append(to_number(source.value("customer.age")))
+        submissions.numeric["liabilityLimit"].append(to_number(coverage["liabilityLimit"]))
+        submissions.numeric["deductible"].append(to_number(coverage["deductible"]))
+        submissions.strings["state"].append(source.value("customer.address.state") or "")
+        submissions.strings["zip"].append(source.value("customer.address.zip") or "")
+        submissions.strings["coverageType"].append(coverage["coverageType"])
+        submissions.strings["sourceSystem"].append(source.value("policy.sourceSystem"))
+
+        for d in source.list("drivers"):
+            driver = normalize_driver(driver_resolver(d))
+            drivers.numeric["age"].append(to_number(driver["age"]))
+            drivers.numeric["accidents"].append(to_number(driver["accidents"]))
+            drivers.numeric["violations"].append(to_number(driver["violations"]))
+            drivers.flags["majorViolation"].append(bool(driver["majorViolation"]))
+            drivers.strings["firstName"].append(driver["firstName"])
+            drivers.strings["lastName"].append(driver["lastName"])
+            drivers.strings["licenseNumber"].append(driver["licenseNumber"])
+            driver_submission.append(row)
+
+        for v in source.list("vehicles"):
+            vehicle = normalize_vehicle(vehicle_resolver(v))
+            vehicles.numeric["year"].append(to_number(vehicle["year"]))
+            vehicles.numeric["annualMileage"].append(to_number(vehicle["annualMileage"]))
+            vehicles.strings["vin"].append(vehicle["vin"])
+            vehicles.strings["make"].append(vehicle["make"])
+            vehicles.strings["model"].append(vehicle["model"])
+            vehicle_submission.append(row)
+
+        driver_offsets.append(len(driver_submission))
+        vehicle_offsets.append(len(vehicle_submission))
+
+    driver_columns = drivers.build()
+    driver_columns["submission"] = np.frombuffer(driver_submission, dtype=np.int64).copy()
+    vehicle_columns = vehicles.build()
+    vehicle_columns["submission"] = np.frombuffer(vehicle_submission, dtype=np.int64).copy()
+
+    return ColumnarBatch(
+        submissions.build(),
+        driver_columns,
+        vehicle_columns,
+        np.frombuffer(driver_offsets, dtype=np.int64).copy(),
+        np.frombuffer(vehicle_offsets, dtype=np.int64).copy(),
+    )
@@ -1,143 +1,189 @@
-from .utils.safe_get import safe_get
-from .utils.find_value import find_value
-from .utils.find_list import find_list
+from app.metrics import increment
+from app.models.records import Coverage, Customer, Driver, Policy, Vehicle
+from .alias_paths import ALIAS_PATHS, LIST_FIELDS
+from .plan_cache import ScopePlanner
+from .spec_compiler import detect_source_system, load_specs
+from .utils.compiled_path import compile_paths
+
+# Alias paths are split once at import instead of on every lookup.
+COMPILED_PATHS = {field: compile_paths(paths) for field, paths in ALIAS_PATHS.items()}
+
+
+def _scope(prefix=None):
+    if prefix:
+        return {f: p for f, p in COMPILED_PATHS.items() if f.startswith(prefix)}
+    return {f: p for f, p in COMPILED_PATHS.items() if not f.startswith(("driver.", "vehicle."))}
+
+
+# One plan cache per lookup scope, keyed by schema fingerprint.
+PAYLOAD_PLANNER = ScopePlanner("payload", _scope(), LIST_FIELDS)
+DRIVER_PLANNER = ScopePlanner("driver", _scope("driver."), LIST_FIELDS)
+VEHICLE_PLANNER = ScopePlanner("vehicle", _scope("vehicle."), LIST_FIELDS)
+
+# Carrier specs compiled at startup, keyed by casefolded sourceSystem.
+CARRIER_SPECS = load_specs()
+
+
+def _resolvers(raw_json):
+    """
+    (payload, driver, vehicle) resolver factories for this payload: the
+    carrier's compiled spec when its sourceSystem is known (with a per-field
+    alias fallback), otherwise the generic alias search.
+    """
+    system = detect_source_system(raw_json)
+    spec = CARRIER_SPECS.get(system.casefold()) if system else None
+    if spec is None:
+        return PAYLOAD_PLANNER.resolver, DRIVER_PLANNER.resolver, VEHICLE_PLANNER.resolver
+
+    increment(f"normalizer_spec_{spec.name}")
+    return spec.payload_resolver, spec.driver_resolver, spec.vehicle_resolver
+
+
+def normalize_driver(driver):
+    """
+    Normalized fields of one driver, from its resolver.
+    """
+    return {
+        "firstName": driver.value("driver.firstName") or "",
+        "lastName": driver.value("driver.lastName") or "",
+        "age": driver.value("driver.age"),
+        "licenseNumber": driver.value("driver.licenseNumber") or "",
+        "accidents": driver.value("driver.accidents") or 0,
+        "violations": driver.value("driver.violations") or 0,
+        "majorViolation": driver.value("driver.majorViolation") or False
+    }
+
+
+def normalize_vehicle(vehicle):
+    """
+    Normalized fields of one vehicle, from its resolver.
+    """
+    return {
+        "vin": vehicle.value("vehicle.vin"),
+        "year": vehicle.value("vehicle.year"),
+        "make": vehicle.value("vehicle.make"),
+        "model": vehicle.value("vehicle.model"),
+        "annualMileage": vehicle.value("vehicle.annualMileage")
+    }
+
+
+def normalize_coverage(raw_coverage, source):
+    """
+    Coverage fields: explicit `coverage.*` keys win over alias lookups.
+    """
+    return {
+        "liabilityLimit": raw_coverage.get("liabilityLimit")
+            or source.value("coverage.liabilityLimit"),
+
+        "collisionDeductible": raw_coverage.get("collisionDeductible")
+            or source.value("coverage.collisionDeductible"),
+
+        "comprehensiveDeductible": raw_coverage.get("comprehensiveDeductible")
+            or source.value("coverage.comprehensiveDeductible"),
+
+        "deductible": raw_coverage.get("deductible")
+            or raw_coverage.get("collisionDeductible")
+            or source.value("coverage.deductible"),
+
+        "coverageType": (
+            raw_coverage.get("coverageType")
+            or source.value("coverage.coverageType")
+            or "Standard Auto"
+        )
+    }
+
+
+def build_customer(raw_json, source):
+    return Customer(
+        firstName=source.value("customer.firstName") or "",
+        lastName=source.value("customer.lastName") or "",
+        age=source.value("customer.age"),
+        licenseNumber=source.value("customer.licenseNumber") or "",
+        street=source.value("customer.address.street") or "",
+        city=source.value("customer.address.city") or "",
+        state=source.value("customer.address.state") or "",
+        zip=source.value("customer.address.zip") or "",
+        raw=raw_json.get("customer", {})
+    )
+
+
+def build_policy(raw_json, source):
+    return Policy(
+        state=source.value("policy.state"),
+        effectiveDate=source.value("policy.effectiveDate"),
+        expirationDate=source.value("policy.expirationDate"),
+        transactionId=source.value("policy.transactionId"),
+        sourceSystem=source.value("policy.sourceSystem"),
+        raw=raw_json.get("policy", {})
+    )
+
+
+def normalize_records(raw_json):
+    """
+    The sections the underwriting pipeline reads, as compact records
+    (app.models.records) instead of the nested dicts of
+    normalize_incoming_json. Field values are identical.
+    """
+    payload_resolver, driver_resolver, vehicle_resolver = _resolvers(raw_json)
+    source = payload_resolver(raw_json)
+
+    raw_coverage = raw_json.get("coverage", {})
+    raw_guidewire = raw_json.get("guidewire", {})
+    policy = build_policy(raw_json, source)
+
+    return {
+        "customer": build_customer(raw_json, source),
+        "drivers": [Driver(raw=d, **normalize_driver(driver_resolver(d))) for d in source.list("drivers")],
+        "vehicles": [Vehicle(raw=v, **normalize_vehicle(vehicle_resolver(v))) for v in source.list("vehicles")],
+        "coverage": Coverage(raw=raw_coverage, **normalize_coverage(raw_coverage, source)),
+        "policy": policy,
+        "guidewire": {
+            "state": raw_guidewire.get("state") or policy.state,
+            "raw": raw_guidewire
+        },
+    }
+
 
 def normalize_incoming_json(raw_json):
     """
     Convert ANY insurer JSON into the Canonical OptimaAI JSON format.
     """
+    payload_resolver, driver_resolver, vehicle_resolver = _resolvers(raw_json)
+    source = payload_resolver(raw_json)
 
     # -------------------------
     # CUSTOMER SECTION
     # -------------------------
-    customer = {
-        "firstName": find_value(raw_json, [
-            "customer.firstName",
-            "insured.givenName",
-            "applicant.firstName",
-            "policyHolder.firstName"
-        ]) or "",
-        "lastName": find_value(raw_json, [
-            "customer.lastName",
-            "insured.familyName",
-            "applicant.lastName",
-            "policyHolder.lastName"
-        ]) or "",
-        "age": find_value(raw_json, [
-            "customer.age",
-            "insured.age",
-            "applicant.age"
-        ]),
-        "licenseNumber": find_value(raw_json, [
-            "customer.licenseNumber",
-            "insured.license",
-            "applicant.licenseNumber"
-        ]) or "",
-        "address": {
-            "street": find_value(raw_json, [
-                "customer.address.street",
-                "insured.location.street",
-                "riskLocation.street"
-            ]) or "",
-            "city": find_value(raw_json, [
-                "customer.address.city",
-                "insured.location.city",
-                "riskLocation.city"
-            ]) or "",
-            "state": find_value(raw_json, [
-                "customer.address.state",
-                "insured.location.stateCd",
-                "riskLocation.state"
-            ]) or "",
-            "zip": find_value(raw_json, [
-                "customer.address.zip",
-                "insured.location.postalCode",
-                "riskLocation.zipCode"
-            ]) or ""
-        },
-        "raw": raw_json.get("customer", {})
-    }
+    customer = build_customer(raw_json, source).to_json()
 
     # -------------------------
     # DRIVERS SECTION
     # -------------------------
-    raw_drivers = find_list(raw_json, [
-        "drivers",
-        "operatorList",
-        "driverInfo",
-        "riskDrivers"
-    ])
+    raw_drivers = source.list("drivers")
 
     drivers = []
     for d in raw_drivers:
-        normalized_driver = {
-            "firstName": find_value(d, ["firstName", "fname", "givenName"]) or "",
-            "lastName": find_value(d, ["lastName", "lname", "familyName"]) or "",
-            "age": find_value(d, ["age"]),
-            "licenseNumber": find_value(d, ["licenseNumber", "license"]) or "",
-            "accidents": find_value(d, ["accHist", "accidents", "accidentCount"]) or 0,
-            "violations": find_value(d, ["violations", "violationCount"]) or 0,
-            "majorViolation": find_value(d, ["majorViolation", "majorViol"]) or False
-        }
-
         drivers.append({
             "raw": d,
-            "normalized": normalized_driver
+            "normalized": normalize_driver(driver_resolver(d))
         })
 
     # -------------------------
     # VEHICLES SECTION (FIXED)
     # -------------------------
-    raw_vehicles = find_list(raw_json, [
-        "vehicles",
-        "autos",
-        "riskVehicles",
-        "vehicleList"
-    ])
+    raw_vehicles = source.list("vehicles")
 
     vehicles = []
     for v in raw_vehicles:
-        normalized_vehicle = {
-            "vin": find_value(v, ["vin", "VIN", "vehicleId"]),
-            "year": find_value(v, ["year", "modelYear"]),
-            "make": find_value(v, ["make", "manufacturer"]),
-            "model": find_value(v, ["model", "vehicleModel"]),
-            "annualMileage": find_value(v, ["annualMileage", "mileage"])
-        }
-
         vehicles.append({
             "raw": v,
-            "normalized": normalized_vehicle
+            "normalized": normalize_vehicle(vehicle_resolver(v))
         })
 
     # -------------------------
     # POLICY SECTION
     # -------------------------
-    policy = {
-        "state": find_value(raw_json, [
-            "policy.state",
-            "insured.location.stateCd",
-            "riskLocation.state"
-        ]),
-        "effectiveDate": find_value(raw_json, [
-            "policy.effectiveDate",
-            "transaction.effectiveDate"
-        ]),
-        "expirationDate": find_value(raw_json, [
-            "policy.expirationDate",
-            "transaction.expirationDate"
-        ]),
-        "transactionId": find_value(raw_json, [
-            "policy.transactionId",
-            "transaction.id"
-        ]),
-        "sourceSystem": find_value(raw_json, [
-            "sourceSystem",
-            "system",
-            "origin"
-        ]),
-        "raw": raw_json.get("policy", {})
-    }
+    policy = build_policy(raw_json, source).to_json()
 
     # -------------------------
     # APPLICANT (for PDF)
@@ -156,165 +202,60 @@ def normalize_incoming_json(raw_json):
     # RISK SECTION (for PDF)
     # -------------------------
     risk = {
-        "score": find_value(raw_json, [
-            "risk.score",
-            "underwriting.riskScore",
-            "uw.risk.score",
-            "score"
-        ]),
-        "eligibility": find_value(raw_json, [
-            "risk.eligibility",
-            "underwriting.eligibility",
-            "uw.eligibility",
-            "eligibility"
-        ]),
-        "topDrivers": find_list(raw_json, [
-            "risk.topDrivers",
-            "underwriting.topRiskDrivers",
-            "uw.riskDrivers"
-        ])
+        "score": source.value("risk.score"),
+        "eligibility": source.value("risk.eligibility"),
+        "topDrivers": source.list("risk.topDrivers")
     }
 
     # -------------------------
     # PRICING SECTION (for PDF)
     # -------------------------
     pricing = {
-        "finalPremium": find_value(raw_json, [
-            "pricing.finalPremium",
-            "premium.final",
-            "premium.total",
-            "finalPremium"
-        ]),
-        "base": find_value(raw_json, [
-            "pricing.base",
-            "premium.base",
-            "basePremium"
-        ]),
-        "driverImpact": find_value(raw_json, [
-            "pricing.driverImpact",
-            "premium.driverImpact"
-        ]),
-        "vehicleImpact": find_value(raw_json, [
-            "pricing.vehicleImpact",
-            "premium.vehicleImpact"
-        ]),
-        "zipImpact": find_value(raw_json, [
-            "pricing.zipImpact",
-            "premium.zipImpact"
-        ]),
-        "coverageImpact": find_value(raw_json, [
-            "pricing.coverageImpact",
-            "premium.coverageImpact"
-        ]),
-        "discounts": find_value(raw_json, [
-            "pricing.discounts",
-            "premium.discounts"
-        ]),
-        "narrative": find_value(raw_json, [
-            "pricing.narrative",
-            "premium.narrative",
-            "pricingNotes"
-        ]),
-        "topPricingFactors": find_list(raw_json, [
-            "pricing.topPricingFactors",
-            "pricing.factors",
-            "underwriting.pricingFactors"
-        ])
+        "finalPremium": source.value("pricing.finalPremium"),
+        "base": source.value("pricing.base"),
+        "driverImpact": source.value("pricing.driverImpact"),
+        "vehicleImpact": source.value("pricing.vehicleImpact"),
+        "zipImpact": source.value("pricing.zipImpact"),
+        "coverageImpact": source.value("pricing.coverageImpact"),
+        "discounts": source.value("pricing.discounts"),
+        "narrative": source.value("pricing.narrative"),
+        "topPricingFactors": source.list("pricing.topPricingFactors")
     }
 
     # -------------------------
     # SUMMARY SECTION (for PDF)
     # -------------------------
     summary = {
-        "narrative": find_value(raw_json, [
-            "summary.narrative",
-            "underwriting.summary",
-            "uw.summary",
-            "executiveSummary",
-            "narrative"
-        ])
+        "narrative": source.value("summary.narrative")
     }
 
     # -------------------------
     # COMPLIANCE SECTION (for PDF)
     # -------------------------
     compliance = {
-        "state": find_value(raw_json, [
-            "compliance.state",
-            "policy.state",
-            "riskLocation.state",
-            "insured.location.stateCd"
-        ]),
-        "overallStatus": find_value(raw_json, [
-            "compliance.overallStatus",
-            "compliance.status",
-            "uw.complianceStatus",
-            "underwriting.complianceStatus"
-        ]),
-        "notes": find_value(raw_json, [
-            "compliance.notes",
-            "compliance.message",
-            "uw.complianceNotes",
-            "underwriting.complianceNotes"
-        ]),
-        "rulesChecked": find_list(raw_json, [
-            "compliance.rulesChecked",
-            "compliance.rules",
-            "uw.rulesChecked",
-            "underwriting.rules"
-        ])
+        "state": source.value("compliance.state"),
+        "overallStatus": source.value("compliance.overallStatus"),
+        "notes": source.value("compliance.notes"),
+        "rulesChecked": source.list("compliance.rulesChecked")
     }
 
     # -------------------------
     # AI INSIGHTS SECTION (for PDF)
     # -------------------------
     ai_insights = {
-        "driverRisk": find_value(raw_json, [
-            "aiInsights.driverRisk",
-            "insights.driverRisk",
-            "underwriting.driverRisk",
-            "uw.driverRisk"
-        ]),
-        "pricingRationale": find_value(raw_json, [
-            "aiInsights.pricingRationale",
-            "insights.pricingRationale",
-            "underwriting.pricingRationale",
-            "uw.pricingRationale"
-        ]),
-        "underwritingExplanation": find_value(raw_json, [
-            "aiInsights.underwritingExplanation",
-            "insights.underwritingExplanation",
-            "underwriting.explanation",
-            "uw.explanation"
-        ]),
-        "improvementSuggestions": find_value(raw_json, [
-            "aiInsights.improvementSuggestions",
-            "insights.improvementSuggestions",
-            "underwriting.suggestions",
-            "uw.suggestions"
-        ]),
-        "narrative": find_value(raw_json, [
-            "aiInsights.narrative",
-            "insights.narrative",
-            "underwriting.narrative",
-            "uw.narrative"
-        ])
+        "driverRisk": source.value("aiInsights.driverRisk"),
+        "pricingRationale": source.value("aiInsights.pricingRationale"),
+        "underwritingExplanation": source.value("aiInsights.underwritingExplanation"),
+        "improvementSuggestions": source.value("aiInsights.improvementSuggestions"),
+        "narrative": source.value("aiInsights.narrative")
     }
 
     # -------------------------
     # DATA LINEAGE SECTION (for PDF)
     # -------------------------
     lineage = {
-        "fields": find_list(raw_json, [
-            "lineage.fields",
-            "dataLineage.fields",
-            "traceability.fields"
-        ]) or [],
-        "missing": find_list(raw_json, [
-            "lineage.missing",
-            "dataLineage.missing",
-            "traceability.missing"
-        ]) or []
+        "fields": source.list("lineage.fields") or [],
+        "missing": source.list("lineage.missing") or []
     }
 
     # -------------------------
@@ -332,51 +273,8 @@ def normalize_incoming_json(raw_json):
     # -------------------------
     raw_coverage = raw_json.get("coverage", {})
 
-    coverage = {
-        "liabilityLimit": raw_coverage.get("liabilityLimit")
-            or find_value(raw_json, [
-                "coverage.liabilityLimit",
-                "limits.liability",
-                "policy.coverage.liability",
-                "liabilityLimit"
-            ]),
-
-        "collisionDeductible": raw_coverage.get("collisionDeductible")
-            or find_value(raw_json, [
-                "coverage.collisionDeductible",
-                "deductibles.collision",
-                "collisionDeductible"
-            ]),
-
-        "comprehensiveDeductible": raw_coverage.get("comprehensiveDeductible")
-            or find_value(raw_json, [
-                "coverage.comprehensiveDeductible",
-                "deductibles.comprehensive",
-                "comprehensiveDeductible"
-            ]),
-
-        "deductible": raw_coverage.get("deductible")
-            or raw_coverage.get("collisionDeductible")
-            or find_value(raw_json, [
-                "coverage.deductible",
-                "deductible",
-                "deductibles.collision",
-                "coverage.collisionDeductible"
-            ]),
-
-        "coverageType": (
-            raw_coverage.get("coverageType")
-            or find_value(raw_json, [
-                "coverage.coverageType",
-                "coverage.type",
-                "policy.coverage.type",
-                "coverageType"
-            ])
-            or "Standard Auto"
-        ),
-
-        "raw": raw_coverage
-    }
+    coverage = normalize_coverage(raw_coverage, source)
+    coverage["raw"] = raw_coverage
 
     # -------------------------
     # FINAL CANONICAL STRUCTURE
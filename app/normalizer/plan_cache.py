@@ -0,0 +1,141 @@
+# app/normalizer/plan_cache.py
+#
+# Schema-fingerprint plan cache for normalize_incoming_json.
+#
+# Payloads from one source system share a shape, so the alias that wins for
+# each canonical field is the same every time. The fingerprint records, for
+# every node on an alias path, whether it is a dict (and its children), a
+# list, None, or another value - exactly what find_value/find_list depend
+# on. Two payloads with the same fingerprint therefore resolve every field
+# to the same alias, and the cached plan can go straight to it.
+
+import threading
+from collections import OrderedDict
+
+from app.config import NORMALIZER_PLAN_CACHE_SIZE
+from app.metrics import increment
+from .utils.compiled_path import get_compiled
+
+_DICT, _LIST, _NONE, _VALUE = "D", "L", "N", "V"
+
+
+def _tag(value):
+    if isinstance(value, dict):
+        return _DICT
+    if isinstance(value, list):
+        return _LIST
+    if value is None:
+        return _NONE
+    return _VALUE
+
+
+def build_trie(compiled_paths):
+    """
+    Nested dict of every key prefix used by the given alias paths.
+    """
+    trie = {}
+    for paths in compiled_paths.values():
+        for keys in paths:
+            node = trie
+            for key in keys:
+                node = node.setdefault(key, {})
+    return trie
+
+
+def fingerprint(obj, trie):
+    """
+    Shape of `obj` restricted to the keys reachable by alias paths.
+    """
+    if not isinstance(obj, dict):
+        return _tag(obj)
+
+    parts = []
+    for key, child_trie in trie.items():
+        if key in obj:
+            value = obj[key]
+            if child_trie and isinstance(value, dict):
+                parts.append((key, fingerprint(value, child_trie)))
+            else:
+                parts.append((key, _tag(value)))
+    return tuple(parts)
+
+
+class ScopePlanner:
+    """
+    Plans for one lookup scope: the whole payload, one driver or one vehicle.
+    A plan maps each field to the index of its winning alias (-1 = none).
+    """
+
+    def __init__(self, name, compiled_paths, list_fields, max_entries=NORMALIZER_PLAN_CACHE_SIZE):
+        self.name = name
+        self.compiled_paths = compiled_paths
+        self.list_fields = list_fields
+        self.trie = build_trie(compiled_paths)
+        self.max_entries = max_entries
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _probe(self, obj):
+        plan = {}
+        for field, paths in self.compiled_paths.items():
+            winner = -1
+            is_list = field in self.list_fields
+            for index, keys in enumerate(paths):
+                value = get_compiled(obj, keys)
+                if (isinstance(value, list) if is_list else value is not None):
+                    winner = index
+                    break
+            plan[field] = winner
+        return plan
+
+    def plan_for(self, obj):
+        key = fingerprint(obj, self.trie)
+
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+
+        if plan is not None:
+            increment(f"normalizer_plan_{self.name}_hits")
+            return plan
+
+        increment(f"normalizer_plan_{self.name}_misses")
+        plan = self._probe(obj)
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+        return plan
+
+    def resolver(self, obj):
+        return PlannedResolver(obj, self.plan_for(obj), self.compiled_paths)
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+
+
+class PlannedResolver:
+    """
+    Field lookups for one object using its cached plan.
+    """
+
+    __slots__ = ("obj", "plan", "compiled_paths")
+
+    def __init__(self, obj, plan, compiled_paths):
+        self.obj = obj
+        self.plan = plan
+        self.compiled_paths = compiled_paths
+
+    def value(self, field):
+        index = self.plan[field]
+        if index < 0:
+            return None
+        return get_compiled(self.obj, self.compiled_paths[field][index])
+
+    def list(self, field):
+        index = self.plan[field]
+        if index < 0:
+            return []
+        return get_compiled(self.obj, self.compiled_paths[field][index])
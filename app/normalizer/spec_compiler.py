@@ -0,0 +1,212 @@
+# app/normalizer/spec_compiler.py
+#
+# Declarative source-mapping specs compiled into specialized extractors.
+#
+# A carrier spec (specs/<carrier>.json) names the sourceSystem values it
+# covers and gives exactly one path per canonical field. When a payload's
+# sourceSystem matches, the spec is turned into straight-line Python - one
+# function per lookup scope - that walks each path once, sharing common
+# prefixes. Fields the spec does not map, or whose path is absent from the
+# payload, fall back to the alias search for that one field, so a tagged
+# payload never normalizes to less than the generic path would give.
+# Compiled extractors are cached by spec hash, so a spec is compiled once
+# per process no matter how many times it is loaded.
+
+import hashlib
+import json
+import os
+import threading
+
+from .alias_paths import ALIAS_PATHS, LIST_FIELDS, SPEC_DIR
+from .utils.compiled_path import compile_path, compile_paths, find_list_compiled, find_value_compiled
+
+DEFAULT_SPEC_NAME = "default.json"
+
+# Top-level keys checked, in order, for the payload's source system.
+SOURCE_SYSTEM_KEYS = ("sourceSystem", "system", "origin")
+
+_COMPILED = {}
+_COMPILED_LOCK = threading.Lock()
+
+# Alias paths for the per-field fallback.
+_ALIAS_COMPILED = {field: compile_paths(paths) for field, paths in ALIAS_PATHS.items()}
+
+
+def spec_hash(spec):
+    canonical = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def validate_spec(spec, name="spec"):
+    """
+    Reject specs that name unknown fields or lack a sourceSystem list.
+    A path that is one of the field's aliases must be its first one: the
+    spec value wins whenever it is present, so a later alias would
+    reverse the alias search's precedence.
+    """
+    systems = spec.get("sourceSystem")
+    if not isinstance(systems, list) or not systems or not all(isinstance(s, str) for s in systems):
+        raise ValueError(f"{name}: 'sourceSystem' must be a non-empty list of strings")
+
+    paths = spec.get("paths")
+    if not isinstance(paths, dict) or not paths:
+        raise ValueError(f"{name}: 'paths' must be a non-empty object")
+
+    for field, path in paths.items():
+        if field not in ALIAS_PATHS:
+            raise ValueError(f"{name}: unknown canonical field '{field}'")
+        if not isinstance(path, str) or not path:
+            raise ValueError(f"{name}: path for '{field}' must be a non-empty string")
+        aliases = ALIAS_PATHS[field]
+        if path in aliases[1:]:
+            raise ValueError(f"{name}: '{field}' maps to '{path}', but alias '{aliases[0]}' takes precedence")
+
+
+def _scope_fields(paths, prefix=None):
+    if prefix:
+        return {f: p for f, p in paths.items() if f.startswith(prefix)}
+    return {f: p for f, p in paths.items() if not f.startswith(("driver.", "vehicle."))}
+
+
+def generate_scope_source(func_name, field_paths):
+    """
+    Python source for one scope's extractor. Each distinct key prefix is
+    read once into a local; a path that is absent (or not a list, for list
+    fields) comes back as None so SpecResolver falls back to the aliases.
+    """
+    lines = [f"def {func_name}(o):"]
+    names = {(): "o"}
+
+    def local_for(keys):
+        if keys in names:
+            return names[keys]
+        parent = local_for(keys[:-1])
+        name = f"v{len(names)}"
+        lines.append(f"    {name} = {parent}.get({keys[-1]!r}) if isinstance({parent}, dict) else None")
+        names[keys] = name
+        return name
+
+    results = []
+    for field, path in field_paths.items():
+        value = local_for(compile_path(path))
+        expr = f"({value} if isinstance({value}, list) else None)" if field in LIST_FIELDS else value
+        results.append(f"        {field!r}: {expr},")
+
+    lines.append("    return {")
+    lines.extend(results)
+    lines.append("    }")
+    return "\n".join(lines) + "\n"
+
+
+class CompiledSpec:
+    """
+    Extractors generated from one carrier spec.
+    """
+
+    __slots__ = ("name", "hash", "source_systems", "payload", "driver", "vehicle", "source")
+
+    def __init__(self, spec, name="spec"):
+        validate_spec(spec, name)
+        self.name = name
+        self.hash = spec_hash(spec)
+        self.source_systems = tuple(s.casefold() for s in spec["sourceSystem"])
+
+        paths = spec["paths"]
+        scopes = (
+            ("extract_payload", _scope_fields(paths)),
+            ("extract_driver", _scope_fields(paths, "driver.")),
+            ("extract_vehicle", _scope_fields(paths, "vehicle.")),
+        )
+        self.source = "\n\n".join(
+            generate_scope_source(func_name, field_paths) for func_name, field_paths in scopes
+        )
+
+        namespace = {}
+        exec(compile(self.source, f"<normalizer spec {name}>", "exec"), namespace)
+        self.payload = namespace["extract_payload"]
+        self.driver = namespace["extract_driver"]
+        self.vehicle = namespace["extract_vehicle"]
+
+    def payload_resolver(self, obj):
+        return SpecResolver(obj, self.payload(obj))
+
+    def driver_resolver(self, obj):
+        return SpecResolver(obj, self.driver(obj))
+
+    def vehicle_resolver(self, obj):
+        return SpecResolver(obj, self.vehicle(obj))
+
+
+def compile_spec(spec, name="spec"):
+    """
+    Compile a carrier spec, reusing an earlier compilation of the same spec.
+    """
+    key = spec_hash(spec)
+    with _COMPILED_LOCK:
+        compiled = _COMPILED.get(key)
+    if compiled is None:
+        compiled = CompiledSpec(spec, name)
+        with _COMPILED_LOCK:
+            compiled = _COMPILED.setdefault(key, compiled)
+    return compiled
+
+
+def load_specs(spec_dir=SPEC_DIR):
+    """
+    Compile every carrier spec in `spec_dir`, keyed by casefolded sourceSystem.
+    """
+    registry = {}
+    for filename in sorted(os.listdir(spec_dir)):
+        if not filename.endswith(".json") or filename == DEFAULT_SPEC_NAME:
+            continue
+        with open(os.path.join(spec_dir, filename), "r") as f:
+            spec = json.load(f)
+        compiled = compile_spec(spec, os.path.splitext(filename)[0])
+        for system in compiled.source_systems:
+            if system in registry:
+                raise ValueError(f"{filename}: sourceSystem '{system}' already mapped by {registry[system].name}")
+            registry[system] = compiled
+    return registry
+
+
+def detect_source_system(raw_json):
+    """
+    The payload's declared source system, or None.
+    """
+    if not isinstance(raw_json, dict):
+        return None
+    for key in SOURCE_SYSTEM_KEYS:
+        value = raw_json.get(key)
+        if isinstance(value, str) and value:
+            return value
+    guidewire = raw_json.get("guidewire")
+    if isinstance(guidewire, dict):
+        value = guidewire.get("sourceSystem")
+        if isinstance(value, str) and value:
+            return value
+    return None
+
+
+class SpecResolver:
+    """
+    Same interface as PlannedResolver, over values a spec extractor returned.
+    Fields the spec left unresolved are looked up through their aliases.
+    """
+
+    __slots__ = ("obj", "values")
+
+    def __init__(self, obj, values):
+        self.obj = obj
+        self.values = values
+
+    def value(self, field):
+        value = self.values.get(field)
+        if value is None:
+            return find_value_compiled(self.obj, _ALIAS_COMPILED[field])
+        return value
+
+    def list(self, field):
+        value = self.values.get(field)
+        if value is None:
+            return find_list_compiled(self.obj, _ALIAS_COMPILED[field])
+        return value
@@ -0,0 +1,120 @@
+# app/normalizer/stream_normalizer.py
+#
+# Streaming normalization for large fleet submissions.
+#
+# The body is parsed incrementally (stream_parser) and every driver/vehicle
+# is normalized and emitted as soon as its JSON element is complete, then
+# dropped - no `raw` copy and no full driver/vehicle list is kept. The
+# rest of the payload is collected and normalized once at the end.
+#
+# Records:
+#   {"type": "driver",  "index": i, "normalized": {...}}
+#   {"type": "vehicle", "index": i, "normalized": {...}}
+#   {"type": "submission", "normalized": {...}, "driverCount": n, "vehicleCount": m}
+#
+# Differences from normalize_incoming_json, both inherent to streaming:
+#   - if a payload carries two driver (or vehicle) list aliases, the first
+#     one in the document is used, not the first in alias order
+#   - a carrier spec applies only when the payload's sourceSystem appears
+#     before its lists (metadata usually comes first)
+
+from .alias_paths import ALIAS_PATHS
+from .normalizer import _resolvers, normalize_driver, normalize_incoming_json, normalize_vehicle
+from .stream_parser import StreamingObjectParser
+
+# Top-level list alias -> record type
+STREAM_KEYS = {
+    **{alias: "driver" for alias in ALIAS_PATHS["drivers"]},
+    **{alias: "vehicle" for alias in ALIAS_PATHS["vehicles"]},
+}
+
+
+class FleetStreamNormalizer:
+    """
+    Push interface: feed() body chunks, get back normalized records.
+    """
+
+    def __init__(self, envelope_key=None):
+        self._parser = StreamingObjectParser(STREAM_KEYS, envelope_key)
+        self._header = {}
+        self._sources = {}
+        self._counts = {"driver": 0, "vehicle": 0}
+        self._resolvers = None
+
+    def feed(self, chunk):
+        return self._records(self._parser.feed(chunk))
+
+    def finish(self):
+        """
+        Records left in the body plus the final submission record.
+        """
+        records = self._records(self._parser.close())
+
+        # Streamed lists never reach the header, so drivers/vehicles come
+        # back empty and are replaced by the counts
+        normalized = normalize_incoming_json(self._header)
+        del normalized["drivers"], normalized["vehicles"]
+
+        records.append({
+            "type": "submission",
+            "normalized": normalized,
+            "driverCount": self._counts["driver"],
+            "vehicleCount": self._counts["vehicle"],
+        })
+        return records
+
+    def _records(self, events):
+        records = []
+        for kind, key, value in events:
+            if kind == "field":
+                self._header[key] = value
+                continue
+
+            if self._resolvers is None:
+                self._resolvers = _resolvers(self._header)
+
+            record_type = STREAM_KEYS[key]
+            if record_type not in self._sources and self._wins(record_type, key):
+                self._sources[record_type] = key
+            if kind == "end" or self._sources.get(record_type) != key:
+                continue
+
+            if record_type == "driver":
+                normalized = normalize_driver(self._resolvers[1](value))
+            else:
+                normalized = normalize_vehicle(self._resolvers[2](value))
+
+            records.append({"type": record_type, "index": self._counts[record_type], "normalized": normalized})
+            self._counts[record_type] += 1
+        return records
+
+    def _wins(self, record_type, key):
+        """
+        Whether a list under `key` is what the payload resolver picks for
+        this record type (a carrier spec may name a different key).
+        """
+        probe = []
+        source = self._resolvers[0]({key: probe})
+        return source.list(record_type + "s") is probe
+
+
+def normalize_stream(chunks, envelope_key=None):
+    """
+    Normalized records from an iterable of body chunks (bytes or str).
+    """
+    normalizer = FleetStreamNormalizer(envelope_key)
+    for chunk in chunks:
+        yield from normalizer.feed(chunk)
+    yield from normalizer.finish()
+
+
+async def anormalize_stream(chunks, envelope_key=None):
+    """
+    normalize_stream for an async iterable, e.g. Request.stream().
+    """
+    normalizer = FleetStreamNormalizer(envelope_key)
+    async for chunk in chunks:
+        for record in normalizer.feed(chunk):
+            yield record
+    for record in normalizer.finish():
+        yield record
@@ -0,0 +1,287 @@
+# app/normalizer/stream_parser.py
+#
+# Incremental parser for one JSON object arriving in chunks.
+#
+# Members of the payload object are emitted as soon as they are complete.
+# Arrays under `stream_keys` are not materialized: each element is emitted
+# on its own, so a fleet's drivers/vehicles can be handled one at a time
+# while the rest of the body is still in flight. Only the element (or
+# member) currently being read is buffered.
+#
+# Events from feed()/close():
+#   ("field", key, value)   a complete non-streamed member
+#   ("item", key, value)    one element of a streamed array
+#   ("end", key, None)      a streamed array closed
+
+import codecs
+import json
+import re
+
+_WS = " \t\r\n"
+_DECODER = json.JSONDecoder()
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r"[,}\]\s]")
+
+# Parser states
+_OBJ_START, _KEY_OR_END, _KEY, _COLON, _VALUE, _AFTER_VALUE = range(6)
+_ITEM_OR_END, _ITEM, _AFTER_ITEM, _DONE = range(6, 10)
+
+
+class _ValueScanner:
+    """
+    Finds where one JSON value ends, resuming across chunks. Only string
+    quotes, escapes and brackets are inspected; json.loads validates the
+    value once it is complete.
+    """
+
+    __slots__ = ("start", "pos", "depth", "in_string", "kind")
+
+    def __init__(self, buf, start):
+        self.start = start
+        first = buf[start]
+        if first in "{[":
+            self.kind, self.pos, self.in_string = "container", start, False
+        elif first == '"':
+            self.kind, self.pos, self.in_string = "string", start + 1, True
+        else:
+            self.kind, self.pos, self.in_string = "scalar", start, False
+        self.depth = 0
+
+    def shift(self, offset):
+        self.start -= offset
+        self.pos -= offset
+
+    def scan(self, buf):
+        """
+        End index (exclusive) of the value, or -1 if more input is needed.
+        """
+        if self.kind == "scalar":
+            match = _SCALAR_END.search(buf, self.pos)
+            if match is None:
+                self.pos = len(buf)
+                return -1
+            return match.start()
+
+        pos = self.pos
+        while True:
+            if self.in_string:
+                match = _STRING_SPECIAL.search(buf, pos)
+                if match is None:
+                    self.pos = len(buf)
+                    return -1
+                if match.group() == "\\":
+                    if match.end() >= len(buf):
+                        self.pos = match.start()
+                        return -1
+                    pos = match.end() + 1
+                    continue
+                self.in_string = False
+                pos = match.end()
+                if self.kind == "string":
+                    return pos
+                continue
+
+            match = _STRUCTURAL.search(buf, pos)
+            if match is None:
+                self.pos = len(buf)
+                return -1
+            char = match.group()
+            pos = match.end()
+            if char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            else:
+                self.depth -= 1
+                if self.depth == 0:
+                    return pos
+
+
+class StreamingObjectParser:
+    """
+    Push parser for a JSON object body. With `envelope_key` set the payload
+    is the object under that key (as in {"data": {...}}) and other
+    top-level members are skipped.
+    """
+
+    def __init__(self, stream_keys=(), envelope_key=None):
+        self.stream_keys = frozenset(stream_keys)
+        self.envelope_key = envelope_key
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._state = _OBJ_START
+        # Object nesting walked by the parser: 0 = root, 1 = envelope payload
+        self._level = 0
+        self._key = None
+        self._scanner = None
+
+    @property
+    def _payload_level(self):
+        return 1 if self.envelope_key is not None else 0
+
+    def feed(self, chunk):
+        """
+        Add bytes or text; return the events completed by it.
+        """
+        if isinstance(chunk, (bytes, bytearray)):
+            chunk = self._decoder.decode(chunk)
+        self._buf = self._buf[self._pos:] + chunk
+        if self._scanner is not None:
+            self._scanner.shift(self._pos)
+        self._pos = 0
+        return list(self._run())
+
+    def close(self):
+        """
+        Flush the input; raise ValueError if the document is incomplete.
+        """
+        events = self.feed(self._decoder.decode(b"", final=True))
+        if self._state != _DONE:
+            raise ValueError("Incomplete JSON body")
+        if self._buf[self._pos:].strip(_WS):
+            raise ValueError("Extra data after JSON body")
+        return events
+
+    def _error(self, expected):
+        found = self._buf[self._pos:self._pos + 20]
+        raise ValueError(f"Invalid JSON body: expected {expected}, found {found!r}")
+
+    def _skip_ws(self):
+        buf, pos = self._buf, self._pos
+        while pos < len(buf) and buf[pos] in _WS:
+            pos += 1
+        self._pos = pos
+        return pos < len(buf)
+
+    def _read_value(self):
+        """
+        The next complete JSON value, or _INCOMPLETE.
+        """
+        if self._scanner is None:
+            # Fast path: containers and strings that are already complete
+            # decode in one C call. Scalars are excluded - "12" at the end
+            # of a chunk may still be "123".
+            if self._buf[self._pos] in '{["':
+                try:
+                    value, self._pos = _DECODER.raw_decode(self._buf, self._pos)
+                    return value
+                except ValueError:
+                    pass
+            self._scanner = _ValueScanner(self._buf, self._pos)
+        end = self._scanner.scan(self._buf)
+        if end < 0:
+            return _INCOMPLETE
+        start = self._scanner.start
+        self._scanner = None
+        self._pos = end
+        try:
+            return json.loads(self._buf[start:end])
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON body: {e}") from None
+
+    def _run(self):
+        while True:
+            state = self._state
+            if state == _DONE:
+                return
+
+            if state not in (_KEY, _VALUE, _ITEM) or self._scanner is None:
+                if not self._skip_ws():
+                    return
+            char = self._buf[self._pos]
+
+            if state == _OBJ_START:
+                if char != "{":
+                    self._error("'{'")
+                self._pos += 1
+                self._state = _KEY_OR_END
+
+            elif state == _KEY_OR_END:
+                if char == "}":
+                    self._pos += 1
+                    self._close_object()
+                elif char == '"':
+                    self._state = _KEY
+                else:
+                    self._error("a key or '}'")
+
+            elif state == _KEY:
+                if self._scanner is None and char != '"':
+                    self._error("a key")
+                key = self._read_value()
+                if key is _INCOMPLETE:
+                    return
+                self._key = key
+                self._state = _COLON
+
+            elif state == _COLON:
+                if char != ":":
+                    self._error("':'")
+                self._pos += 1
+                self._state = _VALUE
+
+            elif state == _VALUE:
+                in_payload = self._level == self._payload_level
+                if self._scanner is None and not in_payload and char == "{" and self._key == self.envelope_key:
+                    # Descend into the envelope's payload object
+                    self._pos += 1
+                    self._level = 1
+                    self._state = _KEY_OR_END
+                elif self._scanner is None and in_payload and char == "[" and self._key in self.stream_keys:
+                    self._pos += 1
+                    self._state = _ITEM_OR_END
+                else:
+                    value = self._read_value()
+                    if value is _INCOMPLETE:
+                        return
+                    if in_payload:
+                        yield ("field", self._key, value)
+                    self._state = _AFTER_VALUE
+
+            elif state == _AFTER_VALUE:
+                if char == ",":
+                    self._pos += 1
+                    self._state = _KEY_OR_END
+                elif char == "}":
+                    self._pos += 1
+                    self._close_object()
+                else:
+                    self._error("',' or '}'")
+
+            elif state == _ITEM_OR_END:
+                if char == "]":
+                    self._pos += 1
+                    yield ("end", self._key, None)
+                    self._state = _AFTER_VALUE
+                else:
+                    self._state = _ITEM
+
+            elif state == _ITEM:
+                value = self._read_value()
+                if value is _INCOMPLETE:
+                    return
+                yield ("item", self._key, value)
+                self._state = _AFTER_ITEM
+
+            elif state == _AFTER_ITEM:
+                if char == ",":
+                    self._pos += 1
+                    self._state = _ITEM
+                elif char == "]":
+                    self._pos += 1
+                    yield ("end", self._key, None)
+                    self._state = _AFTER_VALUE
+                else:
+                    self._error("',' or ']'")
+
+    def _close_object(self):
+        if self._level == 0:
+            self._state = _DONE
+        else:
+            self._level = 0
+            self._state = _AFTER_VALUE
+
+
+_INCOMPLETE = object()
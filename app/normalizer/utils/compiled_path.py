@@ -0,0 +1,53 @@
+def compile_path(path):
+    """
+    Pre-split a dotted JSON path into a tuple of keys, once.
+    """
+    return tuple(path.split("."))
+
+
+def compile_paths(paths):
+    return tuple(compile_path(p) for p in paths)
+
+
+def get_compiled(obj, keys):
+    """
+    safe_get for a pre-split path: walk the keys, return None if anything
+    is missing or a non-dict is reached.
+    """
+    current = obj
+    for key in keys:
+        if not isinstance(current, dict):
+            return None
+        current = current.get(key, _MISSING)
+        if current is _MISSING:
+            return None
+    return current
+
+
+def find_value_compiled(obj, compiled_paths):
+    """
+    find_value for pre-split paths: first value that is not None.
+    """
+    if obj is None:
+        return None
+    for keys in compiled_paths:
+        value = get_compiled(obj, keys)
+        if value is not None:
+            return value
+    return None
+
+
+def find_list_compiled(obj, compiled_paths):
+    """
+    find_list for pre-split paths: first list found, else [].
+    """
+    if obj is None:
+        return []
+    for keys in compiled_paths:
+        value = get_compiled(obj, keys)
+        if isinstance(value, list):
+            return value
+    return []
+
+
+_MISSING = object()
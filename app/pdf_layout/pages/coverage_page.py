@@ -52,8 +52,15 @@ def render_coverage_summary_page(c, context, page_number=4):
     )
     y -= section_h + 12  # Updated spacing
 
-    # Pull coverage list
+    # Pull coverage list (the canonical coverage dict is one row)
     coverages = context.get("coverage", [])
+    if isinstance(coverages, dict):
+        coverages = [{
+            "type": coverages.get("coverageType", ""),
+            "limit": coverages.get("liabilityLimit", ""),
+            "deductible": coverages.get("deductible", ""),
+            "included": True,
+        }]
 
     # Table header
     data = [["Coverage Type", "Limit", "Deductible", "Included"]]
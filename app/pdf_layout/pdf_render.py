@@ -15,9 +15,12 @@ NO layout logic belongs here.
 NO Phase‑3 polish belongs here.
 """
 
+from io import BytesIO
+
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 
+from app.metrics import stage_timer
 from app.pdf_layout.context_builder import build_context
 
 # Import all page renderers
@@ -33,6 +36,18 @@ from app.pdf_layout.fonts.register_fonts import register_fonts
 
 register_fonts()
 
+# Page order of the 8‑page report: (metrics stage name, renderer)
+PAGE_RENDERERS = [
+    ("executive_summary", render_executive_summary_page),
+    ("customer_driver", render_customer_driver_details_page),
+    ("vehicle", render_vehicle_details_page),
+    ("coverage", render_coverage_summary_page),
+    ("pricing_breakdown", render_pricing_breakdown_page),
+    ("compliance", render_compliance_summary_page),
+    ("ai_insights", render_ai_insights_summary_page),
+    ("data_lineage", render_data_lineage_page),
+]
+
 
 def safe_context(ctx):
     """
@@ -78,6 +93,9 @@ def generate_pdf(output_path, enriched_json):
     Phase‑2 PDF generation pipeline.
     1. Build context from API-provided JSON
     2. Render all 8 pages
+
+    output_path may be a filesystem path or any writable binary
+    file-like object (e.g. BytesIO).
     """
 
     print(">>> Building Phase‑2 context from API payload <<<")
@@ -89,37 +107,21 @@ def generate_pdf(output_path, enriched_json):
     print(">>> Rendering PDF <<<")
     c = canvas.Canvas(output_path, pagesize=letter)
 
-    # Page 1
-    print("Rendering page 1…")
-    render_executive_summary_page(c, context, page_number=1)
-
-    # Page 2
-    print("Rendering page 2…")
-    render_customer_driver_details_page(c, context, page_number=2)
-
-    # Page 3
-    print("Rendering page 3…")
-    render_vehicle_details_page(c, context, page_number=3)
-
-    # Page 4
-    print("Rendering page 4…")
-    render_coverage_summary_page(c, context, page_number=4)
+    for page_number, (name, render_page) in enumerate(PAGE_RENDERERS, start=1):
+        print(f"Rendering page {page_number}…")
+        with stage_timer(f"pdf_page.{name}"):
+            render_page(c, context, page_number=page_number)
 
-    # Page 5
-    print("Rendering page 5…")
-    render_pricing_breakdown_page(c, context, page_number=5)
-
-    # Page 6
-    print("Rendering page 6…")
-    render_compliance_summary_page(c, context, page_number=6)
-
-    # Page 7
-    print("Rendering page 7…")
-    render_ai_insights_summary_page(c, context, page_number=7)
+    with stage_timer("pdf_save"):
+        c.save()
+    print(f"PDF generated: {output_path}")
 
-    # Page 8
-    print("Rendering page 8…")
-    render_data_lineage_page(c, context, page_number=8)
 
-    c.save()
-    print(f"PDF generated: {output_path}")
+def render_pdf_bytes(enriched_json):
+    """
+    Renders the 8‑page report fully in memory and returns the PDF bytes.
+    No temp file is written, so concurrent requests never share state.
+    """
+    buffer = BytesIO()
+    generate_pdf(buffer, enriched_json)
+    return buffer.getvalue()
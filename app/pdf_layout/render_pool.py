@@ -0,0 +1,112 @@
+"""
+PDF Render Pool
+---------------
+ReportLab layout is pure Python and CPU-bound. Rendering it on the API
+worker holds the GIL and stalls every other request, so reports are
+rendered in a pool of worker processes instead.
+
+Each worker registers fonts and imports all page modules once at start
+(the initializer imports pdf_render), then only receives enriched JSON
+and returns PDF bytes.
+
+If a worker dies (OOM kill, segfault) the executor is broken for good;
+the pool is then rebuilt and the request retried once.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.config import PDF_RENDER_WORKERS
+from app.metrics import collect_observations, increment, record_observations
+
+_pool = None
+_workers = 0
+_restart_lock = threading.Lock()
+
+
+def _init_worker():
+    # Importing the renderer registers fonts and loads all 8 page modules.
+    import app.pdf_layout.pdf_render  # noqa: F401
+
+
+def _render(enriched_json):
+    # Stage timings are buffered and returned with the PDF, because metrics
+    # recorded inside a worker process would never reach /metrics.
+    from app.pdf_layout.pdf_render import render_pdf_bytes
+    with collect_observations() as observations:
+        pdf_bytes = render_pdf_bytes(enriched_json)
+    return pdf_bytes, list(observations)
+
+
+def start_render_pool(workers=PDF_RENDER_WORKERS):
+    """
+    Starts the worker processes and pre-warms them.
+    Called from the FastAPI lifespan. No-op when workers is 0.
+    """
+    global _pool, _workers
+    if _pool is not None or workers <= 0:
+        return _pool
+
+    _workers = workers
+    _pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+
+    # Force every worker to spawn and run its initializer now, not on the
+    # first user request.
+    for future in [_pool.submit(_init_worker) for _ in range(workers)]:
+        future.result()
+
+    print(f">>> PDF RENDER POOL STARTED ({workers} workers) <<<")
+    return _pool
+
+
+def stop_render_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def _restart_render_pool(broken):
+    """
+    Replaces a broken pool with a fresh one and returns the new pool.
+    Requests that hit the same broken pool concurrently rebuild it once.
+    """
+    global _pool
+    with _restart_lock:
+        if _pool is broken:
+            print(">>> PDF RENDER POOL BROKEN, RESTARTING <<<")
+            increment("pdf_render_pool_restarts")
+            broken.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+            start_render_pool(_workers)
+        return _pool
+
+
+async def render_pdf_async(enriched_json):
+    """
+    Renders the report without blocking the event loop.
+    Uses the process pool when started, otherwise a thread.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pool
+    if pool is not None:
+        try:
+            pdf_bytes, observations = await loop.run_in_executor(pool, _render, enriched_json)
+        except BrokenProcessPool:
+            # Restarting spawns and pre-warms workers; keep it off the loop
+            pool = await asyncio.to_thread(_restart_render_pool, pool)
+            if pool is not None:
+                pdf_bytes, observations = await loop.run_in_executor(pool, _render, enriched_json)
+
+    if pool is None:
+        pdf_bytes, observations = await asyncio.to_thread(_render, enriched_json)
+
+    record_observations(observations)
+    return pdf_bytes
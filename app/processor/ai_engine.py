@@ -2,23 +2,177 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 
+import asyncio
 import json
 import os
-from groq import Groq
-from app.prompt.prompt_registry import get_system_prompt
+import re
+import time
+import httpx
+from groq import Groq, AsyncGroq
+from app.config import (
+    AI_MAX_CONCURRENCY,
+    AI_CONTEXT_COMPACTION_ENABLED,
+    AI_CONTEXT_TOKEN_BUDGET,
+    AI_LATENCY_BUDGET_SECONDS,
+    AI_HEDGE_AFTER_SECONDS,
+    AI_MODEL_CONTEXT_TOKENS,
+    AI_BATCH_OUTPUT_TOKENS_PER_ITEM,
+    AI_BATCH_MAX_ITEMS,
+    AI_OUTPUT_MODE,
+    GROQ_BASE_URL,
+    GROQ_POOL_SIZE,
+    GROQ_KEEPALIVE_CONNECTIONS,
+    GROQ_KEEPALIVE_EXPIRY_SECONDS,
+    GROQ_CONNECT_TIMEOUT_SECONDS,
+    GROQ_TIMEOUT_SECONDS,
+    GROQ_MAX_RETRIES,
+)
+from app.metrics import increment
+from app.prompt.prompt_registry import PROMPT_MAP, SIMPLE_PROMPT, detect_scenario
+from app.prompt.batch_prompt import BATCH_PROMPT
+from app.prompt.json_output_prompt import JSON_OUTPUT_INSTRUCTION, JSON_REPAIR_PROMPT
+from app.processor.ai_insights import is_well_formed, parse_json_insights
+from app.processor.context_compactor import compact_context, estimate_tokens
+from app.processor.rate_limiter import BATCH, INTERACTIVE, get_rate_limiter
+from app.processor.insight_cache import get_insight_cache, make_cache_key
 
 print("MODEL FROM ENV AT RUNTIME:", os.getenv("GROQ_MODEL"))
 
+
+class InvalidAIOutput(Exception):
+    """
+    Raised when a JSON-mode reply still fails INSIGHTS_SCHEMA after the
+    repair retry; the caller serves the deterministic insights instead.
+    """
+
+
+# ------------------------------------------------------------
+# CONCURRENCY CAP (async path)
+# ------------------------------------------------------------
+_ai_semaphore = None
+
+
+def get_ai_semaphore():
+    """
+    Returns the process-wide semaphore that caps in-flight LLM calls.
+    Created lazily so it binds to the running event loop.
+    """
+    global _ai_semaphore
+    if _ai_semaphore is None:
+        _ai_semaphore = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+    return _ai_semaphore
+
+
+# ------------------------------------------------------------
+# HTTP CONNECTION POOL
+# ------------------------------------------------------------
+def _http_limits():
+    return httpx.Limits(
+        max_connections=GROQ_POOL_SIZE,
+        max_keepalive_connections=GROQ_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=GROQ_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def _http_timeout():
+    return httpx.Timeout(GROQ_TIMEOUT_SECONDS, connect=GROQ_CONNECT_TIMEOUT_SECONDS)
+
+
+# ------------------------------------------------------------
+# RATE LIMITING
+# ------------------------------------------------------------
+# Completion tokens reserved per single-submission call.
+EXPECTED_OUTPUT_TOKENS = 200
+
+
+def _request_tokens(messages, output_tokens=EXPECTED_OUTPUT_TOKENS):
+    return sum(estimate_tokens(m["content"]) for m in messages) + output_tokens
+
+
+def _interactive_deadline():
+    """
+    End of the latency budget for a request starting now (time.time()),
+    or None without a budget. Computed once per request; the throttle,
+    the call and the repair retry all spend the same budget.
+    """
+    if AI_LATENCY_BUDGET_SECONDS > 0:
+        return time.time() + AI_LATENCY_BUDGET_SECONDS
+    return None
+
+
+def _remaining(deadline):
+    """
+    Seconds left before `deadline`; raises TimeoutError once it has passed.
+    """
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise TimeoutError("AI latency budget exhausted")
+    return remaining
+
+
+def throttle_sync(messages, priority=INTERACTIVE, deadline=None, output_tokens=EXPECTED_OUTPUT_TOKENS):
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        limiter.acquire_sync(_request_tokens(messages, output_tokens), priority, deadline)
+
+
+async def throttle(messages, priority=INTERACTIVE, deadline=None):
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        await limiter.acquire(_request_tokens(messages), priority, deadline)
+
+
 class AIEngine:
+    """
+    Wraps the Groq sync and async clients.
+    Use get_ai_engine() to share one instance (and its keep-alive pool)
+    across the whole process.
+    """
+
     def __init__(self):
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        self.client = Groq(
+            api_key=os.getenv("GROQ_API_KEY"),
+            base_url=GROQ_BASE_URL,
+            max_retries=GROQ_MAX_RETRIES,
+            timeout=_http_timeout(),
+            http_client=httpx.Client(limits=_http_limits(), timeout=_http_timeout()),
+        )
+        self._async_client = None
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = AsyncGroq(
+                api_key=os.getenv("GROQ_API_KEY"),
+                base_url=GROQ_BASE_URL,
+                max_retries=GROQ_MAX_RETRIES,
+                timeout=_http_timeout(),
+                http_client=httpx.AsyncClient(limits=_http_limits(), timeout=_http_timeout()),
+            )
+        return self._async_client
+
+    def close(self):
+        self.client.close()
 
-    def build_messages(self, underwriting_context):
+    async def aclose(self):
+        self.client.close()
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
+    def build_messages(self, underwriting_context, output_mode="delimited"):
         """
         Build the message payload for the LLM using the dynamic system prompt
         selected by the Prompt Orchestrator.
+        The context is compacted to what that prompt needs (see
+        context_compactor) unless AI_CONTEXT_COMPACTION_ENABLED is off.
         """
-        system_prompt = get_system_prompt(underwriting_context)
+        scenario = detect_scenario(underwriting_context)
+        system_prompt = PROMPT_MAP.get(scenario, SIMPLE_PROMPT)
+        context_json = self.serialize_context(underwriting_context, scenario)
+
+        if output_mode == "json":
+            system_prompt = system_prompt + JSON_OUTPUT_INSTRUCTION
 
         return [
             {
@@ -31,22 +185,370 @@ class AIEngine:
             },
             {
                 "role": "user",
-                "content": json.dumps(underwriting_context)
+                "content": context_json
             }
         ]
 
-    def generate_insights(self, underwriting_context):
+    def build_repair_messages(self, underwriting_context):
+        """
+        Shortened prompt for the single JSON repair retry: repair instruction
+        plus the context compacted to half the usual budget.
+        """
+        context_json, _ = compact_context(
+            underwriting_context,
+            detect_scenario(underwriting_context),
+            AI_CONTEXT_TOKEN_BUDGET // 2,
+        )
+        return [
+            {"role": "system", "content": JSON_REPAIR_PROMPT},
+            {"role": "user", "content": context_json},
+        ]
+
+    def check_json_output(self, content, repair=False):
+        """
+        Validates a JSON-mode reply. Returns canonical JSON text, or None.
+        """
+        increment("ai_json_repair_responses" if repair else "ai_json_responses")
+        insights = parse_json_insights(content)
+        if insights is None:
+            increment("ai_json_repair_failures" if repair else "ai_json_parse_failures")
+            return None
+        return json.dumps(insights)
+
+    def serialize_context(self, underwriting_context, scenario):
+        if not AI_CONTEXT_COMPACTION_ENABLED:
+            return json.dumps(underwriting_context)
+
+        # Token savings are exported as ai_context_* counters
+        context_json, _ = compact_context(underwriting_context, scenario, AI_CONTEXT_TOKEN_BUDGET)
+        return context_json
+
+    def generate_insights(self, underwriting_context, priority=INTERACTIVE):
         """
         Calls Groq LLM with the dynamically selected prompt and underwriting context.
         Returns the raw model output string.
+        Identical contexts are served from the insight cache; only
+        well-formed replies are cached.
         """
-        messages = self.build_messages(underwriting_context)
+        # Interactive requests get one deadline for the whole call; the
+        # caller falls back to deterministic insights once it passes.
+        deadline = _interactive_deadline() if priority == INTERACTIVE else None
+        model = os.getenv("GROQ_MODEL")
+        cache = get_insight_cache()
+        key = make_cache_key(model, underwriting_context, AI_OUTPUT_MODE) if cache else None
+        if cache:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        messages = self.build_messages(underwriting_context, AI_OUTPUT_MODE)
 
-        response = self.client.chat.completions.create( 
-            model=os.getenv("GROQ_MODEL"), 
-            messages=messages, 
-            temperature=0.0 
+        options = {}
+        if AI_OUTPUT_MODE == "json":
+            options["response_format"] = {"type": "json_object"}
+
+        content = self._complete_sync(model, messages, priority, deadline, **options)
+
+        if AI_OUTPUT_MODE == "json":
+            checked = self.check_json_output(content)
+            if checked is None:
+                increment("ai_json_repair_retries")
+                repair_messages = self.build_repair_messages(underwriting_context)
+                content = self._complete_sync(model, repair_messages, priority, deadline, **options)
+                checked = self.check_json_output(content, repair=True)
+            if checked is None:
+                raise InvalidAIOutput("JSON insights failed validation after the repair retry")
+            content = checked
+
+        # Malformed replies fall back downstream; do not pin them in cache
+        if cache and is_well_formed(content):
+            cache.set(key, content)
+        return content
+
+    def _complete_sync(self, model, messages, priority, deadline, **options):
+        """
+        One throttled call. With a deadline it is a single attempt bounded
+        by the time left.
+        """
+        throttle_sync(messages, priority, deadline)
+        client = self.client
+        if deadline is not None:
+            client = client.with_options(max_retries=0)
+            options["timeout"] = _remaining(deadline)
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.0,
+            **options
         )
+        return response.choices[0].message.content
+
+    async def agenerate_insights(self, underwriting_context, priority=INTERACTIVE):
+        """
+        Async variant of generate_insights.
+        Awaits the Groq call instead of blocking a worker thread, and waits
+        on the AI_MAX_CONCURRENCY cap before sending. BATCH priority calls
+        have no latency budget and are not hedged.
+        """
+        deadline = _interactive_deadline() if priority == INTERACTIVE else None
+        model = os.getenv("GROQ_MODEL")
+        cache = get_insight_cache()
+        key = make_cache_key(model, underwriting_context, AI_OUTPUT_MODE) if cache else None
+        if cache:
+            cached = await cache.aget(key)
+            if cached is not None:
+                return cached
+
+        call = self._agenerate(model, underwriting_context, priority, deadline)
+        if deadline is not None:
+            content = await asyncio.wait_for(call, _remaining(deadline))
+        else:
+            content = await call
+
+        if cache and is_well_formed(content):
+            await cache.aset(key, content)
+        return content
+
+    async def _agenerate(self, model, underwriting_context, priority=INTERACTIVE, deadline=None):
+        """
+        One (possibly hedged) request, plus the JSON repair retry in json mode.
+        Raises InvalidAIOutput when the repaired reply is still invalid.
+        """
+        options = {}
+        if AI_OUTPUT_MODE == "json":
+            options["response_format"] = {"type": "json_object"}
+
+        messages = self.build_messages(underwriting_context, AI_OUTPUT_MODE)
+        if priority == INTERACTIVE:
+            content = await self._ahedged_complete(model, messages, deadline, **options)
+        else:
+            content = await self._acomplete(model, messages, priority, deadline, **options)
+        if AI_OUTPUT_MODE != "json":
+            return content
+
+        checked = self.check_json_output(content)
+        if checked is None:
+            increment("ai_json_repair_retries")
+            content = await self._acomplete(
+                model, self.build_repair_messages(underwriting_context), priority, deadline, **options
+            )
+            checked = self.check_json_output(content, repair=True)
+        if checked is None:
+            raise InvalidAIOutput("JSON insights failed validation after the repair retry")
+        return checked
+
+    async def astream_insights(self, underwriting_context):
+        """
+        Streams the raw model output as text deltas.
+        A cache hit is yielded as a single delta; a completed, well-formed
+        stream is cached.
+        Always uses the '||'-delimited format, whatever AI_OUTPUT_MODE is:
+        fields are emitted as their delimiter arrives, which a JSON reply
+        cannot offer.
+        """
+        model = os.getenv("GROQ_MODEL")
+        cache = get_insight_cache()
+        key = make_cache_key(model, underwriting_context, "delimited") if cache else None
+        if cache:
+            cached = await cache.aget(key)
+            if cached is not None:
+                yield cached
+                return
+
+        deadline = _interactive_deadline()
+        messages = self.build_messages(underwriting_context)
+        parts = []
+
+        await throttle(messages, INTERACTIVE, deadline)
+        async with get_ai_semaphore():
+            stream = await self.async_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0.0,
+                stream=True
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+
+        text = "".join(parts)
+        if cache and is_well_formed(text):
+            await cache.aset(key, text)
 
+    async def _acomplete(self, model, messages, priority=INTERACTIVE, deadline=None, **options):
+        await throttle(messages, priority, deadline)
+        async with get_ai_semaphore():
+            response = await self.async_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0.0,
+                **options
+            )
         return response.choices[0].message.content
 
+    async def _ahedged_complete(self, model, messages, deadline=None, **options):
+        """
+        Sends the request; if it is still pending after AI_HEDGE_AFTER_SECONDS,
+        sends one hedge and returns whichever succeeds first.
+        """
+        first = asyncio.ensure_future(self._acomplete(model, messages, INTERACTIVE, deadline, **options))
+        if AI_HEDGE_AFTER_SECONDS <= 0:
+            return await first
+
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=AI_HEDGE_AFTER_SECONDS)
+            if not done:
+                increment("ai_hedged_requests")
+                hedge = asyncio.ensure_future(self._acomplete(model, messages, INTERACTIVE, deadline, **options))
+                pending.add(hedge)
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            increment("ai_hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    # ------------------------------------------------------------
+    # BATCH MODE (bulk / renewal runs)
+    # ------------------------------------------------------------
+    def plan_batches(self, item_tokens):
+        """
+        Groups item indexes so each request's prompt plus expected output
+        fits AI_MODEL_CONTEXT_TOKENS, with at most AI_BATCH_MAX_ITEMS items.
+        """
+        budget = AI_MODEL_CONTEXT_TOKENS - estimate_tokens(BATCH_PROMPT) - 64
+        batches, current, used = [], [], 0
+
+        for index, tokens in enumerate(item_tokens):
+            cost = tokens + AI_BATCH_OUTPUT_TOKENS_PER_ITEM + 8
+            if current and (used + cost > budget or len(current) >= AI_BATCH_MAX_ITEMS):
+                batches.append(current)
+                current, used = [], 0
+            current.append(index)
+            used += cost
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def generate_insights_batch(self, underwriting_contexts):
+        """
+        Generates insights for many contexts with one LLM request per batch.
+        Returns raw outputs in input order. Items the batch reply does not
+        answer in the 4-field format are re-run one at a time; items that
+        still fail are None so the caller can fall back.
+        Cache keys name the output format: batch replies are always
+        delimited, while reruns (and interactive calls) use AI_OUTPUT_MODE,
+        so lookups try the AI_OUTPUT_MODE entry first, then the delimited one.
+        """
+        model = os.getenv("GROQ_MODEL")
+        cache = get_insight_cache()
+        results = [None] * len(underwriting_contexts)
+        keys = [None] * len(underwriting_contexts)
+        lookup_modes = dict.fromkeys((AI_OUTPUT_MODE, "delimited"))
+
+        pending, texts = [], []
+        for i, ctx in enumerate(underwriting_contexts):
+            if cache:
+                keys[i] = make_cache_key(model, ctx, "delimited")
+                for mode in lookup_modes:
+                    results[i] = cache.get(make_cache_key(model, ctx, mode))
+                    if results[i] is not None:
+                        break
+            if results[i] is None:
+                pending.append(i)
+                texts.append(self.serialize_context(ctx, detect_scenario(ctx)))
+
+        for batch in self.plan_batches([estimate_tokens(t) for t in texts]):
+            indexes = [pending[b] for b in batch]
+            body = "\n".join(f"### ITEM {n}\n{texts[b]}" for n, b in enumerate(batch, start=1))
+
+            messages = [
+                {"role": "system", "content": BATCH_PROMPT},
+                {"role": "user", "content": "Use the following underwriting contexts to generate AI insights."},
+                {"role": "user", "content": body},
+            ]
+
+            try:
+                throttle_sync(messages, BATCH, output_tokens=AI_BATCH_OUTPUT_TOKENS_PER_ITEM * len(batch))
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.0
+                )
+                answers = split_batch_output(response.choices[0].message.content)
+            except Exception:
+                increment("ai_batch_request_failures")
+                answers = {}
+
+            increment("ai_batch_requests")
+            increment("ai_batch_items", len(indexes))
+
+            for n, i in enumerate(indexes, start=1):
+                answer = answers.get(n)
+                if is_well_formed(answer):
+                    results[i] = answer
+                    if cache:
+                        cache.set(keys[i], answer)
+
+        for i in pending:
+            if results[i] is None:
+                increment("ai_batch_single_reruns")
+                try:
+                    results[i] = self.generate_insights(underwriting_contexts[i], BATCH)
+                except Exception:
+                    increment("ai_batch_rerun_failures")
+
+        return results
+
+
+BATCH_ITEM_HEADER = re.compile(r"^\s*#+\s*ITEM\s+(\d+)\s*:?\s*$", re.IGNORECASE | re.MULTILINE)
+
+
+def split_batch_output(text):
+    """
+    Splits a batch reply into {item_number: answer_text}.
+    """
+    answers = {}
+    matches = list(BATCH_ITEM_HEADER.finditer(text or ""))
+    for m, match in enumerate(matches):
+        end = matches[m + 1].start() if m + 1 < len(matches) else len(text)
+        answers[int(match.group(1))] = " ".join(text[match.end():end].split())
+    return answers
+
+
+# ------------------------------------------------------------
+# PROCESS-WIDE ENGINE
+# ------------------------------------------------------------
+_engine = None
+
+
+def get_ai_engine():
+    """
+    Returns the shared AIEngine, creating it on first use.
+    """
+    global _engine
+    if _engine is None:
+        _engine = AIEngine()
+    return _engine
+
+
+async def shutdown_ai_engine():
+    """
+    Closes the shared engine's connection pools (FastAPI lifespan shutdown).
+    """
+    global _engine
+    if _engine is not None:
+        await _engine.aclose()
+        _engine = None
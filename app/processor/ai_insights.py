@@ -1,4 +1,93 @@
+import json
+
+AI_FIELDS = (
+    "driverRiskFactors",
+    "pricingRationale",
+    "explanations",
+    "improvementSuggestions",
+)
+AI_FIELD_COUNT = len(AI_FIELDS)
+
+
+# -----------------------------
+# Structured (JSON) output
+# -----------------------------
+INSIGHTS_SCHEMA = {
+    "type": "object",
+    "required": list(AI_FIELDS),
+    "properties": {field: {"type": "string", "minLength": 1} for field in AI_FIELDS},
+}
+
+_JSON_TYPES = {"object": dict, "string": str, "array": list, "number": (int, float), "boolean": bool}
+
+
+def compile_schema(schema):
+    """
+    Compiles the small JSON-schema subset used here (type, required,
+    properties, minLength) into a validator returning a list of errors.
+    The schema is walked once, not on every validation.
+    """
+    expected = _JSON_TYPES[schema["type"]]
+    required = tuple(schema.get("required", ()))
+    properties = tuple(
+        (name, _JSON_TYPES[prop["type"]], prop.get("minLength", 0))
+        for name, prop in schema.get("properties", {}).items()
+    )
+
+    def validate(value):
+        if not isinstance(value, expected):
+            return [f"expected {schema['type']}"]
+        errors = [f"missing {name}" for name in required if name not in value]
+        for name, prop_type, min_length in properties:
+            if name not in value:
+                continue
+            item = value[name]
+            if not isinstance(item, prop_type):
+                errors.append(f"{name}: wrong type")
+            elif min_length and len(item.strip()) < min_length:
+                errors.append(f"{name}: empty")
+        return errors
+
+    return validate
+
+
+validate_insights = compile_schema(INSIGHTS_SCHEMA)
+
+
+def parse_json_insights(ai_output):
+    """
+    Parses and validates a JSON insights reply.
+    Returns the insights dict, or None when it is not valid.
+    """
+    if not isinstance(ai_output, str):
+        return None
+    text = ai_output.strip()
+    if text.startswith("```"):
+        text = text.strip("`").removeprefix("json").strip()
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return None
+    if validate_insights(value):
+        return None
+    return {field: value[field].strip() for field in AI_FIELDS}
+
+
+def is_well_formed(ai_output):
+    """
+    True when the model returned exactly four '||'-separated fields,
+    or a JSON object matching INSIGHTS_SCHEMA.
+    """
+    if parse_json_insights(ai_output) is not None:
+        return True
+    return isinstance(ai_output, str) and len(ai_output.split("||")) == AI_FIELD_COUNT
+
+
 def parse_ai_output(ai_output):
+    structured = parse_json_insights(ai_output)
+    if structured is not None:
+        return structured
+
     try:
         driver, pricing, explanation, improvement = [
             x.strip() for x in ai_output.split("||")
@@ -12,3 +101,35 @@ def parse_ai_output(ai_output):
         "explanations": explanation,
         "improvementSuggestions": improvement
     }
+
+
+class InsightStreamParser:
+    """
+    Incremental parser for streamed '||'-separated model output.
+    feed() returns the (field, value) pairs completed by that chunk, so
+    each insight can be shown as soon as its delimiter arrives.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.text = ""
+        self.index = 0
+
+    def feed(self, chunk):
+        self.text += chunk
+        self.buffer += chunk
+        completed = []
+
+        # The last field has no trailing delimiter; it is emitted by finish().
+        while self.index < len(AI_FIELDS) - 1 and "||" in self.buffer:
+            value, self.buffer = self.buffer.split("||", 1)
+            completed.append((AI_FIELDS[self.index], value.strip()))
+            self.index += 1
+
+        return completed
+
+    def finish(self):
+        if self.index >= len(AI_FIELDS):
+            return []
+        self.index = len(AI_FIELDS)
+        return [(AI_FIELDS[-1], self.buffer.strip())]
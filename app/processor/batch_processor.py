@@ -0,0 +1,129 @@
+# app/processor/batch_processor.py
+
+import asyncio
+import json
+
+from app.config import BATCH_MAX_CONCURRENCY, RENEWAL_CHUNK_SIZE
+from app.models.records import json_default
+from .processor import process_data_async, process_data_bulk
+from .rate_limiter import BATCH
+
+
+# -----------------------------
+# Batch input parsing
+# -----------------------------
+def parse_batch_body(body, content_type=""):
+    """
+    Accepts either a JSON list or an NDJSON body (one payload per line).
+    Each item may be wrapped as {"data": {...}} like /receive, or bare.
+    Returns a list of (item, error) tuples so bad lines stay per-item.
+    """
+    text = body.decode("utf-8") if isinstance(body, (bytes, bytearray)) else body
+
+    if "ndjson" in content_type or not text.lstrip().startswith("["):
+        items = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append((json.loads(line), None))
+            except ValueError as e:
+                items.append((None, f"Invalid JSON line: {e}"))
+        return items
+
+    return [(item, None) for item in json.loads(text)]
+
+
+def unwrap_item(item):
+    """
+    Mirrors UnderwriterInput: the payload lives under "data" and must be a dict.
+    """
+    if isinstance(item, dict) and "data" in item:
+        item = item["data"]
+    if not isinstance(item, dict):
+        raise ValueError("Each batch item must be a JSON object")
+    return item
+
+
+# -----------------------------
+# Batch runner
+# -----------------------------
+async def process_batch(items, max_concurrency=BATCH_MAX_CONCURRENCY):
+    """
+    Runs process_data_async over the batch with bounded parallelism, at
+    BATCH rate limiter priority so interactive /receive calls go first.
+    Yields one result dict per item, in completion order:
+        {"index": i, "status": "ok", "result": {...}}
+        {"index": i, "status": "error", "error": "..."}
+    A failing item never aborts the rest of the batch.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(index, item, error):
+        if error:
+            return {"index": index, "status": "error", "error": error}
+        try:
+            payload = unwrap_item(item)
+            async with semaphore:
+                result = await process_data_async(payload, BATCH)
+            return {"index": index, "status": "ok", "result": result}
+        except Exception as e:
+            return {"index": index, "status": "error", "error": str(e)}
+
+    tasks = [
+        asyncio.ensure_future(run_one(i, item, error))
+        for i, (item, error) in enumerate(items)
+    ]
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for t in tasks:
+            t.cancel()
+
+
+async def stream_batch_ndjson(items):
+    """
+    NDJSON encoder for process_batch: one JSON line per finished item.
+    """
+    async for result in process_batch(items):
+        yield json.dumps(result, default=json_default) + "\n"
+
+
+# -----------------------------
+# Renewal runner (batched insights)
+# -----------------------------
+async def process_renewal(items, chunk_size=RENEWAL_CHUNK_SIZE):
+    """
+    Runs process_data_bulk over the batch, chunk_size items at a time in a
+    worker thread, so AI insights come from batched LLM requests.
+    Yields the same result dicts as process_batch, in input order.
+    """
+    for start in range(0, len(items), chunk_size):
+        results, payloads, positions = {}, [], []
+
+        for index, (item, error) in enumerate(items[start:start + chunk_size], start=start):
+            if error:
+                results[index] = {"index": index, "status": "error", "error": error}
+                continue
+            try:
+                payloads.append(unwrap_item(item))
+                positions.append(index)
+            except ValueError as e:
+                results[index] = {"index": index, "status": "error", "error": str(e)}
+
+        if payloads:
+            for index, result in zip(positions, await asyncio.to_thread(process_data_bulk, payloads)):
+                results[index] = {"index": index, **result}
+
+        for index in sorted(results):
+            yield results[index]
+
+
+async def stream_renewal_ndjson(items):
+    """
+    NDJSON encoder for process_renewal.
+    """
+    async for result in process_renewal(items):
+        yield json.dumps(result, default=json_default) + "\n"
@@ -14,9 +14,9 @@ def build_compliance_block(extracted, underwriting, ai_insights_dict):
         },
         "ruleTrace": [
             {
-                "vehicle": v.get("vehicle"),
-                "rulesFired": v.get("rulesResult", {}).get("rulesFired", []),
-                "eligibility": v.get("eligibility")
+                "vehicle": getattr(v, "vehicle", None),
+                "rulesFired": getattr(v, "rulesResult", {}).get("rulesFired", []),
+                "eligibility": getattr(v, "eligibility", None)
             }
             for v in underwriting.get("vehicles", [])
         ],
@@ -0,0 +1,159 @@
+# app/processor/context_compactor.py
+#
+# Compacts the underwriting context before it is sent to the LLM.
+# - keeps only the fields the prompts in app/prompt/ reference
+# - merges each driver/vehicle's raw + normalized copies into one record
+# - drops the customer/coverage "raw" blobs added by the normalizer
+# - serializes with compact separators
+# - trims to a token budget (optional fields first, then list length)
+
+import json
+
+from app.metrics import increment
+
+# Rough tokens-per-character ratio for English/JSON with the Groq models.
+CHARS_PER_TOKEN = 4
+
+CUSTOMER_FIELDS = ("firstName", "lastName", "age", "licenseNumber")
+ADDRESS_FIELDS = ("city", "state", "zip")
+COVERAGE_FIELDS = (
+    "coverageType",
+    "liabilityLimit",
+    "deductible",
+    "collisionDeductible",
+    "comprehensiveDeductible",
+)
+
+DRIVER_FIELDS = (
+    "driverId", "firstName", "lastName", "age", "yearsLicensed",
+    "accidents", "violations", "majorViolation", "claims",
+)
+VEHICLE_FIELDS = (
+    "vehicleId", "year", "make", "model", "annualMileage", "usage",
+)
+
+# Extra fields a scenario's prompt explicitly asks about.
+SCENARIO_DRIVER_FIELDS = {
+    "multi_driver_multi_vehicle": ("licenseStatus", "assignedVehicles"),
+    "multi_driver_single_vehicle": ("licenseStatus", "isPrimaryDriver"),
+}
+SCENARIO_VEHICLE_FIELDS = {
+    "multi_driver_multi_vehicle": ("riskScore", "rulesResult", "eligibility"),
+    "single_driver_multi_vehicle": ("riskScore", "eligibility"),
+}
+
+# Dropped first when the context is over budget.
+OPTIONAL_FIELDS = ("licenseNumber", "driverId", "vehicleId", "city", "claims", "yearsLicensed")
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _present(value):
+    return value is not None and value != ""
+
+
+def _pick(source, fields):
+    return {f: source[f] for f in fields if _present(source.get(f))}
+
+
+def _merge_record(record, fields):
+    """
+    Normalizer records look like {"raw": {...}, "normalized": {...}}.
+    Normalized values win; raw fills in fields the normalizer does not map.
+    """
+    if not isinstance(record, dict):
+        return record
+    raw = record.get("raw")
+    normalized = record.get("normalized")
+    if not isinstance(raw, dict) and not isinstance(normalized, dict):
+        return _pick(record, fields)
+
+    merged = _pick(raw or {}, fields)
+    merged.update(_pick(normalized or {}, fields))
+    return merged
+
+
+def build_compact_context(underwriting_context, scenario):
+    customer = underwriting_context.get("customer") or {}
+    coverage = underwriting_context.get("coverage") or {}
+
+    compact_customer = _pick(customer, CUSTOMER_FIELDS)
+    address = customer.get("address")
+    if isinstance(address, dict):
+        compact_address = _pick(address, ADDRESS_FIELDS)
+        if compact_address:
+            compact_customer["address"] = compact_address
+
+    driver_fields = DRIVER_FIELDS + SCENARIO_DRIVER_FIELDS.get(scenario, ())
+    vehicle_fields = VEHICLE_FIELDS + SCENARIO_VEHICLE_FIELDS.get(scenario, ())
+
+    return {
+        "customer": compact_customer,
+        "coverage": _pick(coverage, COVERAGE_FIELDS),
+        "vehicles": [_merge_record(v, vehicle_fields) for v in underwriting_context.get("vehicles") or []],
+        "drivers": [_merge_record(d, driver_fields) for d in underwriting_context.get("drivers") or []],
+    }
+
+
+def _drop_optional(context):
+    for section in ("customer", "coverage"):
+        for f in OPTIONAL_FIELDS:
+            context[section].pop(f, None)
+    context["customer"].get("address", {}).pop("city", None)
+    for section in ("drivers", "vehicles"):
+        for record in context[section]:
+            if isinstance(record, dict):
+                for f in OPTIONAL_FIELDS:
+                    record.pop(f, None)
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def fit_to_budget(context, token_budget):
+    """
+    Trims the compact context until it fits token_budget:
+    1. drop OPTIONAL_FIELDS
+    2. keep the first N drivers/vehicles, recording how many were omitted
+    """
+    text = _dumps(context)
+    if estimate_tokens(text) <= token_budget:
+        return text
+
+    _drop_optional(context)
+    text = _dumps(context)
+
+    for section in ("vehicles", "drivers"):
+        total = len(context[section])
+        while estimate_tokens(text) > token_budget and len(context[section]) > 1:
+            context[section].pop()
+            context[f"omitted{section.capitalize()}"] = total - len(context[section])
+            text = _dumps(context)
+
+    return text
+
+
+def compact_context(underwriting_context, scenario, token_budget):
+    """
+    Returns (serialized_context, stats) where stats has tokensBefore,
+    tokensAfter and tokensSaved for this request. The same numbers are
+    added to the ai_context_* counters (per-request averages are the
+    totals over ai_context_compactions).
+    """
+    before = estimate_tokens(json.dumps(underwriting_context, default=str))
+    text = fit_to_budget(build_compact_context(underwriting_context, scenario), token_budget)
+    after = estimate_tokens(text)
+
+    increment("ai_context_compactions")
+    increment("ai_context_tokens_before", before)
+    increment("ai_context_tokens_after", after)
+    increment("ai_context_tokens_saved", before - after)
+
+    return text, {
+        "tokensBefore": before,
+        "tokensAfter": after,
+        "tokensSaved": before - after,
+    }
@@ -1,8 +1,13 @@
 # app/processor/decision_builder.py
 
-from app.processor.ai_engine import AIEngine
+from app.metrics import increment, stage_timer
+from app.processor.ai_engine import InvalidAIOutput, get_ai_engine
 from app.processor.compliance_preprocessor import build_compliance_block
-from app.processor.ai_insights import parse_ai_output
+import asyncio
+
+from app.config import AI_LATENCY_BUDGET_SECONDS
+from app.processor.ai_insights import InsightStreamParser, parse_ai_output
+from app.processor.rate_limiter import INTERACTIVE, RateLimitRejected
 from app.processor.summary_builder import build_summary
 from app.processor.executive_summary import build_executive_summary
 from app.processor.state_compliance_builder import build_state_compliance
@@ -12,29 +17,173 @@ from app.services.underwriting_engine import (
     generate_ai_insights
 )
 
+def build_underwriting_context(underwriting):
+    """
+    Underwriting context sent to the AI engine, as plain JSON dicts.
+    """
+    return {
+        "customer": underwriting["customer"].to_json(),
+        "coverage": underwriting["coverage"].to_json(),
+        "vehicles": [v.to_json() for v in underwriting["vehicles"]],
+        "drivers": [d.to_json() for d in underwriting["drivers"]]
+    }
+
+
 def build_decision_json(extracted, underwriting):
     print(">>> USING UPDATED DECISION BUILDER <<<")
 
     # -----------------------------
     # 1. Build underwriting context for AI  
     # -----------------------------
-    underwriting_context = {
-        "customer": underwriting.get("customer"),
-        "coverage": underwriting.get("coverage"),
-        "vehicles": underwriting.get("vehicles"),
-        "drivers": underwriting.get("drivers")
-    }
+    underwriting_context = build_underwriting_context(underwriting)
 
     # -----------------------------
     # 2. Call AI engine (Groq)
     # -----------------------------
-    engine = AIEngine()
-    ai_output = engine.generate_insights(underwriting_context)
+    engine = get_ai_engine()
+    try:
+        with stage_timer("llm_call"):
+            ai_output = engine.generate_insights(underwriting_context)
+    except Exception as e:
+        return assemble_decision_json(extracted, underwriting, None, fallback_reason(e))
+
+    return assemble_decision_json(extracted, underwriting, ai_output)
+
+
+async def build_decision_json_async(extracted, underwriting, priority=INTERACTIVE):
+    """
+    Async variant of build_decision_json.
+    The Groq call is awaited, so the worker thread is free while it runs.
+    `priority` is the rate limiter priority of the LLM call.
+    """
+    underwriting_context = build_underwriting_context(underwriting)
+
+    engine = get_ai_engine()
+    try:
+        with stage_timer("llm_call"):
+            ai_output = await engine.agenerate_insights(underwriting_context, priority)
+    except Exception as e:
+        return assemble_decision_json(extracted, underwriting, None, fallback_reason(e))
+
+    return assemble_decision_json(extracted, underwriting, ai_output)
+
+
+async def stream_decision_json(extracted, underwriting):
+    """
+    Streaming variant of build_decision_json.
+    Yields ("insight", {"field", "value"}) as each of the four fields is
+    completed by the model, then ("decision", final_json).
+
+    If the model stream fails, the decision carries the fallback insights.
+    When some insight events were already sent, a ("discard", {"fields",
+    "reason"}) event comes first: the client must drop those partial
+    insights and show the decision's aiInsights instead.
+    """
+    underwriting_context = build_underwriting_context(underwriting)
+    parser = InsightStreamParser()
+    queue = asyncio.Queue()
+    producer = asyncio.create_task(_produce_insight_deltas(underwriting_context, queue))
+    emitted = []
+    error = None
+
+    try:
+        while True:
+            kind, item = await queue.get()
+            if kind == "delta":
+                for field, value in parser.feed(item):
+                    emitted.append(field)
+                    yield "insight", {"field": field, "value": value}
+            else:
+                error = item
+                break
+    finally:
+        producer.cancel()
+
+    if error is not None:
+        reason = fallback_reason(error)
+        if emitted:
+            increment("ai_stream_discards")
+            yield "discard", {"fields": emitted, "reason": reason}
+        yield "decision", assemble_decision_json(extracted, underwriting, None, reason)
+        return
+
+    for field, value in parser.finish():
+        yield "insight", {"field": field, "value": value}
+
+    yield "decision", assemble_decision_json(extracted, underwriting, parser.text)
+
+
+async def _produce_insight_deltas(underwriting_context, queue):
+    """
+    Runs the model stream into `queue` as ("delta", text) items, then
+    ("end", None) or ("error", exception). It runs as its own task, so the
+    latency budget and the llm_call timer cover the model only - never
+    the time the client takes to read the events already sent.
+    """
+    budget = AI_LATENCY_BUDGET_SECONDS if AI_LATENCY_BUDGET_SECONDS > 0 else None
+    try:
+        with stage_timer("llm_call"):
+            async with asyncio.timeout(budget):
+                async for delta in get_ai_engine().astream_insights(underwriting_context):
+                    queue.put_nowait(("delta", delta))
+    except Exception as e:
+        queue.put_nowait(("error", e))
+    else:
+        queue.put_nowait(("end", None))
+
+
+def build_decision_jsons_bulk(prepared):
+    """
+    Bulk variant of build_decision_json for renewal runs.
+    `prepared` is a list of (extracted, underwriting) pairs; insights for
+    all of them come from batched LLM requests.
+    """
+    contexts = [build_underwriting_context(underwriting) for _, underwriting in prepared]
+
+    with stage_timer("llm_batch_call"):
+        ai_outputs = get_ai_engine().generate_insights_batch(contexts)
+
+    return [
+        assemble_decision_json(extracted, underwriting, ai_output)
+        if ai_output is not None
+        else assemble_decision_json(extracted, underwriting, None, "error")
+        for (extracted, underwriting), ai_output in zip(prepared, ai_outputs)
+    ]
+
+
+def fallback_reason(error):
+    """
+    Logs an AI failure and returns the reason recorded with fallback insights.
+    """
+    if isinstance(error, RateLimitRejected):
+        reason = "rate_limited"
+    elif isinstance(error, InvalidAIOutput):
+        reason = "invalid_output"
+    elif isinstance(error, TimeoutError) or "Timeout" in type(error).__name__:
+        reason = "timeout"
+    else:
+        reason = "error"
+    increment(f"ai_fallback_{reason}")
+    print(f">>> AI INSIGHTS FALLBACK ({reason}):", error)
+    return reason
+
+
+def assemble_decision_json(extracted, underwriting, ai_output, fallback=None):
+    """
+    Builds the final decision JSON from the raw AI output.
+    Shared by the sync and async paths.
+    When the LLM did not answer in budget, ai_output is None and `fallback`
+    holds the reason; the deterministic build_ai_insights block is used.
+    """
 
     # -----------------------------
     # 3. Parse AI output into 4 fields
     # -----------------------------
-    ai_insights_dict = parse_ai_output(ai_output)
+    if fallback:
+        ai_insights_dict = dict(underwriting.get("aiInsights") or {})
+    else:
+        with stage_timer("parse_ai_output"):
+            ai_insights_dict = parse_ai_output(ai_output)
 
     # -----------------------------
     # 4. Build base final JSON
@@ -55,32 +204,43 @@ def build_decision_json(extracted, underwriting):
 
             # ⭐ FIX: include riskScore inside underwriting block
             "riskScore": underwriting.get("riskScore"),
+            "ratingTableVersion": underwriting.get("ratingTableVersion"),
             "eligibility": underwriting.get("eligibility"),
             "details": underwriting.get("details"),
             "summary": underwriting.get("summary"),
         },
 
         "aiInsights": ai_insights_dict,
+        "aiInsightsMeta": {
+            "source": "fallback" if fallback else "llm",
+            "fallback": bool(fallback),
+            "reason": fallback,
+        },
     }
 
     # -----------------------------
     # 5. Summaries
     # -----------------------------
-    final_output["summary"] = build_summary(underwriting)
-    final_output["executiveSummary"] = build_executive_summary(final_output["summary"])
+    with stage_timer("summaries"):
+        final_output["summary"] = build_summary(underwriting)
+        final_output["executiveSummary"] = build_executive_summary(final_output["summary"])
 
     # -----------------------------
     # 6. Compliance / Audit Block
     # -----------------------------
-    final_output["compliance"] = build_compliance_block(extracted, underwriting, ai_insights_dict)
-    final_output["stateCompliance"] = build_state_compliance(extracted)
+    with stage_timer("compliance_block"):
+        final_output["compliance"] = build_compliance_block(extracted, underwriting, ai_insights_dict)
+
+    with stage_timer("state_compliance"):
+        final_output["stateCompliance"] = build_state_compliance(extracted)
 
     # -----------------------------
     # 7. NEW — Underwriting Summary + AI Insights Summary for PDF
     # -----------------------------
     rules_checked = final_output["compliance"].get("rulesChecked", [])
 
-    final_output["underwritingSummary"] = generate_underwriting_summary(rules_checked)
-    final_output["aiInsightsSummary"] = generate_ai_insights(rules_checked)
+    with stage_timer("pdf_summaries"):
+        final_output["underwritingSummary"] = generate_underwriting_summary(rules_checked)
+        final_output["aiInsightsSummary"] = generate_ai_insights(rules_checked)
 
     return final_output
@@ -40,6 +40,7 @@ def handle_coverage(coverage):
         "liabilityLimit": coverage.get("liabilityLimit"),
         "deductible": coverage.get("deductible"),
         "coverageType": coverage.get("coverageType"),
+        "basePremium": coverage.get("basePremium"),
         "raw": coverage
     }
 
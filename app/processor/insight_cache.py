@@ -0,0 +1,249 @@
+# app/processor/insight_cache.py
+#
+# Cache in front of AIEngine.generate_insights.
+# Key   = model + prompt scenario + canonical hash of the underwriting context
+# Tiers = in-memory LRU (bounded by bytes) -> optional SQLite file
+# Both tiers honour the same TTL. Hits/misses are exported via app.metrics.
+# Async callers use aget/aset, which run the SQLite tier in a worker thread
+# so disk I/O and the file lock never stall the event loop.
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import (
+    INSIGHT_CACHE_ENABLED,
+    INSIGHT_CACHE_TTL_SECONDS,
+    INSIGHT_CACHE_MAX_BYTES,
+    INSIGHT_CACHE_SQLITE_PATH,
+    INSIGHT_CACHE_SQLITE_MAX_BYTES,
+)
+from app.metrics import increment
+from app.prompt.prompt_registry import detect_scenario
+
+
+def canonical_json(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def make_cache_key(model, underwriting_context, output_mode="delimited"):
+    scenario = detect_scenario(underwriting_context)
+    digest = hashlib.sha256(canonical_json(underwriting_context).encode("utf-8")).hexdigest()
+    return f"{model}:{output_mode}:{scenario}:{digest}"
+
+
+# -----------------------------
+# Tier 1 — in-memory LRU
+# -----------------------------
+class MemoryLRU:
+    def __init__(self, max_bytes, ttl_seconds):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.size = 0
+        self._items = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _cost(key, value):
+        return len(key) + len(value)
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                self._remove(key)
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at=None):
+        cost = self._cost(key, value)
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+            self._items[key] = (expires_at or time.time() + self.ttl_seconds, value)
+            self.size += cost
+            while self.size > self.max_bytes:
+                oldest = next(iter(self._items))
+                self._remove(oldest)
+
+    def _remove(self, key):
+        _, value = self._items.pop(key)
+        self.size -= self._cost(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+
+# -----------------------------
+# Tier 2 — SQLite file
+# -----------------------------
+# Eviction trims the file to this share of max_bytes, so it runs once per
+# ~10% of the budget written rather than on every set.
+SQLITE_LOW_WATER_FRACTION = 0.9
+
+
+class SQLiteTier:
+    """
+    Keeps a running byte total, updated on insert and delete, so a set
+    does not scan the table. Other workers may write the same file, so the
+    total is re-read from the table before each eviction.
+    """
+
+    def __init__(self, path, max_bytes, ttl_seconds):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS insights ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self.size = self._stored_bytes()
+
+    def _stored_bytes(self):
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM insights").fetchone()[0]
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at, size FROM insights WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._db.execute("DELETE FROM insights WHERE key = ?", (key,))
+                self.size -= row[2]
+                return None
+            self._db.execute("UPDATE insights SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0], row[1]
+
+    def set(self, key, value):
+        now = time.time()
+        size = len(key) + len(value)
+        with self._lock:
+            old = self._db.execute("SELECT size FROM insights WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO insights VALUES (?, ?, ?, ?, ?)",
+                (key, value, now + self.ttl_seconds, now, size),
+            )
+            self.size += size - (old[0] if old else 0)
+            if self.size > self.max_bytes:
+                self._evict(now)
+
+    def _evict(self, now):
+        self.size = self._stored_bytes()
+        if self.size <= self.max_bytes:
+            return
+
+        expired = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM insights WHERE expires_at < ?", (now,)
+        ).fetchone()[0]
+        self._db.execute("DELETE FROM insights WHERE expires_at < ?", (now,))
+        self.size -= expired
+
+        # Drop least recently used rows down to the low-water mark
+        target = self.max_bytes * SQLITE_LOW_WATER_FRACTION
+        for key, size in self._db.execute(
+            "SELECT key, size FROM insights ORDER BY accessed_at"
+        ).fetchall():
+            if self.size <= target:
+                break
+            self._db.execute("DELETE FROM insights WHERE key = ?", (key,))
+            self.size -= size
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM insights")
+            self.size = 0
+
+
+# -----------------------------
+# Two-tier cache
+# -----------------------------
+class InsightCache:
+    def __init__(
+        self,
+        max_bytes=INSIGHT_CACHE_MAX_BYTES,
+        ttl_seconds=INSIGHT_CACHE_TTL_SECONDS,
+        sqlite_path=INSIGHT_CACHE_SQLITE_PATH,
+        sqlite_max_bytes=INSIGHT_CACHE_SQLITE_MAX_BYTES,
+    ):
+        self.memory = MemoryLRU(max_bytes, ttl_seconds)
+        self.disk = SQLiteTier(sqlite_path, sqlite_max_bytes, ttl_seconds) if sqlite_path else None
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            increment("insight_cache_memory_hits")
+            return value
+        return self._disk_result(key, self.disk.get(key) if self.disk is not None else None)
+
+    async def aget(self, key):
+        """
+        get() for async callers: the SQLite lookup runs in a worker thread.
+        """
+        value = self.memory.get(key)
+        if value is not None:
+            increment("insight_cache_memory_hits")
+            return value
+        row = await asyncio.to_thread(self.disk.get, key) if self.disk is not None else None
+        return self._disk_result(key, row)
+
+    def _disk_result(self, key, row):
+        if row is None:
+            increment("insight_cache_misses")
+            return None
+        value, expires_at = row
+        self.memory.set(key, value, expires_at)
+        increment("insight_cache_disk_hits")
+        return value
+
+    def set(self, key, value):
+        if not isinstance(value, str):
+            return
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    async def aset(self, key, value):
+        """
+        set() for async callers: the SQLite write runs in a worker thread.
+        """
+        if not isinstance(value, str):
+            return
+        self.memory.set(key, value)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+_cache = None
+
+
+def get_insight_cache():
+    """
+    Returns the process-wide cache, or None when INSIGHT_CACHE_ENABLED is off.
+    """
+    global _cache
+    if _cache is None and INSIGHT_CACHE_ENABLED:
+        _cache = InsightCache()
+    return _cache
@@ -3,10 +3,14 @@
 # -----------------------------
 # Imports
 # -----------------------------
-from app.normalizer.normalizer import normalize_incoming_json
+from app.metrics import stage_timer
+from app.normalizer.normalizer import COMPILED_PATHS, normalize_records
+from app.normalizer.utils.compiled_path import find_value_compiled
 
 from app.services.underwriting_engine import (
+    active_rating_table,
     calculate_risk_score,
+    score_fleet,
     determine_eligibility,
     build_summary_block,
     build_ai_insights,
@@ -21,7 +25,14 @@ from .extractors import (
     handle_guidewire,
 )
 
-from .decision_builder import build_decision_json
+from .rate_limiter import INTERACTIVE
+
+from .decision_builder import (
+    build_decision_json,
+    build_decision_json_async,
+    build_decision_jsons_bulk,
+    stream_decision_json,
+)
 
 
 # -----------------------------
@@ -34,6 +45,67 @@ def process_data(payload):
     - Run underwriting logic
     - Build final OptimaAI decision JSON with AI insights
     """
+    with stage_timer("process_data"):
+        extracted, underwriting = prepare_underwriting(payload)
+
+        # -----------------------------
+        # Step 4 — Final Decision JSON
+        # -----------------------------
+        final_decision = build_decision_json(extracted, underwriting)
+    return final_decision
+
+
+async def process_data_async(payload, priority=INTERACTIVE):
+    """
+    Async variant of process_data.
+    Steps 1–3 are CPU-only and run inline; the AI call in Step 4 is awaited
+    at the given rate limiter priority (BATCH for /receive/batch items).
+    """
+    with stage_timer("process_data"):
+        extracted, underwriting = prepare_underwriting(payload)
+        return await build_decision_json_async(extracted, underwriting, priority)
+
+
+async def process_data_stream(payload):
+    """
+    Streaming variant of process_data.
+    Yields (event, data) pairs: one "insight" per AI field as soon as the
+    model produces it, then the final "decision" (preceded by "discard"
+    when a failed stream had already sent insights).
+    """
+    extracted, underwriting = prepare_underwriting(payload)
+    async for event in stream_decision_json(extracted, underwriting):
+        yield event
+
+
+def process_data_bulk(payloads):
+    """
+    Bulk variant of process_data for renewal / book runs.
+    AI insights are generated with batched LLM requests (10–20 submissions
+    per call). Returns one entry per payload, in order:
+        {"status": "ok", "result": {...}} or {"status": "error", "error": "..."}
+    """
+    results = [None] * len(payloads)
+    prepared, positions = [], []
+
+    for i, payload in enumerate(payloads):
+        try:
+            prepared.append(prepare_underwriting(payload))
+            positions.append(i)
+        except Exception as e:
+            results[i] = {"status": "error", "error": str(e)}
+
+    for i, decision in zip(positions, build_decision_jsons_bulk(prepared)):
+        results[i] = {"status": "ok", "result": decision}
+
+    return results
+
+
+def prepare_underwriting(payload):
+    """
+    Steps 1–3 of the pipeline (extraction, normalization, scoring).
+    Returns (extracted, underwriting) for the decision builder.
+    """
 
     # -----------------------------
     # Raw payload extraction
@@ -51,34 +123,39 @@ def process_data(payload):
     # -----------------------------
     # Step 1 — Extraction Layer (raw → extracted)
     # -----------------------------
-    _customer_info = handle_customer(customer)
-    _vehicle_info_list = [handle_vehicle(v) for v in vehicles]
-    _driver_info_list = [handle_driver(d) for d in drivers]
-    _coverage_info = handle_coverage(coverage)
-    _guidewire_info = handle_guidewire(guidewire)
-
-    base_premium = _coverage_info.get("basePremium")
-
-    extracted = {
-        "customer": _customer_info,
-        "vehicles": _vehicle_info_list,
-        "drivers": _driver_info_list,
-        "coverage": _coverage_info,
-        "guidewire": _guidewire_info,
-        "state": _guidewire_info.get("state"),
-
-        "documents": payload.get("documents", []),
-        "hadPriorInsurance": payload.get("hadPriorInsurance"),
-
-        "previousPremium": previous_premium,
-        "currentPremium": current_premium,
-        "accidents": accidents,
-    }
+    with stage_timer("extract"):
+        _customer_info = handle_customer(customer)
+        _vehicle_info_list = [handle_vehicle(v) for v in vehicles]
+        _driver_info_list = [handle_driver(d) for d in drivers]
+        _coverage_info = handle_coverage(coverage)
+        _guidewire_info = handle_guidewire(guidewire)
+
+        # coverage.basePremium, else the pricing.base aliases
+        base_premium = _coverage_info.get("basePremium")
+        if base_premium is None:
+            base_premium = find_value_compiled(payload, COMPILED_PATHS["pricing.base"])
+
+        extracted = {
+            "customer": _customer_info,
+            "vehicles": _vehicle_info_list,
+            "drivers": _driver_info_list,
+            "coverage": _coverage_info,
+            "guidewire": _guidewire_info,
+            "state": _guidewire_info.get("state"),
+
+            "documents": payload.get("documents", []),
+            "hadPriorInsurance": payload.get("hadPriorInsurance"),
+
+            "previousPremium": previous_premium,
+            "currentPremium": current_premium,
+            "accidents": accidents,
+        }
 
     # -----------------------------
-    # Step 2 — NORMALIZATION (raw → normalized)
+    # Step 2 — NORMALIZATION (raw → normalized records)
     # -----------------------------
-    normalized = normalize_incoming_json(payload)
+    with stage_timer("normalize"):
+        normalized = normalize_records(payload)
 
     customer_n = normalized["customer"]
     drivers_n = normalized["drivers"]
@@ -90,33 +167,54 @@ def process_data(payload):
     # -----------------------------
     # Step 3 — Underwriting Logic (normalized → scoring)
     # -----------------------------
-    risk_score = calculate_risk_score(
-        customer_n,
-        drivers_n,
-        vehicles_n,
-        coverage_n,
-        guidewire_n
-    )
-
-    eligibility = determine_eligibility(drivers_n, vehicles_n)
-
-    summary = build_summary_block(
-        customer_n,
-        drivers_n,
-        vehicles_n,
-        risk_score,
-        base_premium,
-        eligibility
-    )
-
-    ai = build_ai_insights(customer_n, coverage_n, risk_score)
-
-    details = build_underwriting_details(
-        drivers_n,
-        vehicles_n,
-        risk_score,
-        base_premium
-    )
+    # One rating table snapshot for every score of this submission
+    rating_table = active_rating_table()
+
+    with stage_timer("risk_score"):
+        risk_score = calculate_risk_score(
+            customer_n,
+            drivers_n,
+            vehicles_n,
+            coverage_n,
+            guidewire_n,
+            rating_table
+        )
+
+    with stage_timer("fleet_score"):
+        fleet = score_fleet(
+            customer_n,
+            drivers_n,
+            vehicles_n,
+            coverage_n,
+            guidewire_n,
+            base_premium,
+            table=rating_table
+        )
+
+    with stage_timer("eligibility"):
+        eligibility = determine_eligibility(risk_score, [])
+
+    with stage_timer("summary_block"):
+        summary = build_summary_block(
+            customer_n,
+            drivers_n,
+            vehicles_n,
+            risk_score,
+            base_premium,
+            eligibility
+        )
+
+    with stage_timer("ai_insights_block"):
+        ai = build_ai_insights(customer_n, coverage_n, risk_score)
+
+    with stage_timer("underwriting_details"):
+        details = build_underwriting_details(
+            drivers_n,
+            vehicles_n,
+            risk_score,
+            base_premium,
+            fleet
+        )
 
     # -----------------------------
     # FULL Underwriting Context (for AI + PDF)
@@ -130,14 +228,11 @@ def process_data(payload):
         "guidewire": guidewire_n,
 
         "riskScore": risk_score,
+        "ratingTableVersion": rating_table.version,
         "eligibility": eligibility,
         "summary": summary,
         "aiInsights": ai,
         "details": details,
     }
 
-    # -----------------------------
-    # Step 4 — Final Decision JSON
-    # -----------------------------
-    final_decision = build_decision_json(extracted, underwriting)
-    return final_decision
+    return extracted, underwriting
@@ -0,0 +1,188 @@
+# app/processor/rate_limiter.py
+#
+# Host-wide rate limiter for LLM calls.
+# - requests/minute and tokens/minute token buckets stored in SQLite, so
+#   all uvicorn workers on the host share one provider quota
+# - priority: interactive requests go first; batch requests wait while
+#   interactive ones are queued and never dip into the
+#   LLM_BATCH_RESERVE_FRACTION share of a bucket. The bucket levels are
+#   shared by every worker, but the interactive queue is per worker (an
+#   in-memory count): a batch request only yields to interactive requests
+#   waiting in its own worker. Across workers the reserve is what keeps
+#   headroom for interactive traffic.
+# - early rejection: if the estimated queue wait would pass the caller's
+#   deadline, RateLimitRejected is raised immediately
+
+import asyncio
+import sqlite3
+import threading
+import time
+
+from app.config import (
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_RATE_LIMIT_DB,
+    LLM_BATCH_RESERVE_FRACTION,
+)
+from app.metrics import increment, observe
+
+INTERACTIVE = 0
+BATCH = 1
+
+# Longest single sleep between bucket checks.
+MAX_POLL_SECONDS = 0.25
+
+
+class RateLimitRejected(Exception):
+    """
+    Raised when the LLM call could not start before the caller's deadline.
+    """
+
+
+# -----------------------------
+# Shared token buckets
+# -----------------------------
+class SQLiteTokenBuckets:
+    def __init__(self, path, per_minute):
+        """
+        per_minute: {"requests": N, "tokens": M}; 0 disables that bucket.
+        """
+        self.per_minute = {name: limit for name, limit in per_minute.items() if limit > 0}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def try_take(self, costs, reserve_fraction=0.0):
+        """
+        Takes `costs` from every bucket if all can cover it (plus the reserve).
+        Returns 0.0 when taken, otherwise the estimated seconds to wait.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                stored = dict(
+                    (name, (level, updated))
+                    for name, level, updated in self._db.execute("SELECT name, level, updated FROM buckets")
+                )
+                levels, wait = {}, 0.0
+
+                for name, capacity in self.per_minute.items():
+                    rate = capacity / 60.0
+                    level, updated = stored.get(name, (capacity, now))
+                    level = min(capacity, level + max(0.0, now - updated) * rate)
+                    levels[name] = level
+
+                    # A single request larger than the bucket may still run once it is full.
+                    need = min(capacity, costs.get(name, 0) + reserve_fraction * capacity)
+                    if level < need:
+                        wait = max(wait, (need - level) / rate)
+
+                if wait == 0.0:
+                    for name in levels:
+                        levels[name] -= costs.get(name, 0)
+
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                    [(name, level, now) for name, level in levels.items()],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return wait
+
+
+# -----------------------------
+# Limiter
+# -----------------------------
+class LLMRateLimiter:
+    """
+    Priority queue in front of the shared buckets. The buckets are
+    host-wide; the interactive-first ordering is per worker, since
+    _interactive_waiting only counts this process's waiters.
+    """
+
+    def __init__(self, buckets, batch_reserve_fraction=LLM_BATCH_RESERVE_FRACTION):
+        self.buckets = buckets
+        self.batch_reserve_fraction = batch_reserve_fraction
+        self._interactive_waiting = 0
+        self._lock = threading.Lock()
+
+    def _try(self, tokens, priority):
+        if priority == BATCH:
+            if self._interactive_waiting:
+                return MAX_POLL_SECONDS
+            reserve = self.batch_reserve_fraction
+        else:
+            reserve = 0.0
+        return self.buckets.try_take({"requests": 1, "tokens": tokens}, reserve)
+
+    def _check_deadline(self, wait, deadline):
+        if deadline is not None and time.time() + wait > deadline:
+            increment("llm_rate_limit_rejected")
+            raise RateLimitRejected(f"LLM queue wait of {wait:.2f}s exceeds the request deadline")
+
+    def _enter(self, priority):
+        if priority == INTERACTIVE:
+            with self._lock:
+                self._interactive_waiting += 1
+
+    def _leave(self, priority, started):
+        if priority == INTERACTIVE:
+            with self._lock:
+                self._interactive_waiting -= 1
+        observe("llm_rate_limit_wait", time.perf_counter() - started)
+
+    def acquire_sync(self, tokens, priority=INTERACTIVE, deadline=None):
+        """
+        Blocks until the call may start. deadline is a time.time() value.
+        """
+        started = time.perf_counter()
+        self._enter(priority)
+        try:
+            while True:
+                wait = self._try(tokens, priority)
+                if wait <= 0:
+                    return
+                self._check_deadline(wait, deadline)
+                time.sleep(min(wait, MAX_POLL_SECONDS))
+        finally:
+            self._leave(priority, started)
+
+    async def acquire(self, tokens, priority=INTERACTIVE, deadline=None):
+        """
+        Async variant of acquire_sync.
+        """
+        started = time.perf_counter()
+        self._enter(priority)
+        try:
+            while True:
+                # try_take may wait up to 5s on the SQLite write lock; run it
+                # in a thread so the event loop keeps serving other requests
+                wait = await asyncio.to_thread(self._try, tokens, priority)
+                if wait <= 0:
+                    return
+                self._check_deadline(wait, deadline)
+                await asyncio.sleep(min(wait, MAX_POLL_SECONDS))
+        finally:
+            self._leave(priority, started)
+
+
+_limiter = None
+
+
+def get_rate_limiter():
+    """
+    Returns the process-wide limiter, or None when no limit is configured.
+    """
+    global _limiter
+    if _limiter is None and (LLM_REQUESTS_PER_MINUTE > 0 or LLM_TOKENS_PER_MINUTE > 0):
+        _limiter = LLMRateLimiter(SQLiteTokenBuckets(
+            LLM_RATE_LIMIT_DB,
+            {"requests": LLM_REQUESTS_PER_MINUTE, "tokens": LLM_TOKENS_PER_MINUTE},
+        ))
+    return _limiter
@@ -1,9 +1,11 @@
 def build_summary(underwriting):
+    # Vehicle records only carry decision fields (premium, eligibility,
+    # riskScore) once underwritten, hence getattr with defaults
     vehicles = underwriting.get("vehicles", [])
     vehicle_count = len(vehicles)
-    total_premium = sum(v.get("premium", 0) for v in vehicles)
+    total_premium = sum(getattr(v, "premium", 0) for v in vehicles)
 
-    eligibilities = [v.get("eligibility") for v in vehicles]
+    eligibilities = [getattr(v, "eligibility", None) for v in vehicles]
 
     if "Decline" in eligibilities:
         overall_eligibility = "Decline"
@@ -14,8 +16,8 @@ def build_summary(underwriting):
 
     highest_risk_vehicle = None
     if vehicles:
-        highest_risk_vehicle = max(vehicles, key=lambda v: v.get("riskScore", 0))
-        highest_risk_vehicle = highest_risk_vehicle.get("vehicle")
+        highest_risk_vehicle = max(vehicles, key=lambda v: getattr(v, "riskScore", 0))
+        highest_risk_vehicle = getattr(highest_risk_vehicle, "vehicle", None)
 
     return {
         "vehicleCount": vehicle_count,
@@ -0,0 +1,19 @@
+# app/prompt/json_output_prompt.py
+
+JSON_OUTPUT_INSTRUCTION = (
+    "\n\nOUTPUT FORMAT OVERRIDE (takes precedence over any format described above, "
+    "including instructions about '||' separators or not returning JSON):\n"
+    "Return ONLY a JSON object with exactly these four string keys and no other text:\n"
+    '{"driverRiskFactors": "...", "pricingRationale": "...", '
+    '"explanations": "...", "improvementSuggestions": "..."}\n'
+    "Each value is one concise, regulator‑safe sentence based only on the underwriting context."
+)
+
+JSON_REPAIR_PROMPT = (
+    "You are OptimaAI, an insurance underwriting assistant. "
+    "Your previous reply was not valid JSON in the required shape. "
+    "Using ONLY the underwriting context below, return ONLY this JSON object, "
+    "with one concise sentence per value and no other text:\n"
+    '{"driverRiskFactors": "...", "pricingRationale": "...", '
+    '"explanations": "...", "improvementSuggestions": "..."}'
+)
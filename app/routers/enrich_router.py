@@ -1,51 +1,149 @@
-from fastapi import APIRouter, Response
+import json
+
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
-from app.processor.processor import process_data
+from app.processor.processor import process_data, process_data_async, process_data_stream
+from app.processor.batch_processor import parse_batch_body, stream_batch_ndjson, stream_renewal_ndjson
+from app.normalizer.stream_normalizer import anormalize_stream
+from app.metrics import render_prometheus, stage_timer
 from app.dispatcher.dispatcher import dispatch_output
-from app.pdf_layout.pdf_render import generate_pdf
+from app.pdf_layout.render_pool import render_pdf_async
 from app.models.compliance_summary import ComplianceSummary
+from app.models.records import json_default
 
 router = APIRouter()
 
 class UnderwriterInput(BaseModel):
     data: dict
 
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body generator is still reading the request.
+    The stock response listens for disconnect on `receive` while streaming,
+    which would swallow the remaining request body chunks; here the body
+    reader itself sees the disconnect instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
 @router.get("/")
 def home():
     return {"message": "OptimaAI Underwriter is running"}
 
 @router.post("/receive")
-def receive_input(payload: UnderwriterInput):
-    processed = process_data(payload.data)
-    return processed
+async def receive_input(payload: UnderwriterInput):
+    processed = await process_data_async(payload.data)
+
+    with stage_timer("serialize_response"):
+        body = json.dumps(processed, default=json_default)
+
+    return Response(content=body, media_type="application/json")
+
+
+@router.post("/receive/stream")
+async def receive_stream(payload: UnderwriterInput):
+    """
+    Server-sent-events variant of /receive.
+    Emits `insight` events as each AI field completes, then one `decision`
+    event with the full JSON (or one `error` event). If the model fails
+    mid-stream, a `discard` event lists the insight fields to drop; the
+    decision then carries fallback insights.
+    """
+    async def events():
+        try:
+            async for event, data in process_data_stream(payload.data):
+                yield f"event: {event}\ndata: {json.dumps(data, default=json_default)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@router.post("/receive/batch")
+async def receive_batch(request: Request):
+    """
+    Accepts a JSON list or NDJSON body of /receive payloads and streams
+    each decision back as one NDJSON line as soon as it finishes.
+    """
+    body = await request.body()
+
+    try:
+        items = parse_batch_body(body, request.headers.get("content-type", ""))
+    except ValueError as e:
+        return {"error": "Invalid batch body", "details": str(e)}
+
+    return StreamingResponse(
+        stream_batch_ndjson(items),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.post("/receive/renewal")
+async def receive_renewal(request: Request):
+    """
+    Renewal / book run: same body and result lines as /receive/batch, but
+    AI insights are generated with batched LLM requests (many submissions
+    per call) and lines come back in input order, chunk by chunk.
+    """
+    body = await request.body()
+
+    try:
+        items = parse_batch_body(body, request.headers.get("content-type", ""))
+    except ValueError as e:
+        return {"error": "Invalid batch body", "details": str(e)}
+
+    return StreamingResponse(
+        stream_renewal_ndjson(items),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.post("/receive/fleet/stream")
+async def receive_fleet_stream(request: Request):
+    """
+    Normalizes a {"data": {...}} fleet submission while it is still
+    arriving. Streams one NDJSON line per driver and vehicle as soon as it
+    is parsed, then a final "submission" line (or an "error" line).
+    """
+    async def lines():
+        try:
+            async for record in anormalize_stream(request.stream(), envelope_key="data"):
+                yield json.dumps(record, default=str) + "\n"
+        except Exception as e:
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+
+    return BodyStreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @router.post("/generate-compliance-report")
-def generate_compliance_report(payload: dict):
+async def generate_compliance_report(payload: dict):
     print(">>> PDF ENDPOINT HIT <<<")
 
     # Extract JSON sent from frontend
     processed = payload.get("processed_data", {})
 
-    # Render-safe path on Render
-    output_path = "/tmp/compliance_report.pdf"
-
     try:
-        print(">>> Generating PDF at:", output_path)
-        generate_pdf(output_path, processed)
+        print(">>> Generating PDF in render pool")
+        pdf_bytes = await render_pdf_async(processed)
     except Exception as e:
         print(">>> PDF GENERATION ERROR:", e)
         return {"error": "PDF generation failed", "details": str(e)}
 
-    try:
-        print(">>> Reading PDF bytes...")
-        with open(output_path, "rb") as f:
-            pdf_bytes = f.read()
-    except Exception as e:
-        print(">>> FILE READ ERROR:", e)
-        return {"error": "PDF read failed", "details": str(e)}
-
     print(">>> PDF SUCCESSFULLY RETURNED <<<")
 
     return Response(
@@ -1,4 +1,7 @@
+from .rating_table import active_rating_table, load_rating_table, reload_rating_table, set_rating_table
 from .scoring import calculate_risk_score
+from .batch_scoring import calculate_risk_scores, risk_score_columns
+from .fleet_scoring import score_fleet
 from .eligibility import determine_eligibility
 from .summaries import build_summary_block
 from .ai_insights import build_ai_insights
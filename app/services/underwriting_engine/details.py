@@ -1,7 +1,14 @@
-def build_underwriting_details(drivers, vehicles, risk_score, base_premium):
+from app.models.records import UnderwritingDriver, UnderwritingVehicle
+
+
+def build_underwriting_details(drivers, vehicles, risk_score, base_premium, fleet=None):
     """
     Centralized underwriting detail builder.
     Produces underwriting.vehicles and underwriting.drivers blocks.
+    Rows reference the Driver/Vehicle records; their JSON is built only
+    when the response is serialized.
+    With `fleet` (score_fleet output) each vehicle row carries its own
+    score and premium; otherwise the policy score is used for every row.
     """
 
     eligibility = "Eligible"
@@ -9,41 +16,25 @@ def build_underwriting_details(drivers, vehicles, risk_score, base_premium):
     # -----------------------------
     # VEHICLES (FIXED)
     # -----------------------------
-    uw_vehicles = []
-    for v in vehicles:
-        uw_vehicles.append({
-            "raw": v.get("raw", {}),
-            "normalized": v.get("normalized", {}),
-            "rulesResult": {
-                "rulesFired": [],
-                "status": "rules evaluated (placeholder)"
-            },
-            "riskScore": risk_score,
-            "premium": base_premium,
-            "eligibility": eligibility,
-        })
+    if fleet is not None:
+        scores, premiums = fleet["scores"], fleet["premiums"]
+    else:
+        scores, premiums = [risk_score] * len(vehicles), [base_premium] * len(vehicles)
+
+    uw_vehicles = [
+        UnderwritingVehicle(
+            vehicle=v,
+            riskScore=score,
+            premium=premium,
+            eligibility=eligibility,
+        )
+        for v, score, premium in zip(vehicles, scores, premiums)
+    ]
 
     # -----------------------------
     # DRIVERS (SAFE + NORMALIZED)
     # -----------------------------
-    uw_drivers = []
-    for d in drivers:
-        raw = d.get("raw", {})
-        norm = d.get("normalized", {})
-
-        uw_drivers.append({
-            "raw": raw,
-            "normalized": norm,
-            "firstName": raw.get("firstName"),
-            "lastName": raw.get("lastName"),
-            "age": raw.get("age"),
-            "licenseNumber": raw.get("licenseNumber"),
-            "yearsLicensed": raw.get("yearsLicensed"),
-            "accidents": raw.get("accidents"),
-            "violations": raw.get("violations"),
-            "claims": raw.get("claims"),
-            "isPrimaryDriver": raw.get("isPrimaryDriver"),
-        })
+    uw_drivers = [UnderwritingDriver(driver=d) for d in drivers]
 
     # -----------------------------
     # FINAL UNDERWRITING BLOCK
@@ -52,5 +43,6 @@ def build_underwriting_details(drivers, vehicles, risk_score, base_premium):
         "vehicles": uw_vehicles,
         "drivers": uw_drivers,
         "riskScore": risk_score,
+        "ratingTableVersion": fleet["ratingTableVersion"] if fleet is not None else None,
         "eligibility": eligibility
     }
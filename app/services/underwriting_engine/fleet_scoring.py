@@ -0,0 +1,136 @@
+# app/services/underwriting_engine/fleet_scoring.py
+#
+# Per-vehicle risk scores for multi-driver / multi-vehicle policies.
+#
+# calculate_risk_score rates a policy with drivers[0] and vehicles[0]. Here
+# every vehicle is rated with the drivers assigned to it (the
+# assignedVehicles list handle_driver extracts). A driver × vehicle score
+# is the same model: base + policy points + driver points + vehicle
+# points, clipped to the rating table's range. Policy points are computed
+# once, driver and vehicle points once per driver / vehicle, and the
+# assignments are then walked in a single pass - O(drivers + vehicles +
+# assignments). One rating table snapshot is used for the whole fleet.
+#
+# assignedVehicles entries are vehicle ids (matched against the vehicle's
+# vin / vehicleId) or {"vehicleId"|"vin": id, "exposure": share} objects;
+# exposure defaults to 1 and only weights the "exposure_mean" aggregation;
+# numeric strings are accepted, and non-numeric or negative exposures
+# count as 0 (the assignment is ignored by that aggregation).
+# Vehicles no driver is assigned to are rated with the first driver, so a
+# policy without assignments scores vehicles[0] exactly like
+# calculate_risk_score.
+
+import math
+
+from app.config import FLEET_SCORE_AGGREGATION
+from app.services.vehicle_classifier import get_vehicle_classifier
+from .rating_table import active_rating_table
+from .scoring import driver_points, policy_points, vehicle_points
+
+AGGREGATIONS = ("max", "exposure_mean")
+
+
+def _vehicle_index(vehicles):
+    """
+    Assignment id -> vehicle position. The first vehicle wins a shared id.
+    """
+    index = {}
+    for i, v in enumerate(vehicles):
+        raw = v.raw or {}
+        for key in (v.vin, raw.get("vehicleId"), raw.get("vin")):
+            if key is not None and key != "":
+                index.setdefault(str(key), i)
+    return index
+
+
+def _exposure(value):
+    """
+    Exposure share as a float; 0.0 unless it is a finite positive number.
+    """
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return value if math.isfinite(value) and value > 0 else 0.0
+
+
+def _assignments(driver):
+    """
+    (vehicle id, exposure) pairs from a raw driver block.
+    """
+    for entry in driver.get("assignedVehicles") or ():
+        if isinstance(entry, dict):
+            vehicle_id = entry.get("vehicleId", entry.get("vin", entry.get("id")))
+            exposure = _exposure(entry.get("exposure", 1))
+        else:
+            vehicle_id, exposure = entry, 1.0
+        if vehicle_id is not None:
+            yield str(vehicle_id), exposure
+
+
+def vehicle_premium(base_premium, score, table=None):
+    """
+    base_premium scaled for the vehicle's score by the rating table's
+    premium rule (a 700 vehicle pays the base premium under v1); None
+    without a numeric base premium.
+    """
+    try:
+        base_premium = float(base_premium)
+    except (TypeError, ValueError):
+        return None
+    table = table or active_rating_table()
+    return table.premium(base_premium, score)
+
+
+def score_fleet(customer, drivers, vehicles, coverage, guidewire, base_premium=None, aggregation=None, table=None):
+    """
+    Per-vehicle scores and premiums:
+        {"aggregation": ..., "ratingTableVersion": ..., "scores": [...], "premiums": [...]}
+    with one entry per vehicle, in order.
+    """
+    aggregation = aggregation or FLEET_SCORE_AGGREGATION
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"Unknown fleet score aggregation: {aggregation!r}")
+
+    table = table or active_rating_table()
+    base = table.base_score + policy_points(customer, coverage, guidewire, table)
+    driver_pts = [driver_points(d.raw, table) for d in drivers]
+    class_flags = get_vehicle_classifier().classify_many(v.raw or {} for v in vehicles)
+    vehicle_pts = [base + vehicle_points(v.raw, table, flags) for v, flags in zip(vehicles, class_flags)]
+
+    # Per-vehicle accumulators: lowest pair score, or weighted score sum
+    worst = [None] * len(vehicles)
+    weighted = [0.0] * len(vehicles)
+    weights = [0.0] * len(vehicles)
+
+    index = _vehicle_index(vehicles) if drivers else {}
+    for d, points in zip(drivers, driver_pts):
+        for vehicle_id, exposure in _assignments(d.raw):
+            i = index.get(vehicle_id)
+            if i is None:
+                continue
+            score = table.clamp(vehicle_pts[i] + points)
+            if aggregation == "max":
+                if worst[i] is None or score < worst[i]:
+                    worst[i] = score
+            elif exposure > 0:
+                weighted[i] += score * exposure
+                weights[i] += exposure
+
+    principal = driver_pts[0] if drivers else 0
+    scores = []
+    for i, points in enumerate(vehicle_pts):
+        if aggregation == "max":
+            score = worst[i]
+        else:
+            score = round(weighted[i] / weights[i]) if weights[i] else None
+        if score is None:
+            score = table.clamp(points + principal)
+        scores.append(score)
+
+    return {
+        "aggregation": aggregation,
+        "ratingTableVersion": table.version,
+        "scores": scores,
+        "premiums": [vehicle_premium(base_premium, s, table) for s in scores],
+    }
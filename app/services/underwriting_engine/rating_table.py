@@ -0,0 +1,339 @@
+# app/services/underwriting_engine/rating_table.py
+#
+# Versioned rating tables for the risk score model.
+#
+# The score adjustments live in a JSON table (rating_tables/default.json,
+# or RATING_TABLE_PATH) instead of if-chains. Loading compiles each factor:
+#   - numeric factors: bands -> sorted, non-overlapping inclusive
+#     [low, high] intervals (exclusive bounds are nudged with
+#     math.nextafter), looked up with bisect / np.searchsorted
+#   - categorical factors (coverage type, state): dict lookups
+#   - ZIP: prefix dict, longest prefix first
+# The optional "premium" section sets how a base premium scales with a
+# score: premium = base * referenceScore / score, rounded to `decimals`
+# (defaults: the table's baseScore, 2).
+#
+# active_rating_table() returns the current compiled table. The table file
+# is re-checked every RATING_TABLE_RELOAD_SECONDS and swapped in when its
+# mtime changes, so a rating change needs no restart; a table that fails
+# validation is reported and the previous one stays active. Compiled tables
+# are immutable - a caller holding one keeps a consistent version even if
+# a swap happens mid-request.
+
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_right
+
+import numpy as np
+
+from app.config import RATING_TABLE_PATH, RATING_TABLE_RELOAD_SECONDS
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(__file__), "rating_tables", "default.json")
+
+NUMERIC_FACTORS = (
+    "age", "accidents", "violations", "annualMileage", "vehicleAge", "liabilityLimit", "deductible",
+)
+
+_lock = threading.RLock()
+_active = None
+_loaded_from = None     # (path, mtime) of the active table's file
+_next_check = 0.0
+
+
+class BandLookup:
+    """
+    Points for a number: the band whose [low, high] contains it, else the
+    default. NaN falls in no band.
+    """
+
+    __slots__ = ("lows", "highs", "points", "default", "skip_falsy", "_lows", "_highs", "_points")
+
+    def __init__(self, bands, default=0, skip_falsy=False):
+        bands = sorted(bands)
+        self.lows = [b[0] for b in bands]
+        self.highs = [b[1] for b in bands]
+        self.points = [b[2] for b in bands]
+        self.default = default
+        self.skip_falsy = skip_falsy
+        self._lows = np.array(self.lows, dtype=np.float64)
+        self._highs = np.array(self.highs + [-math.inf], dtype=np.float64)
+        self._points = np.array(self.points + [default], dtype=np.int64)
+
+    def __call__(self, value):
+        if self.skip_falsy and not value:
+            return 0
+        i = bisect_right(self.lows, value) - 1
+        if i >= 0 and value <= self.highs[i]:
+            return self.points[i]
+        return self.default
+
+    def lookup_array(self, values):
+        """
+        Points for a float array (NaN = absent) as int64.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        i = np.searchsorted(self._lows, values, side="right") - 1
+        # Below the first band -> the trailing (-inf high, default) slot
+        i[i < 0] = len(self.lows)
+        hit = values <= self._highs[i]
+        points = np.where(hit, self._points[i], self.default)
+        if self.skip_falsy:
+            points = np.where(np.isnan(values) | (values == 0), 0, points)
+        return points
+
+
+class CategoryLookup:
+    __slots__ = ("values", "default", "ignore_case")
+
+    def __init__(self, values, default=0, ignore_case=False):
+        if ignore_case:
+            values = {k.lower(): v for k, v in values.items()}
+        self.values = values
+        self.default = default
+        self.ignore_case = ignore_case
+
+    def __call__(self, value):
+        if not isinstance(value, str):
+            return self.default
+        if self.ignore_case:
+            value = value.lower()
+        return self.values.get(value, self.default)
+
+
+class PrefixLookup:
+    __slots__ = ("prefixes", "lengths", "default", "skip_falsy")
+
+    def __init__(self, prefixes, default=0, skip_falsy=False):
+        self.prefixes = prefixes
+        self.lengths = sorted({len(p) for p in prefixes}, reverse=True)
+        self.default = default
+        self.skip_falsy = skip_falsy
+
+    def __call__(self, value):
+        if self.skip_falsy and not value:
+            return 0
+        value = str(value)
+        for length in self.lengths:
+            points = self.prefixes.get(value[:length])
+            if points is not None:
+                return points
+        return self.default
+
+
+class RatingTable:
+    """
+    A compiled rating table. Factor lookups are attributes named after the
+    table's factors (age, accidents, annual_mileage, zip, ...).
+    """
+
+    def __init__(self, spec, source=None):
+        factors = spec["factors"]
+        self.version = spec["version"]
+        self.description = spec.get("description", "")
+        self.source = source
+        self.base_score = spec["baseScore"]
+        self.min_score = spec["minScore"]
+        self.max_score = spec["maxScore"]
+
+        self.age = _bands(factors["age"])
+        self.accidents = _bands(factors["accidents"])
+        self.violations = _bands(factors["violations"])
+        self.major_violation = factors["majorViolation"]["points"]
+        self.annual_mileage = _bands(factors["annualMileage"])
+        self.vehicle_class = dict(factors["vehicleClass"]["points"])
+        self.vehicle_age = _bands({**factors["vehicleAge"], "skipFalsy": False})
+        self.vehicle_age_skip_falsy = factors["vehicleAge"].get("skipFalsy", False)
+        self.reference_year = factors["vehicleAge"]["referenceYear"]
+        self.liability_limit = _bands(factors["liabilityLimit"])
+        self.deductible = _bands(factors["deductible"])
+        self.coverage_type = _categories(factors["coverageType"])
+        self.state = _categories(factors["state"])
+        zip_factor = factors["zip"]
+        self.zip = PrefixLookup(zip_factor["prefixes"], zip_factor.get("default", 0), zip_factor.get("skipFalsy", False))
+
+        premium = spec.get("premium", {})
+        self.premium_reference_score = premium.get("referenceScore", self.base_score)
+        self.premium_decimals = premium.get("decimals", 2)
+
+    def vehicle_age_points(self, year):
+        if self.vehicle_age_skip_falsy and not year:
+            return 0
+        return self.vehicle_age(self.reference_year - int(year))
+
+    def vehicle_class_points(self, class_names):
+        """
+        Sum of the adjustments for a vehicle's classes (unlisted classes: 0).
+        """
+        return sum(self.vehicle_class.get(name, 0) for name in class_names)
+
+    def clamp(self, score):
+        return max(self.min_score, min(self.max_score, score))
+
+    def premium(self, base_premium, score):
+        """
+        base_premium scaled by a score: a score at referenceScore pays the
+        base premium, lower (riskier) scores pay proportionally more.
+        """
+        return round(float(base_premium) * self.premium_reference_score / score, self.premium_decimals)
+
+
+def _band_interval(band):
+    low = band.get("min", -math.inf)
+    if "above" in band:
+        low = math.nextafter(band["above"], math.inf)
+    high = band.get("max", math.inf)
+    if "below" in band:
+        high = math.nextafter(band["below"], -math.inf)
+    return low, high
+
+
+def _bands(factor):
+    bands = [(*_band_interval(b), b["points"]) for b in factor.get("bands", [])]
+    return BandLookup(bands, factor.get("default", 0), factor.get("skipFalsy", False))
+
+
+def _categories(factor):
+    return CategoryLookup(factor.get("values", {}), factor.get("default", 0), factor.get("ignoreCase", False))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_points(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def validate_table(spec, name="rating table"):
+    """
+    Reject tables with missing factors, malformed or overlapping bands.
+    """
+    if not isinstance(spec.get("version"), str) or not spec["version"]:
+        raise ValueError(f"{name}: 'version' must be a non-empty string")
+    for key in ("baseScore", "minScore", "maxScore"):
+        if not _is_number(spec.get(key)):
+            raise ValueError(f"{name}: '{key}' must be a number")
+
+    factors = spec.get("factors")
+    if not isinstance(factors, dict):
+        raise ValueError(f"{name}: 'factors' must be an object")
+    required = NUMERIC_FACTORS + ("majorViolation", "vehicleClass", "coverageType", "zip", "state")
+    for factor in required:
+        if not isinstance(factors.get(factor), dict):
+            raise ValueError(f"{name}: missing factor '{factor}'")
+
+    for factor in NUMERIC_FACTORS:
+        intervals = []
+        for band in factors[factor].get("bands", []):
+            if not _is_points(band.get("points")):
+                raise ValueError(f"{name}: {factor} band {band} needs integer 'points'")
+            if ("min" in band and "above" in band) or ("max" in band and "below" in band):
+                raise ValueError(f"{name}: {factor} band {band} has two bounds on one side")
+            if not all(_is_number(band[k]) for k in ("min", "above", "max", "below") if k in band):
+                raise ValueError(f"{name}: {factor} band {band} has a non-numeric bound")
+            low, high = _band_interval(band)
+            if low > high:
+                raise ValueError(f"{name}: {factor} band {band} is empty")
+            intervals.append((low, high))
+        intervals.sort()
+        for (_, high), (low, _) in zip(intervals, intervals[1:]):
+            if low <= high:
+                raise ValueError(f"{name}: {factor} bands overlap")
+
+    if not _is_number(factors["vehicleAge"].get("referenceYear")):
+        raise ValueError(f"{name}: vehicleAge needs a numeric 'referenceYear'")
+    if not _is_points(factors["majorViolation"].get("points")):
+        raise ValueError(f"{name}: majorViolation needs integer 'points'")
+
+    tables = {
+        "vehicleClass": factors["vehicleClass"].get("points"),
+        "coverageType": factors["coverageType"].get("values", {}),
+        "state": factors["state"].get("values", {}),
+        "zip": factors["zip"].get("prefixes"),
+    }
+    for factor, values in tables.items():
+        if not isinstance(values, dict) or not all(_is_points(v) for v in values.values()):
+            raise ValueError(f"{name}: {factor} must map names to integer points")
+    for factor in required:
+        if not _is_points(factors[factor].get("default", 0)):
+            raise ValueError(f"{name}: {factor} 'default' must be an integer")
+
+    premium = spec.get("premium", {})
+    if not isinstance(premium, dict):
+        raise ValueError(f"{name}: 'premium' must be an object")
+    reference = premium.get("referenceScore", spec["baseScore"])
+    if not _is_number(reference) or reference <= 0:
+        raise ValueError(f"{name}: premium 'referenceScore' must be a positive number")
+    if spec["minScore"] <= 0:
+        raise ValueError(f"{name}: 'minScore' must be positive to scale premiums")
+    decimals = premium.get("decimals", 2)
+    if not _is_points(decimals) or decimals < 0:
+        raise ValueError(f"{name}: premium 'decimals' must be a non-negative integer")
+
+
+def load_rating_table(path=None):
+    """
+    Read, validate and compile a rating table file (default: the bundled
+    table). Raises ValueError for an invalid table.
+    """
+    path = path or DEFAULT_TABLE_PATH
+    with open(path, "r") as f:
+        spec = json.load(f)
+    validate_table(spec, os.path.basename(path))
+    return RatingTable(spec, source=path)
+
+
+def set_rating_table(table):
+    """
+    Make `table` the active rating table. It stays active until the table
+    file changes or the table is swapped again.
+    """
+    global _active
+    with _lock:
+        _active = table
+    print(f">>> RATING TABLE ACTIVE: {table.version}")
+
+
+def reload_rating_table():
+    """
+    Load the configured table file now and make it active.
+    """
+    global _loaded_from, _next_check
+    path = RATING_TABLE_PATH or DEFAULT_TABLE_PATH
+    with _lock:
+        mtime = os.path.getmtime(path)
+        table = load_rating_table(path)
+        _loaded_from = (path, mtime)
+        _next_check = time.monotonic() + RATING_TABLE_RELOAD_SECONDS
+        set_rating_table(table)
+    return table
+
+
+def active_rating_table():
+    """
+    The rating table scores should use, reloaded if its file changed.
+    """
+    if _active is None:
+        with _lock:
+            if _active is None:
+                reload_rating_table()
+    elif RATING_TABLE_RELOAD_SECONDS > 0 and time.monotonic() >= _next_check:
+        _check_for_changes()
+    return _active
+
+
+def _check_for_changes():
+    global _next_check
+    path = RATING_TABLE_PATH or DEFAULT_TABLE_PATH
+    with _lock:
+        if time.monotonic() < _next_check:
+            return
+        _next_check = time.monotonic() + RATING_TABLE_RELOAD_SECONDS
+        try:
+            if (path, os.path.getmtime(path)) != _loaded_from:
+                reload_rating_table()
+        except (OSError, ValueError) as e:
+            print(f">>> RATING TABLE RELOAD FAILED ({path}): {e}; keeping {_active.version}")
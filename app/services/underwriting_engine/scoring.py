@@ -1,88 +1,89 @@
-def calculate_risk_score(customer, drivers, vehicles, coverage, guidewire):
+from app.services.vehicle_classifier import get_vehicle_classifier
+from .rating_table import active_rating_table
+
+
+def calculate_risk_score(customer, drivers, vehicles, coverage, guidewire, table=None):
     print(">>> REAL SCORING ENGINE EXECUTED")
 
     """
-    Deterministic OptimaAI Risk Score Model (v1)
-    Range: 300–900
-    Base Score: 700
+    Deterministic OptimaAI Risk Score Model
+    Range, base score and factor adjustments come from the rating table
+    (default: the active one; v1 = 300–900, base 700).
+    Rates the policy with its first driver and first vehicle.
     """
 
-    score = 700
+    table = table or active_rating_table()
+
+    score = table.base_score
+    score += policy_points(customer, coverage, guidewire, table)
+    score += driver_points(drivers[0].raw if drivers else {}, table)
+    score += vehicle_points(vehicles[0].raw if vehicles else None, table)
+
+    return table.clamp(score)
+
+
+def policy_points(customer, coverage, guidewire, table=None):
+    """
+    Score adjustment for the policy-level factors (customer age, coverage,
+    ZIP, state).
+    """
+    table = table or active_rating_table()
 
     # 1. Age
-    age = customer.get("age")
-    if age:
-        if 25 <= age <= 70: score += 0
-        elif 21 <= age <= 24: score -= 40
-        elif 18 <= age <= 20: score -= 80
-        elif 71 <= age <= 75: score -= 30
-        elif age >= 76: score -= 60
+    points = table.age(customer.age)
 
-    # 2. Accidents
-    accidents = drivers[0]["raw"].get("accidents", 0) if drivers else 0
-    if accidents == 1: score -= 80
-    elif accidents == 2: score -= 140
-    elif accidents >= 3: score -= 200
-
-    # 3. Violations
-    violations = drivers[0]["raw"].get("violations", 0) if drivers else 0
-    major = drivers[0]["raw"].get("majorViolation", False) if drivers else False
-    if major:
-        score -= 220
-    else:
-        if violations == 1: score -= 40
-        elif violations == 2: score -= 80
-        elif violations >= 3: score -= 120
+    # 6. Coverage
+    points += table.coverage_type(coverage.coverageType.lower())
+    points += table.liability_limit(coverage.liabilityLimit)
+    points += table.deductible(coverage.deductible)
 
-    # 4. Mileage
-    mileage = vehicles[0]["raw"].get("annualMileage") if vehicles else None
-    if mileage:
-        if mileage <= 7500: score += 20
-        elif mileage <= 15000: score += 0
-        elif mileage <= 20000: score -= 30
-        else: score -= 60
+    # 7. ZIP
+    points += table.zip((customer.raw or {}).get("address", {}).get("zip"))
 
-    # 5. Vehicle type
-    if vehicles:
-        v = vehicles[0]["raw"]
-        model = (v.get("model") or "").lower()
-        year = v.get("year")
+    # 8. State
+    points += table.state(guidewire.get("state"))
 
-        safe = ["civic", "corolla", "camry", "accord"]
-        family = ["odyssey", "sienna", "highlander", "pilot", "rav4", "cr-v"]
-        sports = ["mustang", "camaro", "challenger", "corvette", "charger"]
+    return points
 
-        if any(s in model for s in safe): score += 20
-        if any(f in model for f in family): score += 10
-        if any(s in model for s in sports): score -= 80
 
-        if year and (2025 - int(year) > 15): score -= 30
+def driver_points(driver, table=None):
+    """
+    Score adjustment for one raw driver block (accidents, violations).
+    """
+    table = table or active_rating_table()
 
-    # 6. Coverage
-    ctype = coverage.get("coverageType", "").lower()
-    liability = coverage.get("liabilityLimit", 100000)
-    deductible = coverage.get("deductible", 500)
+    # 2. Accidents
+    points = table.accidents(driver.get("accidents", 0))
 
-    if ctype == "liability": score += 10
-    else: score -= 20
+    # 3. Violations (a major violation replaces the count)
+    if driver.get("majorViolation", False):
+        points += table.major_violation
+    else:
+        points += table.violations(driver.get("violations", 0))
 
-    if liability > 250000: score -= 20
-    if deductible < 500: score -= 20
+    return points
 
-    # 7. ZIP
-    zip_code = (customer.get("raw") or {}).get("address", {}).get("zip")
-    if zip_code:
-        z = str(zip_code)
-        if z.startswith(("50", "51", "52")): score += 20
-        elif z.startswith(("60", "61", "62")): score += 0
-        else: score -= 40
 
-    # 8. State
-    state = guidewire.get("state")
-    high = ["FL", "LA", "MI", "NY"]
-    low = ["IA", "ND", "SD", "VT"]
+def vehicle_points(vehicle, table=None, class_flags=None):
+    """
+    Score adjustment for one raw vehicle block (mileage, class, age);
+    0 when there is no vehicle. class_flags skips classification when the
+    caller already has the vehicle's classes (classify_many).
+    """
+    if vehicle is None:
+        return 0
+    table = table or active_rating_table()
+
+    # 4. Mileage
+    points = table.annual_mileage(vehicle.get("annualMileage"))
+
+    # 5. Vehicle type
+    classifier = get_vehicle_classifier()
+    if class_flags is None:
+        class_flags = classifier.classify(vehicle.get("make"), vehicle.get("model"), vehicle.get("year"))
+    if class_flags:
+        points += table.vehicle_class_points(classifier.class_names(class_flags))
 
-    if state in high: score -= 20
-    elif state in low: score += 10
+    points += table.vehicle_age_points(vehicle.get("year"))
 
-    return max(300, min(900, score))
+    return points
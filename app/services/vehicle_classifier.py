@@ -0,0 +1,273 @@
+# app/services/vehicle_classifier.py
+#
+# Vehicle classification (safe / family / sports ...) for scoring.
+#
+# Classes and their make/model aliases are data (vehicle_classes/default.json
+# or VEHICLE_CLASSES_PATH). All model aliases are compiled into one
+# Aho-Corasick automaton, so a model name is matched against every alias in
+# a single pass over its characters - the cost does not grow with the
+# number of aliases. Results are returned as bit flags (bit i = classes[i])
+# and memoized per (make, model, year) in a bounded LRU cache.
+#
+# Pattern fields:
+#   class               class name (must be listed in "classes")
+#   models              substrings matched anywhere in the lowercased model
+#   make                optional; only this make (after makeAliases). With
+#                       no models, every model of the make matches
+#   minYear / maxYear   optional model-year range (inclusive)
+
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+
+from app.config import VEHICLE_CLASS_CACHE_SIZE, VEHICLE_CLASSES_PATH
+
+DEFAULT_CLASSES_PATH = os.path.join(os.path.dirname(__file__), "vehicle_classes", "default.json")
+
+
+class _Pattern:
+    __slots__ = ("bit", "make", "min_year", "max_year")
+
+    def __init__(self, bit, make, min_year, max_year):
+        self.bit = bit
+        self.make = make
+        self.min_year = min_year
+        self.max_year = max_year
+
+    def applies(self, make, year):
+        if self.make is not None and make != self.make:
+            return False
+        if self.min_year is None and self.max_year is None:
+            return True
+        try:
+            year = int(year)
+        except (TypeError, ValueError):
+            return False
+        if self.min_year is not None and year < self.min_year:
+            return False
+        return self.max_year is None or year <= self.max_year
+
+
+class _Automaton:
+    """
+    Aho-Corasick matcher. Each node's output is the OR of the bits of
+    unconditional aliases ending there (or at any suffix), plus the
+    make/year-restricted patterns that need checking.
+    """
+
+    def __init__(self, aliases):
+        self.goto = [{}]
+        self.bits = [0]
+        self.conditional = [()]
+
+        for alias, pattern in aliases:
+            node = 0
+            for char in alias:
+                nxt = self.goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][char] = nxt
+                    self.goto.append({})
+                    self.bits.append(0)
+                    self.conditional.append(())
+                node = nxt
+            if pattern.make is None and pattern.min_year is None and pattern.max_year is None:
+                self.bits[node] |= pattern.bit
+            else:
+                self.conditional[node] += (pattern,)
+
+        # Failure links, breadth first; outputs inherit from the fail node
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                fail = self.fail[node]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                fail = self.goto[fail].get(char, 0)
+                self.fail[child] = fail
+                self.bits[child] |= self.bits[fail]
+                self.conditional[child] += self.conditional[fail]
+                queue.append(child)
+
+    def match(self, text, make, year):
+        goto, fail, bits, conditional = self.goto, self.fail, self.bits, self.conditional
+        node = 0
+        flags = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            flags |= bits[node]
+            for pattern in conditional[node]:
+                if pattern.applies(make, year):
+                    flags |= pattern.bit
+        return flags
+
+
+class VehicleClassifier:
+    """
+    Compiled vehicle class table. classify() -> bit flags over `classes`.
+    """
+
+    def __init__(self, spec, max_entries=VEHICLE_CLASS_CACHE_SIZE):
+        self.version = spec.get("version", "")
+        self.classes = tuple(spec["classes"])
+        self.bits = {name: 1 << i for i, name in enumerate(self.classes)}
+        self.make_aliases = {k.lower(): v.lower() for k, v in spec.get("makeAliases", {}).items()}
+
+        aliases = []
+        self._make_patterns = {}    # make -> patterns with no model alias
+        self._uses_year = False
+        self._uses_make = False
+        for entry in spec.get("patterns", []):
+            make = entry.get("make")
+            if make is not None:
+                make = self._canonical_make(make)
+                self._uses_make = True
+            pattern = _Pattern(self.bits[entry["class"]], make, entry.get("minYear"), entry.get("maxYear"))
+            if pattern.min_year is not None or pattern.max_year is not None:
+                self._uses_year = True
+            models = entry.get("models", [])
+            if models:
+                aliases.extend((model.lower(), pattern) for model in models)
+            else:
+                self._make_patterns.setdefault(make, []).append(pattern)
+
+        self._automaton = _Automaton(aliases)
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._names = {}
+        self._lock = threading.Lock()
+
+    def _canonical_make(self, make):
+        make = str(make).strip().lower()
+        return self.make_aliases.get(make, make)
+
+    def _classify(self, make, model, year):
+        make = self._canonical_make(make) if make else None
+        model = model.lower() if isinstance(model, str) else str(model or "").lower()
+        flags = self._automaton.match(model, make, year)
+        for pattern in self._make_patterns.get(make, ()):
+            if pattern.applies(make, year):
+                flags |= pattern.bit
+        return flags
+
+    def classify(self, make=None, model=None, year=None):
+        """
+        Class bit flags for one vehicle (0 = no class).
+        """
+        # Inputs the table cannot distinguish share a cache entry
+        key = (make if self._uses_make else None, model, year if self._uses_year else None)
+        with self._lock:
+            flags = self._cache.get(key)
+            if flags is not None:
+                self._cache.move_to_end(key)
+                return flags
+
+        flags = self._classify(*key)
+        with self._lock:
+            self._cache[key] = flags
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return flags
+
+    def classify_many(self, vehicles):
+        """
+        Bit flags for each vehicle of a fleet, in order. Vehicles are raw
+        dicts or records with make/model/year; each distinct
+        (make, model, year) is classified once.
+        """
+        seen = {}
+        flags = []
+        for vehicle in vehicles:
+            if isinstance(vehicle, dict):
+                make, model, year = vehicle.get("make"), vehicle.get("model"), vehicle.get("year")
+            else:
+                make, model, year = vehicle.make, vehicle.model, vehicle.year
+            key = (make, model, year)
+            result = seen.get(key)
+            if result is None:
+                result = seen[key] = self.classify(make, model, year)
+            flags.append(result)
+        return flags
+
+    def class_names(self, flags):
+        """
+        Class names set in `flags`, in table order.
+        """
+        names = self._names.get(flags)
+        if names is None:
+            names = self._names[flags] = tuple(c for c in self.classes if flags & self.bits[c])
+        return names
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+def validate_classes(spec, name="vehicle classes"):
+    """
+    Reject class tables with unknown classes or malformed patterns.
+    """
+    classes = spec.get("classes")
+    if not isinstance(classes, list) or not classes or not all(isinstance(c, str) for c in classes):
+        raise ValueError(f"{name}: 'classes' must be a non-empty list of strings")
+    if len(set(classes)) != len(classes):
+        raise ValueError(f"{name}: duplicate class names")
+
+    aliases = spec.get("makeAliases", {})
+    if not isinstance(aliases, dict) or not all(isinstance(v, str) for v in aliases.values()):
+        raise ValueError(f"{name}: 'makeAliases' must map names to strings")
+
+    patterns = spec.get("patterns")
+    if not isinstance(patterns, list):
+        raise ValueError(f"{name}: 'patterns' must be a list")
+    for entry in patterns:
+        if entry.get("class") not in classes:
+            raise ValueError(f"{name}: pattern {entry} names an unknown class")
+        models = entry.get("models", [])
+        if not isinstance(models, list) or not all(isinstance(m, str) and m for m in models):
+            raise ValueError(f"{name}: pattern {entry} 'models' must be non-empty strings")
+        if not models and not entry.get("make"):
+            raise ValueError(f"{name}: pattern {entry} needs 'models' or 'make'")
+        for key in ("minYear", "maxYear"):
+            if key in entry and not isinstance(entry[key], int):
+                raise ValueError(f"{name}: pattern {entry} '{key}' must be an integer")
+
+
+def load_vehicle_classifier(path=None):
+    """
+    Read, validate and compile a vehicle class table (default: bundled).
+    """
+    path = path or DEFAULT_CLASSES_PATH
+    with open(path, "r") as f:
+        spec = json.load(f)
+    validate_classes(spec, os.path.basename(path))
+    return VehicleClassifier(spec)
+
+
+# ------------------------------------------------------------
+# PROCESS-WIDE CLASSIFIER
+# ------------------------------------------------------------
+_classifier = None
+
+
+def get_vehicle_classifier():
+    """
+    Returns the shared VehicleClassifier, loading it on first use.
+    """
+    global _classifier
+    if _classifier is None:
+        _classifier = load_vehicle_classifier(VEHICLE_CLASSES_PATH)
+    return _classifier
+
+
+def set_vehicle_classifier(classifier):
+    """
+    Replace the shared classifier (e.g. after editing the class table).
+    """
+    global _classifier
+    _classifier = classifier
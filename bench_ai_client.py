@@ -0,0 +1,57 @@
+# bench_ai_client.py
+#
+# Per-request latency of the Groq call path:
+#   - "fresh": a new AIEngine (new client, new connection) per request,
+#              which is what build_decision_json used to do
+#   - "shared": the process-wide engine from get_ai_engine()
+#
+# Runs against the local groq_stub server so no network or API key is
+# needed:  python bench_ai_client.py [requests]
+
+import os
+import statistics
+import sys
+import time
+
+from groq_stub import start_stub_server
+
+
+def timed(fn, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[len(samples) // 2], samples[int(len(samples) * 0.95)]
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    server = start_stub_server()
+
+    # Must be set before ai_engine reads app.config
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ.setdefault("GROQ_API_KEY", "stub-key")
+    os.environ.setdefault("GROQ_MODEL", "stub-model")
+    os.environ["INSIGHT_CACHE_ENABLED"] = "0"  # measure the HTTP path, not the cache
+
+    from app.processor.ai_engine import AIEngine, get_ai_engine
+
+    context = {"customer": {"firstName": "John"}, "drivers": [], "vehicles": [], "coverage": {}}
+
+    def fresh():
+        engine = AIEngine()
+        engine.generate_insights(context)
+        engine.close()
+
+    def shared():
+        get_ai_engine().generate_insights(context)
+
+    shared()  # open the pooled connection once
+
+    for label, fn in (("fresh engine / request", fresh), ("shared pooled engine", shared)):
+        mean, p50, p95 = timed(fn, n)
+        print(f"{label:24} mean {mean:7.3f} ms   p50 {p50:7.3f} ms   p95 {p95:7.3f} ms")
+
+    server.shutdown()
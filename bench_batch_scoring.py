@@ -0,0 +1,71 @@
+# bench_batch_scoring.py
+#
+# Book-wide re-scoring: calculate_risk_scores over N synthetic rows vs the
+# scalar calculate_risk_score (timed on a sample and extrapolated).
+#
+#   python bench_batch_scoring.py [rows]
+
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+
+from app.normalizer.normalizer import normalize_records
+from app.services.underwriting_engine import calculate_risk_score, calculate_risk_scores, risk_score_columns
+
+SCALAR_SAMPLE = 20000
+
+
+def synthetic_columns(rows, rng):
+    return {
+        "age": rng.integers(16, 90, rows).astype(np.float64),
+        "accidents": rng.integers(0, 4, rows).astype(np.float64),
+        "violations": rng.integers(0, 4, rows).astype(np.float64),
+        "major_violation": rng.random(rows) < 0.05,
+        "annual_mileage": rng.integers(0, 30000, rows).astype(np.float64),
+        "model_class": rng.integers(0, 8, rows),
+        "year": rng.integers(1995, 2026, rows).astype(np.float64),
+        "coverage_type": rng.choice(np.array(["Liability", "Full", "Standard Auto"], dtype=object), rows),
+        "liability_limit": rng.choice([50000.0, 100000.0, 300000.0], rows),
+        "deductible": rng.choice([250.0, 500.0, 1000.0], rows),
+        "zip_code": rng.choice(np.array(["50010", "51501", "60601", "90210", ""], dtype=object), rows),
+        "state": rng.choice(np.array(["IA", "FL", "CA", "NY", "VT"], dtype=object), rows),
+    }
+
+
+def scalar_sample():
+    submissions = []
+    for i in range(SCALAR_SAMPLE):
+        records = normalize_records({
+            "customer": {"age": 18 + i % 60, "address": {"zip": "50010"}},
+            "drivers": [{"accidents": i % 4, "violations": i % 3}],
+            "vehicles": [{"model": "Civic", "year": 2000 + i % 25, "annualMileage": 1000 * (i % 25)}],
+            "coverage": {"coverageType": "Full", "liabilityLimit": 100000, "deductible": 500},
+            "guidewire": {"state": "IA"},
+        })
+        submissions.append((records["customer"], records["drivers"], records["vehicles"],
+                            records["coverage"], records["guidewire"]))
+    return submissions
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    columns = synthetic_columns(rows, np.random.default_rng(7))
+
+    start = time.perf_counter()
+    scores = calculate_risk_scores(**columns)
+    vector_time = time.perf_counter() - start
+
+    submissions = scalar_sample()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = [calculate_risk_score(*s) for s in submissions]
+    scalar_time = (time.perf_counter() - start) / SCALAR_SAMPLE * rows
+    assert calculate_risk_scores(**risk_score_columns(submissions)).tolist() == expected
+
+    print(f"rows: {rows:,}  mean score: {scores.mean():.1f}")
+    print(f"vectorized   {vector_time:7.2f} s")
+    print(f"scalar       {scalar_time:7.2f} s (extrapolated from {SCALAR_SAMPLE:,} rows)")
+    print(f"speedup      {scalar_time / vector_time:7.1f}x")
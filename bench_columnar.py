@@ -0,0 +1,68 @@
+# bench_columnar.py
+#
+# Portfolio-scale normalization: per-payload normalize_incoming_json
+# (nested raw + normalized dicts) vs normalize_columnar (NumPy columns,
+# dictionary-encoded strings). Reports time and memory per submission.
+#
+#   python bench_columnar.py [submissions]
+
+import random
+import sys
+import time
+import tracemalloc
+
+from app.normalizer.columnar import normalize_columnar
+from app.normalizer.normalizer import normalize_incoming_json
+
+MAKES = [("Honda", "Civic"), ("Toyota", "Camry"), ("Ford", "F-150"), ("Subaru", "Outback"), ("BMW", "M3")]
+STATES = ["IA", "IL", "MN", "WI", "NE"]
+
+
+def make_payload(rng, i):
+    state = rng.choice(STATES)
+    return {
+        "customer": {
+            "firstName": f"First{i}",
+            "lastName": "Book",
+            "age": rng.randint(18, 85),
+            "address": {"state": state, "zip": f"5{rng.randint(0, 9999):04d}"},
+        },
+        "drivers": [
+            {"firstName": f"First{i}", "lastName": "Book", "age": rng.randint(16, 85),
+             "accidents": rng.randint(0, 3), "violations": rng.randint(0, 3)}
+            for _ in range(rng.randint(1, 3))
+        ],
+        "vehicles": [
+            {"vin": f"VIN{i}-{n}", "year": rng.randint(2000, 2025), "make": make, "model": model,
+             "annualMileage": rng.randint(2000, 25000)}
+            for n, (make, model) in enumerate(rng.choices(MAKES, k=rng.randint(1, 3)))
+        ],
+        "policy": {"state": state},
+        "coverage": {"coverageType": rng.choice(["Full", "Liability"]),
+                     "liabilityLimit": rng.choice([50000, 100000, 300000]), "deductible": 500},
+    }
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, current
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rng = random.Random(7)
+    payloads = [make_payload(rng, i) for i in range(count)]
+
+    _, dict_time, dict_bytes = measure(lambda: [normalize_incoming_json(p) for p in payloads])
+    batch, col_time, col_bytes = measure(lambda: normalize_columnar(payloads))
+
+    print(f"submissions: {count}  drivers: {len(batch.drivers['age'])}  vehicles: {len(batch.vehicles['year'])}")
+    print(f"nested dicts   {dict_time:6.2f} s   {dict_bytes / count:8.0f} bytes/submission")
+    print(f"columnar       {col_time:6.2f} s   {col_bytes / count:8.0f} bytes/submission   "
+          f"({batch.nbytes / count:.0f} bytes/submission in columns)")
+    print(f"memory ratio   {col_bytes / dict_bytes:.3f}")
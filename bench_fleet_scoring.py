@@ -0,0 +1,62 @@
+# bench_fleet_scoring.py
+#
+# score_fleet on a large commercial fleet: every vehicle rated with its
+# assigned drivers (several drivers per vehicle), both aggregations.
+#
+#   python bench_fleet_scoring.py [vehicles]
+
+import random
+import sys
+import time
+
+from app.normalizer.normalizer import normalize_records
+from app.services.underwriting_engine import score_fleet
+
+RUNS = 20
+
+
+def fleet_payload(vehicle_count, rng):
+    vehicles = [
+        {
+            "vin": f"1FTFW1E5{i:09d}",
+            "make": "Ford",
+            "model": rng.choice(["F-150", "Transit", "Mustang", "Explorer"]),
+            "year": rng.randint(2005, 2025),
+            "annualMileage": rng.randint(5000, 40000),
+        }
+        for i in range(vehicle_count)
+    ]
+    drivers = [
+        {
+            "firstName": f"Driver{i}",
+            "accidents": rng.randint(0, 3),
+            "violations": rng.randint(0, 3),
+            "assignedVehicles": [
+                {"vehicleId": rng.choice(vehicles)["vin"], "exposure": rng.choice([0.25, 0.5, 1.0])}
+                for _ in range(3)
+            ],
+        }
+        for i in range(vehicle_count)
+    ]
+    return {
+        "customer": {"age": 45, "address": {"zip": "50010"}},
+        "drivers": drivers,
+        "vehicles": vehicles,
+        "coverage": {"coverageType": "Full", "liabilityLimit": 1000000, "deductible": 1000},
+        "guidewire": {"state": "IA"},
+    }
+
+
+if __name__ == "__main__":
+    vehicle_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    records = normalize_records(fleet_payload(vehicle_count, random.Random(23)))
+    sections = (records["customer"], records["drivers"], records["vehicles"], records["coverage"], records["guidewire"])
+
+    print(f"vehicles: {vehicle_count:,}  drivers: {len(records['drivers']):,}  assignments: {3 * vehicle_count:,}")
+    for aggregation in ("max", "exposure_mean"):
+        start = time.perf_counter()
+        for _ in range(RUNS):
+            fleet = score_fleet(*sections, base_premium=1200, aggregation=aggregation)
+        elapsed = (time.perf_counter() - start) / RUNS
+        mean = sum(fleet["scores"]) / len(fleet["scores"])
+        print(f"{aggregation:<14} {elapsed * 1000:7.2f} ms  mean score {mean:.1f}")
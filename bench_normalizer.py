@@ -0,0 +1,75 @@
+# bench_normalizer.py
+#
+# Per-payload cost of normalize_incoming_json:
+#   - "full probing": every canonical field probes its alias paths in order
+#                     (pre-split paths, no plan cache)
+#   - "plan cache":   repeat payload shapes go straight to the winning alias
+#                     via the schema-fingerprint plan cache, or through the
+#                     compiled carrier spec when sourceSystem is known
+#
+#   python bench_normalizer.py [iterations]
+
+import json
+import sys
+import timeit
+
+import app.normalizer.normalizer as normalizer
+
+PLANNERS = (normalizer.PAYLOAD_PLANNER, normalizer.DRIVER_PLANNER, normalizer.VEHICLE_PLANNER)
+
+PAYLOADS = {
+    "guidewire_request": json.load(open("guidewire_request.json"))["data"],
+    "insured_shape": {
+        "insured": {
+            "givenName": "John",
+            "familyName": "Doe",
+            "location": {"postalCode": "50001", "stateCd": "IA"},
+        },
+        "operatorList": [{"fname": "John", "lname": "Doe", "accHist": 1}],
+        "autos": [{"VIN": "X1", "modelYear": 2019, "manufacturer": "Honda", "vehicleModel": "Civic"}],
+    },
+    "guidewire_spec": {
+        "sourceSystem": "Guidewire",
+        "customer": {
+            "firstName": "John",
+            "lastName": "Doe",
+            "address": {"street": "1 Main", "city": "Ames", "state": "IA", "zip": "50010"},
+        },
+        "drivers": [{"firstName": "John", "lastName": "Doe", "age": 40, "accidents": 1}],
+        "vehicles": [{"vin": "X1", "year": 2019, "make": "Honda", "model": "Civic"}],
+        "policy": {"state": "IA", "effectiveDate": "2026-01-01"},
+    },
+}
+
+
+def run(payload, iterations):
+    return min(timeit.repeat(
+        lambda: normalizer.normalize_incoming_json(payload), number=iterations, repeat=5
+    )) / iterations * 1e6
+
+
+def full_probing(enabled):
+    for planner in PLANNERS:
+        if enabled:
+            planner.plan_for = planner._probe
+        else:
+            del planner.plan_for
+    # Full probing also means no carrier spec shortcut
+    normalizer.CARRIER_SPECS = {} if enabled else SPECS
+
+
+SPECS = normalizer.CARRIER_SPECS
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    for name, payload in PAYLOADS.items():
+        full_probing(True)
+        before = run(payload, iterations)
+
+        full_probing(False)
+        after = run(payload, iterations)
+
+        print(f"{name:20} full probing {before:7.2f} µs   plan/spec  {after:7.2f} µs   "
+              f"speedup {before / after:4.2f}x")
@@ -0,0 +1,86 @@
+# bench_records.py
+#
+# Memory per submission of the canonical structure the underwriting
+# pipeline carries, for a 50-vehicle fleet:
+#   - "nested dicts": normalize_incoming_json sections plus the
+#                     raw/normalized dict rows build_underwriting_details
+#                     used to copy for every driver and vehicle
+#   - "records":      normalize_records plus record-backed detail rows
+#
+#   python bench_records.py [submissions] [vehicles]
+
+import sys
+import tracemalloc
+
+from app.normalizer.normalizer import normalize_incoming_json, normalize_records
+from app.services.underwriting_engine import build_underwriting_details
+
+
+def make_fleet(i, vehicles):
+    return {
+        "customer": {"firstName": f"Fleet{i}", "lastName": "Co", "age": 45,
+                     "address": {"street": "1 Depot Rd", "city": "Ames", "state": "IA", "zip": "50010"}},
+        "drivers": [{"firstName": f"Op{n}", "lastName": "Driver", "age": 30 + n % 30, "accidents": n % 3,
+                     "violations": n % 2, "licenseNumber": f"L{i}-{n}"} for n in range(vehicles // 2)],
+        "vehicles": [{"vin": f"VIN{i}-{n}", "year": 2010 + n % 15, "make": "Ford", "model": "Transit",
+                      "annualMileage": 12000 + n} for n in range(vehicles)],
+        "coverage": {"coverageType": "Full", "liabilityLimit": 1000000, "deductible": 1000},
+        "policy": {"state": "IA", "effectiveDate": "2026-01-01"},
+        "guidewire": {"state": "IA"},
+    }
+
+
+def nested_dicts(payload):
+    normalized = normalize_incoming_json(payload)
+    details = {
+        "vehicles": [
+            {
+                "raw": v.get("raw", {}),
+                "normalized": v.get("normalized", {}),
+                "rulesResult": {"rulesFired": [], "status": "rules evaluated (placeholder)"},
+                "riskScore": 700,
+                "premium": None,
+                "eligibility": "Eligible",
+            }
+            for v in normalized["vehicles"]
+        ],
+        "drivers": [
+            {
+                "raw": d["raw"],
+                "normalized": d["normalized"],
+                **{k: d["raw"].get(k) for k in ("firstName", "lastName", "age", "licenseNumber", "yearsLicensed",
+                                                 "accidents", "violations", "claims", "isPrimaryDriver")},
+            }
+            for d in normalized["drivers"]
+        ],
+    }
+    sections = {k: normalized[k] for k in ("customer", "drivers", "vehicles", "coverage", "policy", "guidewire")}
+    return sections, details
+
+
+def records(payload):
+    sections = normalize_records(payload)
+    details = build_underwriting_details(sections["drivers"], sections["vehicles"], 700, None)
+    return sections, details
+
+
+def retained_bytes(build, payloads):
+    tracemalloc.start()
+    kept = [build(p) for p in payloads]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current / len(payloads)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    vehicles = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    payloads = [make_fleet(i, vehicles) for i in range(count)]
+
+    before = retained_bytes(nested_dicts, payloads)
+    after = retained_bytes(records, payloads)
+
+    print(f"{vehicles}-vehicle fleet, {count} submissions (raw payload excluded)")
+    print(f"nested dicts   {before:10.0f} bytes/submission")
+    print(f"records        {after:10.0f} bytes/submission   ({after / before:.2f}x)")
@@ -0,0 +1,69 @@
+# bench_vehicle_classifier.py
+#
+# Vehicle classification with a large alias table: the old per-class
+# any(alias in model) scans vs the Aho-Corasick classifier, uncached and
+# with the (make, model, year) cache, over a synthetic fleet.
+#
+#   python bench_vehicle_classifier.py [aliases] [vehicles]
+
+import random
+import string
+import sys
+import time
+
+from app.services.vehicle_classifier import VehicleClassifier
+
+CLASSES = ["safe", "family", "sports"]
+
+
+def alias_table(count, rng):
+    aliases = {c: set() for c in CLASSES}
+    while sum(len(a) for a in aliases.values()) < count:
+        aliases[rng.choice(CLASSES)].add("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 9))))
+    return {c: sorted(a) for c, a in aliases.items()}
+
+
+def scan(aliases, model):
+    model = (model or "").lower()
+    flags = 0
+    for i, c in enumerate(CLASSES):
+        if any(a in model for a in aliases[c]):
+            flags |= 1 << i
+    return flags
+
+
+if __name__ == "__main__":
+    alias_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    vehicle_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    rng = random.Random(25)
+    aliases = alias_table(alias_count, rng)
+    all_aliases = [a for c in CLASSES for a in aliases[c]]
+    spec = {"classes": CLASSES, "patterns": [{"class": c, "models": aliases[c]} for c in CLASSES]}
+
+    # A fleet draws from a few hundred distinct models
+    models = [f"{rng.choice(all_aliases).title()} {rng.choice(['LX', 'Sport', 'Hybrid', ''])}" for _ in range(150)]
+    models += ["".join(rng.choice(string.ascii_letters) for _ in range(10)) for _ in range(150)]
+    fleet = [{"make": "Make", "model": rng.choice(models), "year": 2020} for _ in range(vehicle_count)]
+
+    start = time.perf_counter()
+    expected = [scan(aliases, v["model"]) for v in fleet]
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    classifier = VehicleClassifier(spec)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    uncached = [classifier._classify(v["make"], v["model"], v["year"]) for v in fleet]
+    automaton_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cached = classifier.classify_many(fleet)
+    bulk_time = time.perf_counter() - start
+
+    assert uncached == expected and cached == expected
+    print(f"aliases: {alias_count:,}  vehicles: {vehicle_count:,}  distinct models: {len(set(models))}")
+    print(f"any() scans         {scan_time * 1000:9.1f} ms")
+    print(f"automaton build     {build_time * 1000:9.1f} ms (once per table)")
+    print(f"automaton uncached  {automaton_time * 1000:9.1f} ms")
+    print(f"classify_many       {bulk_time * 1000:9.1f} ms")
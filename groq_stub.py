@@ -0,0 +1,264 @@
+# groq_stub.py
+#
+# Offline stand-in for the Groq chat-completions API, for benchmarks and
+# integration tests of process_data without a GROQ_API_KEY or network.
+#
+# - POST /openai/v1/chat/completions (also /v1/chat/completions)
+# - deterministic "a || b || c || d" answers derived from the request
+#   (batch prompts get one answer per "### ITEM n")
+# - stream=True returns OpenAI-style SSE chunks
+# - response_format json_object returns a JSON insights object
+# - configurable latency distribution, error rate, throttling (429) and
+#   malformed-reply rate
+#
+# Run standalone:
+#   python groq_stub.py --port 8787 --latency lognormal:300:0.4 --error-rate 0.01
+# then point the app at it:
+#   GROQ_BASE_URL=http://127.0.0.1:8787 GROQ_API_KEY=stub GROQ_MODEL=stub uvicorn main:app
+#
+# Or in-process:  server = start_stub_server(latency="fixed:50")
+
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETION_PATHS = ("/openai/v1/chat/completions", "/v1/chat/completions")
+ITEM_HEADER = re.compile(r"^###\s*ITEM\s+(\d+)\s*$", re.MULTILINE)
+
+
+# -----------------------------
+# Latency distributions
+# -----------------------------
+def parse_latency(spec):
+    """
+    "fixed:MS" | "uniform:LO:HI" | "normal:MEAN:SD" | "lognormal:MEDIAN:SIGMA"
+    | "cycle:MS:MS:..." (the listed delays in order, repeating)
+    Returns a function giving a delay in seconds.
+    """
+    kind, *params = (spec or "fixed:0").split(":")
+    params = [float(p) for p in params]
+
+    if kind == "fixed":
+        return lambda: params[0] / 1000.0
+    if kind == "uniform":
+        return lambda: random.uniform(params[0], params[1]) / 1000.0
+    if kind == "normal":
+        return lambda: max(0.0, random.gauss(params[0], params[1])) / 1000.0
+    if kind == "cycle":
+        delays = itertools.cycle(params)
+        return lambda: next(delays) / 1000.0
+    if kind == "lognormal":
+        median, sigma = params
+        return lambda: median * random.lognormvariate(0.0, sigma) / 1000.0
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+# -----------------------------
+# Deterministic answers
+# -----------------------------
+def stub_answer(context_text):
+    tag = hashlib.sha256(context_text.encode("utf-8")).hexdigest()[:8]
+    return (
+        f"Stub driver risk factors [{tag}] || Stub pricing rationale [{tag}] || "
+        f"Stub explanation [{tag}] || Stub improvement suggestions [{tag}]"
+    )
+
+
+def stub_json_answer(context_text):
+    fields = [part.strip() for part in stub_answer(context_text).split("||")]
+    keys = ("driverRiskFactors", "pricingRationale", "explanations", "improvementSuggestions")
+    return json.dumps(dict(zip(keys, fields)))
+
+
+def build_answer(messages, json_mode=False):
+    context_text = messages[-1].get("content", "") if messages else ""
+    if json_mode:
+        return stub_json_answer(context_text)
+
+    items = ITEM_HEADER.split(context_text)
+
+    # Batch prompt: ["", "1", ctx1, "2", ctx2, ...]
+    if len(items) > 1:
+        return "\n".join(
+            f"### ITEM {items[i]}\n{stub_answer(items[i + 1])}"
+            for i in range(1, len(items) - 1, 2)
+        )
+    return stub_answer(context_text)
+
+
+# -----------------------------
+# HTTP handler
+# -----------------------------
+class StubConfig:
+    def __init__(self, latency="fixed:0", error_rate=0.0, throttle_rate=0.0, max_concurrency=0,
+                 malformed_rate=0.0):
+        self.delay = parse_latency(latency)
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.throttle_rate = throttle_rate
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = StubConfig()
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.config.lock:
+            self.config.connections += 1
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status, message, kind, headers=None):
+        self._send_json(status, {"error": {"message": message, "type": kind, "code": kind}}, headers)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0)
+        if self.path not in COMPLETION_PATHS:
+            return self._error(404, f"Unknown path {self.path}", "not_found")
+
+        config = self.config
+        with config.lock:
+            config.requests += 1
+            over_capacity = config.max_concurrency and config.in_flight >= config.max_concurrency
+            if not over_capacity:
+                config.in_flight += 1
+                config.peak_in_flight = max(config.peak_in_flight, config.in_flight)
+
+        if over_capacity or random.random() < config.throttle_rate:
+            if not over_capacity:
+                with config.lock:
+                    config.in_flight -= 1
+            return self._error(429, "Rate limit reached (stub)", "rate_limit_exceeded", {"retry-after": "1"})
+
+        try:
+            time.sleep(config.delay())
+            if random.random() < config.error_rate:
+                return self._error(500, "Internal server error (stub)", "internal_server_error")
+
+            request = json.loads(body or b"{}")
+            json_mode = (request.get("response_format") or {}).get("type") == "json_object"
+            answer = build_answer(request.get("messages", []), json_mode)
+            if random.random() < config.malformed_rate:
+                answer = "Stub reply without the requested format"
+            if request.get("stream"):
+                self._stream(request.get("model", "stub"), answer)
+            else:
+                self._send_json(200, completion(request.get("model", "stub"), answer))
+        finally:
+            with config.lock:
+                config.in_flight -= 1
+
+    def _stream(self, model, answer):
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        words = answer.split(" ")
+        for i, word in enumerate(words):
+            delta = word if i == len(words) - 1 else word + " "
+            self.wfile.write(f"data: {json.dumps(chunk(model, delta, None))}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(f"data: {json.dumps(chunk(model, None, 'stop'))}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+def completion(model, content):
+    return {
+        "id": f"chatcmpl-stub-{random.getrandbits(32):08x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(content) // 4, "total_tokens": len(content) // 4},
+    }
+
+
+def chunk(model, delta, finish_reason):
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "delta": {"content": delta} if delta is not None else {},
+            "finish_reason": finish_reason,
+        }],
+    }
+
+
+# -----------------------------
+# Entry points
+# -----------------------------
+def make_stub_server(host="127.0.0.1", port=0, **config):
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": StubConfig(**config)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.base_url = f"http://{host}:{server.server_port}"
+    server.stats = handler.config
+    return server
+
+
+def start_stub_server(host="127.0.0.1", port=0, **config):
+    """
+    Starts the stub on a background thread and returns the server.
+    server.base_url is ready to use as GROQ_BASE_URL; call server.shutdown().
+    server.stats holds request / in-flight / connection counters.
+    """
+    server = make_stub_server(host, port, **config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline Groq chat-completions stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", default="fixed:0", help="fixed:MS | uniform:LO:HI | normal:MEAN:SD | lognormal:MEDIAN:SIGMA | cycle:MS:MS:...")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 500 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="429 above this many in-flight requests")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of replies ignoring the output format")
+    args = parser.parse_args()
+
+    server = make_stub_server(
+        args.host,
+        args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        max_concurrency=args.max_concurrency,
+        malformed_rate=args.malformed_rate,
+    )
+    print(f"Groq stub listening on {server.base_url}")
+    server.serve_forever()
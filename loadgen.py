@@ -0,0 +1,358 @@
+# loadgen.py
+#
+# Load-test and replay harness for the OptimaAI Underwriter API.
+#
+# Replays testdata/loadgen_corpus.jsonl (or any payload / captured
+# requests.jsonl files) against /receive and phase2_output.json against
+# /generate-compliance-report, at a target RPS or a fixed concurrency, and
+# reports throughput and latency percentiles. Results can be saved as a
+# baseline and diffed on later runs.
+#
+# A run whose error rate is above --max-error-rate (default 0) exits 1 and
+# does not save a baseline: latencies of failed requests say nothing about
+# the pipeline.
+#
+# Examples:
+#   python loadgen.py --concurrency 50 --requests 2000 --stub-latency-ms 300
+#   python loadgen.py --rps 100 --duration 30 --save-baseline baseline.json
+#   python loadgen.py --rps 100 --duration 30 --baseline baseline.json
+#   python loadgen.py --url http://127.0.0.1:8000 --concurrency 20
+#
+# In-process mode (default) drives the ASGI app directly with its Groq client
+# pointed at a local groq_stub server with the configured latency.
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+# -----------------------------
+# Replay corpus
+# -----------------------------
+def load_corpus(paths):
+    """
+    Returns a list of /receive bodies ({"data": {...}}).
+    .json files hold one payload; .jsonl files hold one per line.
+    Payloads that are not already wrapped in "data" are wrapped.
+    """
+    payloads = []
+    for path in paths:
+        with open(path, "r") as f:
+            if path.endswith(".jsonl"):
+                records = [json.loads(line) for line in f if line.strip()]
+            else:
+                records = [json.load(f)]
+
+        for record in records:
+            if isinstance(record, dict) and isinstance(record.get("body"), dict):
+                record = record["body"]
+            if not isinstance(record, dict):
+                continue
+            payloads.append(record if "data" in record else {"data": record})
+
+    return payloads
+
+
+DEFAULT_CORPUS = "testdata/loadgen_corpus.jsonl"
+
+
+def default_corpus_paths():
+    """
+    The bundled corpus: canonical /receive payloads covering single and
+    multi driver / vehicle submissions across states and coverages.
+    (guidewire_request.json and testdata/*.json are raw carrier documents
+    the pipeline does not score; pass them with --corpus to replay them.)
+    """
+    return [DEFAULT_CORPUS] if os.path.exists(DEFAULT_CORPUS) else []
+
+
+# -----------------------------
+# Stubbed Groq backend (in-process only)
+# -----------------------------
+def start_groq_stub(args):
+    """
+    Starts groq_stub on a local port and points the app's Groq client at it,
+    so the full HTTP client, cache and timeout path is exercised.
+    Must run before the app (and app.config) is imported.
+    """
+    from groq_stub import start_stub_server
+
+    server = start_stub_server(
+        latency=f"normal:{args.stub_latency_ms}:{args.stub_jitter_ms}",
+        error_rate=args.stub_error_rate,
+        throttle_rate=args.stub_throttle_rate,
+    )
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ.setdefault("GROQ_API_KEY", "stub-key")
+    os.environ.setdefault("GROQ_MODEL", "stub-model")
+    return server
+
+
+def make_client(args):
+    if args.url:
+        return httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+
+    start_groq_stub(args)
+    from main import app
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://loadgen", timeout=args.timeout)
+
+
+# -----------------------------
+# Load generation
+# -----------------------------
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, endpoint, seconds, ok):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+def is_error_body(response):
+    # The API reports some failures as 200 {"error": ...}
+    if not response.headers.get("content-type", "").startswith("application/json"):
+        return False
+    body = response.json()
+    return isinstance(body, dict) and "error" in body
+
+
+async def send_one(client, recorder, endpoint, body):
+    start = time.perf_counter()
+    ok = False
+    try:
+        response = await client.post(endpoint, json=body)
+        ok = response.status_code == 200 and not is_error_body(response)
+    except Exception:
+        ok = False
+    recorder.record(endpoint, time.perf_counter() - start, ok)
+
+
+def build_jobs(corpus, endpoints, pdf_body):
+    """
+    Infinite round-robin over (endpoint, body) pairs.
+    """
+    while True:
+        for body in corpus:
+            if "receive" in endpoints:
+                yield "/receive", body
+            if "pdf" in endpoints:
+                yield "/generate-compliance-report", pdf_body
+
+
+async def run_concurrency(client, recorder, jobs, concurrency, total, deadline):
+    sent = 0
+
+    async def worker():
+        nonlocal sent
+        while (total is None or sent < total) and (deadline is None or time.perf_counter() < deadline):
+            sent += 1
+            endpoint, body = next(jobs)
+            await send_one(client, recorder, endpoint, body)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run_rps(client, recorder, jobs, rps, total, deadline):
+    interval = 1.0 / rps
+    next_at = time.perf_counter()
+    tasks = []
+    sent = 0
+
+    while (total is None or sent < total) and (deadline is None or time.perf_counter() < deadline):
+        endpoint, body = next(jobs)
+        tasks.append(asyncio.ensure_future(send_one(client, recorder, endpoint, body)))
+        sent += 1
+        next_at += interval
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+
+    await asyncio.gather(*tasks)
+
+
+def load_pdf_body(path):
+    """
+    The PDF endpoint takes an enriched report document (applicant, risk,
+    pricing, compliance, ...), not a /receive decision.
+    """
+    with open(path, "r") as f:
+        document = json.load(f)
+    return document if "processed_data" in document else {"processed_data": document}
+
+
+# -----------------------------
+# Reporting
+# -----------------------------
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(recorder, elapsed):
+    report = {"elapsedSeconds": round(elapsed, 3), "endpoints": {}}
+    for endpoint, values in sorted(recorder.latencies.items()):
+        values = sorted(values)
+        report["endpoints"][endpoint] = {
+            "requests": len(values),
+            "errors": recorder.errors.get(endpoint, 0),
+            "throughputRps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "p50Ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95Ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99Ms": round(percentile(values, 0.99) * 1000, 2),
+        }
+    return report
+
+
+def error_rate_violations(report, max_error_rate):
+    """
+    Returns a message per endpoint whose error rate exceeds max_error_rate.
+    """
+    violations = []
+    for endpoint, s in report["endpoints"].items():
+        rate = s["errors"] / max(1, s["requests"])
+        if rate > max_error_rate:
+            violations.append(f"{endpoint}: {s['errors']}/{s['requests']} errors ({rate:.2%})")
+    return violations
+
+
+def diff_against_baseline(report, baseline, tolerance):
+    """
+    Returns a list of regression messages. Latency may grow and throughput
+    may drop by at most `tolerance` (fraction) before it counts.
+    """
+    regressions = []
+    for endpoint, current in report["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(endpoint)
+        if not base:
+            continue
+
+        for key in ("p50Ms", "p95Ms", "p99Ms"):
+            if base[key] and current[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{endpoint} {key}: {base[key]} -> {current[key]}")
+
+        if base["throughputRps"] and current["throughputRps"] < base["throughputRps"] * (1 - tolerance):
+            regressions.append(
+                f"{endpoint} throughputRps: {base['throughputRps']} -> {current['throughputRps']}"
+            )
+
+        base_rate = base["errors"] / max(1, base["requests"])
+        rate = current["errors"] / max(1, current["requests"])
+        if rate > base_rate + tolerance / 10:
+            regressions.append(f"{endpoint} error rate: {base_rate:.2%} -> {rate:.2%}")
+
+    return regressions
+
+
+def print_report(report):
+    print(f"\n===== LOADGEN RESULTS ({report['elapsedSeconds']}s) =====")
+    print(f"{'endpoint':32} {'reqs':>7} {'errs':>6} {'rps':>9} {'p50ms':>9} {'p95ms':>9} {'p99ms':>9}")
+    for endpoint, s in report["endpoints"].items():
+        print(
+            f"{endpoint:32} {s['requests']:>7} {s['errors']:>6} {s['throughputRps']:>9} "
+            f"{s['p50Ms']:>9} {s['p95Ms']:>9} {s['p99Ms']:>9}"
+        )
+    for name, value in sorted(report.get("counters", {}).items()):
+        print(f"  {name}: {value}")
+
+
+# -----------------------------
+# Entry point
+# -----------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="OptimaAI load-test and replay harness")
+    parser.add_argument("--url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--corpus", nargs="*", help="Payload files (.json / .jsonl)")
+    parser.add_argument("--endpoints", default="receive,pdf", help="Comma list: receive,pdf")
+    parser.add_argument("--pdf-body", default="phase2_output.json", help="Enriched report JSON for the PDF endpoint")
+
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--rps", type=float, help="Open-loop target requests per second")
+    load.add_argument("--concurrency", type=int, default=10, help="Closed-loop concurrent clients")
+
+    parser.add_argument("--requests", type=int, help="Stop after this many requests")
+    parser.add_argument("--duration", type=float, default=10.0, help="Stop after this many seconds")
+    parser.add_argument("--timeout", type=float, default=60.0)
+
+    parser.add_argument("--stub-latency-ms", type=float, default=300.0)
+    parser.add_argument("--stub-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--stub-throttle-rate", type=float, default=0.0)
+
+    parser.add_argument("--save-baseline", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Compare against this saved report")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed regression fraction")
+    parser.add_argument("--max-error-rate", type=float, default=0.0,
+                        help="Fail (and save no baseline) above this error fraction per endpoint")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    corpus = load_corpus(args.corpus or default_corpus_paths())
+    if not corpus:
+        print("No payloads found to replay.")
+        return 2
+
+    endpoints = set(args.endpoints.split(","))
+    total = args.requests
+    deadline = None
+
+    async with make_client(args) as client:
+        pdf_body = load_pdf_body(args.pdf_body) if "pdf" in endpoints else None
+        jobs = build_jobs(corpus, endpoints, pdf_body)
+        recorder = Recorder()
+
+        if total is None:
+            deadline = time.perf_counter() + args.duration
+
+        start = time.perf_counter()
+        if args.rps:
+            await run_rps(client, recorder, jobs, args.rps, total, deadline)
+        else:
+            await run_concurrency(client, recorder, jobs, args.concurrency, total, deadline)
+        elapsed = time.perf_counter() - start
+
+    report = summarize(recorder, elapsed)
+    if not args.url:
+        # In-process run: include cache / fallback / retry counters from app.metrics
+        from app.metrics import snapshot
+        report["counters"] = snapshot()["counters"]
+    print_report(report)
+
+    errors = error_rate_violations(report, args.max_error_rate)
+    if errors:
+        print(f"\nERROR RATE ABOVE {args.max_error_rate:.2%}:")
+        for line in errors:
+            print(" -", line)
+        if args.save_baseline:
+            print(f"Baseline not saved: {args.save_baseline}")
+        return 1
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = diff_against_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for line in regressions:
+                print(" -", line)
+            return 1
+        print("\nNo regressions against baseline.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
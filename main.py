@@ -1,6 +1,8 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -15,8 +17,23 @@ origins = [
     "https://optimaai-underwriter-ui.onrender.com"
 ]
 
+# ============================
+# LIFESPAN (startup / shutdown of shared resources)
+# ============================
+@asynccontextmanager
+async def lifespan(app):
+    from app.pdf_layout.render_pool import start_render_pool, stop_render_pool
+    from app.processor.ai_engine import get_ai_engine, shutdown_ai_engine
+
+    start_render_pool()
+    get_ai_engine()
+    yield
+    await shutdown_ai_engine()
+    stop_render_pool()
+
+
 # Create FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Apply CORS middleware BEFORE importing routers
 app.add_middleware(
@@ -0,0 +1,170 @@
+# Batched insights: reply splitting, single-item reruns for missing or
+# misnumbered answers, batch sizing against the model context window,
+# cache sharing with single calls, and the /receive/renewal endpoint that
+# runs submissions through them.
+
+import contextlib
+import io
+import json
+import os
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.processor import ai_engine
+from app.processor.ai_engine import AIEngine, split_batch_output
+from app.metrics import snapshot
+from app.processor.ai_insights import is_well_formed
+from app.processor.insight_cache import InsightCache, make_cache_key
+from app.processor.context_compactor import estimate_tokens
+from app.prompt.batch_prompt import BATCH_PROMPT
+from groq_stub import build_answer
+from test_ai_engine import context, patched, payload, stub_ai
+from main import app
+
+
+class ScriptedClient:
+    """
+    Groq client stand-in: batch requests get `batch_reply(n_items)`,
+    single requests the stub's deterministic answer.
+    """
+
+    def __init__(self, batch_reply):
+        self.batch_reply = batch_reply
+        self.requests = []
+        self.chat = SimpleNamespace(completions=self)
+
+    def with_options(self, **_):
+        return self
+
+    def create(self, model, messages, **_):
+        is_batch = messages[0]["content"] == BATCH_PROMPT
+        self.requests.append("batch" if is_batch else "single")
+        if is_batch:
+            content = self.batch_reply(messages[-1]["content"].count("### ITEM "))
+        else:
+            content = build_answer(messages)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def scripted_engine(batch_reply):
+    engine = AIEngine()
+    engine.client = ScriptedClient(batch_reply)
+    return engine
+
+
+def test_split_batch_output():
+    text = "### ITEM 1\na || b ||\n c || d\n## item 2:\ne || f || g || h\n### ITEM 4\nbroken"
+    assert split_batch_output(text) == {1: "a || b || c || d", 2: "e || f || g || h", 4: "broken"}
+    assert split_batch_output("no headers at all") == {}
+    assert split_batch_output(None) == {}
+
+
+def test_missing_and_misnumbered_items_are_rerun_singly():
+    def reply(n):
+        # Item 2 missing, item 3 answered as "ITEM 5", item 4 malformed
+        return "\n".join([
+            "### ITEM 1", "a1 || b1 || c1 || d1",
+            "### ITEM 5", "a3 || b3 || c3 || d3",
+            "### ITEM 4", "only one field",
+        ])
+
+    contexts = [context(i) for i in range(4)]
+    engine = scripted_engine(reply)
+    with stub_ai(), contextlib.redirect_stdout(io.StringIO()):
+        results = engine.generate_insights_batch(contexts)
+
+    assert engine.client.requests == ["batch", "single", "single", "single"]
+    assert results[0] == "a1 || b1 || c1 || d1"
+    assert all(is_well_formed(r) for r in results)
+    assert "c3" not in results[2]
+
+
+class FailingClient(ScriptedClient):
+    def create(self, model, messages, **_):
+        self.requests.append("batch" if messages[0]["content"] == BATCH_PROMPT else "single")
+        raise RuntimeError("provider down")
+
+
+def counters(*names):
+    current = snapshot()["counters"]
+    return [current.get(name, 0) for name in names]
+
+
+def test_failed_rerun_leaves_item_for_fallback():
+    names = ("ai_batch_request_failures", "ai_batch_rerun_failures")
+    before = counters(*names)
+    engine = AIEngine()
+    engine.client = FailingClient(None)
+    out = io.StringIO()
+    with stub_ai(), contextlib.redirect_stdout(out):
+        assert engine.generate_insights_batch([context(0), context(1)]) == [None, None]
+    assert engine.client.requests == ["batch", "single", "single"]
+    assert [a - b for a, b in zip(counters(*names), before)] == [1, 2]
+    assert "FAILED" not in out.getvalue()
+
+
+def test_batch_shares_cache_entries_with_single_calls():
+    model = os.getenv("GROQ_MODEL")
+    cache = InsightCache(max_bytes=100000, ttl_seconds=60, sqlite_path=None)
+    engine = scripted_engine(lambda n: "\n".join(f"### ITEM {k}\na{k} || b || c || d" for k in range(1, n + 1)))
+
+    with stub_ai(), patched(ai_engine, AI_OUTPUT_MODE="json", get_insight_cache=lambda: cache):
+        # An interactive JSON-mode answer for context(0) is reused by the batch
+        single = '{"driverRiskFactors": "x", "pricingRationale": "x", "explanations": "x", "improvementSuggestions": "x"}'
+        cache.set(make_cache_key(model, context(0), "json"), single)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = engine.generate_insights_batch([context(0), context(1)])
+            assert engine.generate_insights_batch([context(1)]) == [results[1]]
+
+    assert results == [single, "a1 || b || c || d"]
+    assert engine.client.requests == ["batch"]
+    # Batch replies are delimited and stored under the delimited key
+    assert cache.get(make_cache_key(model, context(1), "delimited")) == results[1]
+    assert cache.get(make_cache_key(model, context(1), "json")) is None
+
+
+def test_plan_batches_fits_context_window():
+    with stub_ai(), patched(ai_engine, AI_MODEL_CONTEXT_TOKENS=4096, AI_BATCH_MAX_ITEMS=6, AI_BATCH_OUTPUT_TOKENS_PER_ITEM=160):
+        engine = AIEngine()
+        budget = 4096 - estimate_tokens(BATCH_PROMPT) - 64
+        item_tokens = [300, 50, 900, 1200, 40, 40, 40, 40, 40, 40, 40, 5000, 700]
+        batches = engine.plan_batches(item_tokens)
+        engine.close()
+
+    assert [i for batch in batches for i in batch] == list(range(len(item_tokens)))
+    for batch in batches:
+        assert len(batch) <= 6
+        if len(batch) > 1:
+            assert sum(item_tokens[i] + 160 + 8 for i in batch) <= budget
+    # An item larger than the window still goes out, on its own
+    assert [11] in batches
+    assert len(batches) < len(item_tokens)
+
+
+def test_renewal_endpoint_batches_llm_calls():
+    lines = [json.dumps({"data": payload(i)}) for i in range(5)]
+    lines.insert(2, json.dumps({"data": "not an object"}))
+
+    with stub_ai() as server, contextlib.redirect_stdout(io.StringIO()):
+        response = TestClient(app).post("/receive/renewal", content="\n".join(lines),
+                                        headers={"content-type": "application/x-ndjson"})
+        assert server.stats.requests == 1
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["index"] for r in results] == list(range(6))
+    assert [r["status"] for r in results] == ["ok", "ok", "error", "ok", "ok", "ok"]
+    for r in results:
+        if r["status"] == "ok":
+            assert r["result"]["aiInsightsMeta"]["source"] == "llm"
+            assert r["result"]["aiInsights"]["driverRiskFactors"].startswith("Stub driver risk factors")
+
+
+if __name__ == "__main__":
+    test_split_batch_output()
+    test_missing_and_misnumbered_items_are_rerun_singly()
+    test_failed_rerun_leaves_item_for_fallback()
+    test_batch_shares_cache_entries_with_single_calls()
+    test_plan_batches_fits_context_window()
+    test_renewal_endpoint_batches_llm_calls()
+    print("RESULT: batched insights split, rerun and size correctly")
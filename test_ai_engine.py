@@ -0,0 +1,116 @@
+# AIEngine against the in-process Groq stub: the async path keeps at most
+# AI_MAX_CONCURRENCY calls in flight, and one pooled client serves every
+# request.
+#
+# stub_ai() is shared by the other AI test modules.
+
+import asyncio
+import contextlib
+import io
+import os
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+os.environ.setdefault("GROQ_MODEL", "stub")
+
+from app.processor import ai_engine
+from app.processor.ai_engine import get_ai_engine, shutdown_ai_engine
+from app.processor.ai_insights import is_well_formed
+from app.processor.processor import process_data
+from groq_stub import start_stub_server
+
+
+@contextlib.contextmanager
+def patched(module, **values):
+    """
+    Sets module attributes for the duration of the block.
+    """
+    saved = {name: getattr(module, name) for name in values}
+    for name, value in values.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+@contextlib.contextmanager
+def stub_ai(**stub_config):
+    """
+    Points the process-wide AIEngine at a fresh groq_stub, with the insight
+    cache, rate limiter and hedging off. Yields the stub server.
+    """
+    server = start_stub_server(**stub_config)
+    try:
+        with patched(
+            ai_engine,
+            GROQ_BASE_URL=server.base_url,
+            AI_OUTPUT_MODE="delimited",
+            AI_HEDGE_AFTER_SECONDS=0,
+            get_insight_cache=lambda: None,
+            get_rate_limiter=lambda: None,
+            _engine=None,
+            _ai_semaphore=None,
+        ):
+            try:
+                yield server
+            finally:
+                if ai_engine._engine is not None:
+                    ai_engine._engine.close()
+    finally:
+        server.shutdown()
+
+
+def context(i=0):
+    return {
+        "customer": {"firstName": f"Test{i}", "lastName": "Driver", "age": 30 + i},
+        "coverage": {"coverageType": "Full", "liabilityLimit": 100000, "deductible": 500},
+        "vehicles": [{"year": 2018, "make": "Honda", "model": "Civic"}],
+        "drivers": [{"firstName": f"Test{i}", "age": 30 + i, "accidents": 0, "violations": 0}],
+    }
+
+
+def payload(i=0):
+    return {
+        "customer": {"firstName": f"Test{i}", "lastName": "Driver", "age": 30 + i},
+        "drivers": [{"firstName": f"Test{i}", "age": 30 + i}],
+        "vehicles": [{"vin": f"VIN{i}", "year": 2018, "make": "Honda", "model": "Civic"}],
+        "coverage": {"coverageType": "Full", "liabilityLimit": 100000, "deductible": 500, "basePremium": 1200},
+    }
+
+
+def test_semaphore_caps_in_flight_calls():
+    async def run():
+        try:
+            return await asyncio.gather(*(get_ai_engine().agenerate_insights(context(i)) for i in range(12)))
+        finally:
+            await shutdown_ai_engine()
+
+    with stub_ai(latency="fixed:100") as server, patched(ai_engine, AI_MAX_CONCURRENCY=3):
+        with contextlib.redirect_stdout(io.StringIO()):
+            outputs = asyncio.run(run())
+
+    assert all(is_well_formed(o) for o in outputs)
+    assert len(set(outputs)) == 12
+    assert server.stats.requests == 12
+    assert server.stats.peak_in_flight == 3
+
+
+
+def test_client_is_reused_across_requests():
+    with stub_ai() as server:
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = get_ai_engine()
+            decisions = [process_data(payload(i)) for i in range(5)]
+        assert get_ai_engine() is engine
+
+    assert all(d["aiInsightsMeta"]["source"] == "llm" for d in decisions)
+    assert server.stats.requests == 5
+    # One keep-alive connection carried all five calls
+    assert server.stats.connections == 1
+
+
+if __name__ == "__main__":
+    test_semaphore_caps_in_flight_calls()
+    test_client_is_reused_across_requests()
+    print("RESULT: AI calls are capped and share one pooled client")
@@ -0,0 +1,158 @@
+# JSON output mode: schema compilation and parsing, the single repair
+# retry, and the fallback when the repaired reply is still invalid.
+
+import asyncio
+import contextlib
+import io
+import json
+from types import SimpleNamespace
+
+from app.metrics import snapshot
+from app.processor import ai_engine
+from app.processor.ai_engine import AIEngine, InvalidAIOutput, shutdown_ai_engine
+from app.processor.ai_insights import AI_FIELDS, compile_schema, parse_json_insights
+from app.processor.processor import process_data, process_data_async
+from app.prompt.json_output_prompt import JSON_REPAIR_PROMPT
+from test_ai_engine import context, patched, payload, stub_ai
+
+VALID = {field: f"{field} text" for field in AI_FIELDS}
+
+
+def completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class SequenceClient:
+    """
+    Groq client stand-in returning `replies` in order and recording the
+    system prompt of each request. Serves both the sync and async client.
+    """
+
+    def __init__(self, replies, is_async=False):
+        self.replies = list(replies)
+        self.prompts = []
+        self.is_async = is_async
+        self.chat = SimpleNamespace(completions=self)
+
+    def with_options(self, **_):
+        return self
+
+    def _next(self, messages):
+        self.prompts.append(messages[0]["content"])
+        return completion(self.replies.pop(0))
+
+    def create(self, model, messages, **options):
+        assert options["response_format"] == {"type": "json_object"}
+        if self.is_async:
+            async def reply():
+                return self._next(messages)
+            return reply()
+        return self._next(messages)
+
+
+def json_engine(replies):
+    engine = AIEngine()
+    engine.client = SequenceClient(replies)
+    engine._async_client = SequenceClient(replies, is_async=True)
+    return engine
+
+
+def generate_both(engine):
+    """
+    (sync result, async result) for the same context; each is the
+    returned string or the raised exception.
+    """
+    results = []
+    for call in (lambda: engine.generate_insights(context()),
+                 lambda: asyncio.run(engine.agenerate_insights(context()))):
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                results.append(call())
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def counter(name):
+    return snapshot()["counters"].get(name, 0)
+
+
+def test_compile_schema():
+    validate = compile_schema({
+        "type": "object",
+        "required": ["a", "b"],
+        "properties": {"a": {"type": "string", "minLength": 1}, "n": {"type": "number"}},
+    })
+    assert validate({"a": "x", "b": None, "n": 2.5}) == []
+    assert validate(["a"]) == ["expected object"]
+    assert validate({"a": "x"}) == ["missing b"]
+    assert validate({"a": "  ", "b": 1}) == ["a: empty"]
+    assert validate({"a": 1, "b": 1, "n": "2"}) == ["a: wrong type", "n: wrong type"]
+
+
+def test_parse_json_insights():
+    assert parse_json_insights(json.dumps(VALID)) == VALID
+    padded = {**VALID, "explanations": "  spaced  ", "extra": 1}
+    assert parse_json_insights(json.dumps(padded))["explanations"] == "spaced"
+    assert parse_json_insights("```json\n" + json.dumps(VALID) + "\n```") == VALID
+
+    for bad in (None, "", "a || b || c || d", "{not json", json.dumps([VALID]),
+                json.dumps({**VALID, "pricingRationale": ""}),
+                json.dumps({**VALID, "explanations": ["list"]}),
+                json.dumps({k: v for k, v in VALID.items() if k != "improvementSuggestions"})):
+        assert parse_json_insights(bad) is None, bad
+
+
+def test_repair_retry_recovers():
+    retries = counter("ai_json_repair_retries")
+    engine = json_engine(["not json", json.dumps(VALID)] * 2)
+    with stub_ai(), patched(ai_engine, AI_OUTPUT_MODE="json"):
+        results = generate_both(engine)
+
+    assert [json.loads(r) for r in results] == [VALID, VALID]
+    for client in (engine.client, engine._async_client):
+        assert len(client.prompts) == 2 and client.prompts[1] == JSON_REPAIR_PROMPT
+    assert counter("ai_json_repair_retries") == retries + 2
+
+
+def test_valid_reply_needs_no_repair():
+    engine = json_engine([json.dumps(VALID)] * 2)
+    with stub_ai(), patched(ai_engine, AI_OUTPUT_MODE="json"):
+        assert [json.loads(r) for r in generate_both(engine)] == [VALID, VALID]
+    assert len(engine.client.prompts) == len(engine._async_client.prompts) == 1
+
+
+def test_failed_repair_raises():
+    engine = json_engine(["not json", json.dumps({"driverRiskFactors": "only one"})] * 2)
+    with stub_ai(), patched(ai_engine, AI_OUTPUT_MODE="json"):
+        results = generate_both(engine)
+    assert all(isinstance(r, InvalidAIOutput) for r in results), results
+    # One repair attempt only
+    assert len(engine.client.prompts) == len(engine._async_client.prompts) == 2
+
+
+def test_invalid_output_serves_fallback_insights():
+    async def run_async():
+        try:
+            return await process_data_async(payload())
+        finally:
+            await shutdown_ai_engine()
+
+    with stub_ai(malformed_rate=1.0) as server, patched(ai_engine, AI_OUTPUT_MODE="json"):
+        with contextlib.redirect_stdout(io.StringIO()):
+            decisions = [process_data(payload()), asyncio.run(run_async())]
+        assert server.stats.requests == 4
+
+    for decision in decisions:
+        assert decision["aiInsightsMeta"] == {"source": "fallback", "fallback": True, "reason": "invalid_output"}
+        assert decision["aiInsights"] and "Stub reply" not in json.dumps(decision["aiInsights"])
+
+
+if __name__ == "__main__":
+    test_compile_schema()
+    test_parse_json_insights()
+    test_repair_retry_recovers()
+    test_valid_reply_needs_no_repair()
+    test_failed_repair_raises()
+    test_invalid_output_serves_fallback_insights()
+    print("RESULT: JSON output validation, repair and fallback OK")
@@ -0,0 +1,46 @@
+# /receive/batch: every item gets its own NDJSON line, and a bad item
+# becomes an error entry without failing the rest of the batch.
+
+import contextlib
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+from test_ai_engine import payload, stub_ai
+from main import app
+
+
+def test_bad_items_do_not_fail_the_batch():
+    lines = [
+        json.dumps({"data": payload(0)}),
+        "{not json",
+        json.dumps(["not", "an", "object"]),
+        json.dumps(payload(3)),
+        json.dumps({"data": {"customer": {"age": 40}, "coverage": "not a dict"}}),
+        json.dumps({"data": payload(5)}),
+    ]
+
+    with stub_ai(), contextlib.redirect_stdout(io.StringIO()):
+        response = TestClient(app).post(
+            "/receive/batch",
+            content="\n".join(lines),
+            headers={"content-type": "application/x-ndjson"},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda r: r["index"])
+
+    assert [r["index"] for r in results] == list(range(len(lines)))
+    assert [r["status"] for r in results] == ["ok", "error", "error", "ok", "error", "ok"]
+    assert results[1]["error"].startswith("Invalid JSON line")
+    assert results[2]["error"] == "Each batch item must be a JSON object"
+    for r in (results[0], results[3], results[5]):
+        assert r["result"]["aiInsightsMeta"]["source"] == "llm"
+    assert results[3]["result"]["customer"] != results[0]["result"]["customer"]
+
+
+if __name__ == "__main__":
+    test_bad_items_do_not_fail_the_batch()
+    print("RESULT: batch items fail independently")
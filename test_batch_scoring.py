@@ -0,0 +1,101 @@
+# Property test: calculate_risk_scores must equal calculate_risk_score for
+# every row, across randomized submissions that hit every band edge.
+
+import contextlib
+import io
+import random
+
+import numpy as np
+
+from app.normalizer.columnar import normalize_columnar
+from app.normalizer.normalizer import normalize_records
+from app.services.underwriting_engine import calculate_risk_score, calculate_risk_scores, risk_score_columns
+from app.services.vehicle_classifier import get_vehicle_classifier
+
+AGES = [None, 0, 16, 17, 18, 20, 20.5, 21, 24, 24.5, 25, 70, 70.5, 71, 75, 76, 99, -3]
+COUNTS = [0, 1, 2, 3, 4, 10, 1.0, 2.5, True, False]
+MILEAGES = [None, 0, 1, 7500, 7501, 15000, 15001, 20000, 20001, 99999, -5, 7500.5]
+MODELS = [None, "", "Civic", "CR-V Touring", "Mustang GT", "Civic Mustang", "pilot", "F-150", "Corvette"]
+YEARS = [None, 0, 1990, 2009, 2010, 2011, 2025, 2030, "2005", "2015", 2009.9]
+COVERAGE_TYPES = [None, "Liability", "LIABILITY", "Full", "liability only"]
+LIMITS = [0, 250000, 250001, 300000, 1e6, 100000.5]
+DEDUCTIBLES = [0, 250, 499, 499.99, 500, 1000]
+ZIPS = [None, "", 0, "5", "50010", "51000", "52999", "53000", "60601", "62000", "63000", 50010, "9"]
+STATES = [None, "", "FL", "LA", "MI", "NY", "IA", "ND", "SD", "VT", "CA", "fl"]
+
+
+def random_payload(rng):
+    payload = {
+        "customer": {"age": rng.choice(AGES), "address": {"zip": rng.choice(ZIPS)}},
+        "coverage": {
+            "coverageType": rng.choice(COVERAGE_TYPES),
+            "liabilityLimit": rng.choice(LIMITS),
+            "deductible": rng.choice(DEDUCTIBLES),
+        },
+        "guidewire": {"state": rng.choice(STATES)},
+    }
+    if rng.random() < 0.9:
+        driver = {"accidents": rng.choice(COUNTS), "violations": rng.choice(COUNTS)}
+        if rng.random() < 0.3:
+            driver["majorViolation"] = rng.choice([True, False, 1, 0, "yes"])
+        payload["drivers"] = [driver, {"accidents": 3}]
+    if rng.random() < 0.9:
+        payload["vehicles"] = [{
+            "model": rng.choice(MODELS),
+            "year": rng.choice(YEARS),
+            "annualMileage": rng.choice(MILEAGES),
+        }]
+    return payload
+
+
+def scalar_scores(submissions):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [calculate_risk_score(*s) for s in submissions]
+
+
+def test_vectorized_matches_scalar():
+    rng = random.Random(22)
+    submissions = []
+    for _ in range(20000):
+        records = normalize_records(random_payload(rng))
+        submissions.append((records["customer"], records["drivers"], records["vehicles"],
+                            records["coverage"], records["guidewire"]))
+
+    vectorized = calculate_risk_scores(**risk_score_columns(submissions))
+    assert vectorized.dtype == np.int64
+    assert vectorized.tolist() == scalar_scores(submissions)
+
+
+def test_string_column_inputs():
+    batch = normalize_columnar([
+        {"coverage": {"coverageType": "Liability"}, "customer": {"address": {"state": "FL"}}},
+        {"coverage": {"coverageType": "Full"}, "customer": {"address": {"state": "IA"}}},
+        {"coverage": {"coverageType": "Full"}},
+    ])
+    n = len(batch)
+    scores = calculate_risk_scores(
+        age=np.full(n, np.nan), accidents=np.zeros(n), violations=np.zeros(n),
+        major_violation=np.zeros(n, bool), annual_mileage=np.full(n, np.nan), model_class=np.zeros(n, np.int64),
+        year=np.full(n, np.nan), coverage_type=batch.submissions["coverageType"],
+        liability_limit=np.zeros(n), deductible=np.full(n, 500.0), zip_code=[""] * n,
+        state=batch.submissions["state"],
+    )
+    assert scores.tolist() == [700 + 10 - 20, 700 - 20 + 10, 700 - 20]
+
+
+def test_model_class_flags():
+    classifier = get_vehicle_classifier()
+    scores = calculate_risk_scores(
+        age=[np.nan] * 2, accidents=[0, 0], violations=[0, 0], major_violation=[False, False],
+        annual_mileage=[np.nan] * 2, model_class=[classifier.classify(model="Civic Mustang"), 0],
+        year=[np.nan] * 2, coverage_type=["Liability"] * 2, liability_limit=[0, 0], deductible=[500, 500],
+        zip_code=["", ""], state=["", ""],
+    )
+    assert scores.tolist() == [710 + 20 - 80, 710]
+
+
+if __name__ == "__main__":
+    test_vectorized_matches_scalar()
+    test_string_column_inputs()
+    test_model_class_flags()
+    print("RESULT: vectorized scores match calculate_risk_score")
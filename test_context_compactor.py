@@ -0,0 +1,122 @@
+# Context compaction: the serialized context stays within the token budget
+# while keeping the fields every prompt needs, and the savings are reported
+# as metrics counters.
+
+import contextlib
+import io
+import json
+import os
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+
+from app.config import AI_CONTEXT_TOKEN_BUDGET
+from app.metrics import snapshot
+from app.processor.ai_engine import get_ai_engine
+from app.processor.context_compactor import (
+    OPTIONAL_FIELDS,
+    build_compact_context,
+    compact_context,
+    estimate_tokens,
+    fit_to_budget,
+)
+
+REQUIRED_DRIVER_FIELDS = ("firstName", "age", "accidents", "violations")
+REQUIRED_VEHICLE_FIELDS = ("year", "make", "model", "annualMileage")
+
+
+def large_context(drivers=40, vehicles=40):
+    return {
+        "customer": {
+            "firstName": "Jane", "lastName": "Doe", "age": 41, "licenseNumber": "D1234567",
+            "address": {"street": "1 Main St", "city": "Des Moines", "state": "IA", "zip": "50309"},
+            "raw": {"everything": "x" * 2000},
+        },
+        "coverage": {
+            "coverageType": "Full", "liabilityLimit": 300000, "deductible": 500,
+            "raw": {"everything": "y" * 2000},
+        },
+        "drivers": [
+            {
+                "raw": {"driverId": f"DRV-{i}", "firstName": f"Driver{i}", "yearsLicensed": 12, "claims": 1,
+                        "notes": "n" * 300},
+                "normalized": {"firstName": f"Driver{i}", "age": 20 + i, "accidents": i % 3, "violations": i % 2},
+            }
+            for i in range(drivers)
+        ],
+        "vehicles": [
+            {
+                "raw": {"vehicleId": f"VEH-{i}", "vin": "V" * 17, "usage": "Commute"},
+                "normalized": {"year": 2010 + i % 12, "make": "Honda", "model": "Civic", "annualMileage": 12000},
+            }
+            for i in range(vehicles)
+        ],
+    }
+
+
+def test_fits_default_budget_and_keeps_required_fields():
+    text, stats = compact_context(large_context(), "multi_driver_multi_vehicle", AI_CONTEXT_TOKEN_BUDGET)
+    assert estimate_tokens(text) <= AI_CONTEXT_TOKEN_BUDGET
+    assert stats["tokensAfter"] == estimate_tokens(text) < stats["tokensBefore"]
+
+    compact = json.loads(text)
+    assert compact["customer"]["age"] == 41
+    assert compact["customer"]["address"]["zip"] == "50309"
+    assert compact["coverage"] == {"coverageType": "Full", "liabilityLimit": 300000, "deductible": 500}
+    assert compact["drivers"] and compact["vehicles"]
+    for d in compact["drivers"]:
+        assert all(f in d for f in REQUIRED_DRIVER_FIELDS), d
+    for v in compact["vehicles"]:
+        assert all(f in v for f in REQUIRED_VEHICLE_FIELDS), v
+
+    # Trimmed entries are counted, and kept entries are the leading ones
+    assert len(compact["drivers"]) + compact.get("omittedDrivers", 0) == 40
+    assert len(compact["vehicles"]) + compact["omittedVehicles"] == 40
+    assert compact["drivers"][0]["firstName"] == "Driver0"
+
+
+def test_budget_sweep():
+    for budget in (150, 300, 600, 1000, AI_CONTEXT_TOKEN_BUDGET, 4000):
+        text = fit_to_budget(build_compact_context(large_context(), "simple"), budget)
+        compact = json.loads(text)
+        assert estimate_tokens(text) <= budget, budget
+        assert compact["drivers"] and compact["vehicles"]
+        assert "raw" not in compact["customer"] and "raw" not in compact["coverage"]
+        if "omittedDrivers" in compact or "omittedVehicles" in compact:
+            # Optional fields go before any list entry does
+            assert not any(f in d for d in compact["drivers"] for f in OPTIONAL_FIELDS)
+
+
+def test_small_context_is_untouched():
+    context = large_context(drivers=1, vehicles=1)
+    compact = build_compact_context(context, "simple")
+    text = fit_to_budget(build_compact_context(context, "simple"), AI_CONTEXT_TOKEN_BUDGET)
+    assert json.loads(text) == compact
+    assert json.loads(text)["drivers"][0]["driverId"] == "DRV-0"
+
+
+def test_savings_are_counted_not_printed():
+    names = ("compactions", "tokens_before", "tokens_after", "tokens_saved")
+    before = {n: snapshot()["counters"].get(f"ai_context_{n}", 0) for n in names}
+
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        text = get_ai_engine().serialize_context(large_context(), "multi_driver_multi_vehicle")
+    _, stats = compact_context(large_context(), "multi_driver_multi_vehicle", AI_CONTEXT_TOKEN_BUDGET)
+
+    after = {n: snapshot()["counters"][f"ai_context_{n}"] - before[n] for n in names}
+    assert out.getvalue() == ""
+    assert estimate_tokens(text) == stats["tokensAfter"]
+    assert after == {
+        "compactions": 2,
+        "tokens_before": 2 * stats["tokensBefore"],
+        "tokens_after": 2 * stats["tokensAfter"],
+        "tokens_saved": 2 * stats["tokensSaved"],
+    }
+
+
+if __name__ == "__main__":
+    test_fits_default_budget_and_keeps_required_fields()
+    test_budget_sweep()
+    test_small_context_is_untouched()
+    test_savings_are_counted_not_printed()
+    print("RESULT: compact context fits the token budget")
@@ -0,0 +1,181 @@
+# score_fleet: per-vehicle scores must equal calculate_risk_score run on
+# each (assigned driver, vehicle) pair, aggregated per vehicle.
+
+import contextlib
+import io
+import json
+import random
+
+from app.models.records import json_default
+from app.normalizer.normalizer import normalize_records
+from app.processor.processor import process_data
+from app.services.underwriting_engine import (
+    active_rating_table,
+    build_underwriting_details,
+    calculate_risk_score,
+    score_fleet,
+)
+from test_ai_engine import stub_ai
+
+
+def sections(payload):
+    records = normalize_records(payload)
+    return records["customer"], records["drivers"], records["vehicles"], records["coverage"], records["guidewire"]
+
+
+def pair_score(customer, driver, vehicle, coverage, guidewire):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return calculate_risk_score(customer, [driver], [vehicle], coverage, guidewire)
+
+
+def random_fleet(rng, vehicle_count, driver_count):
+    vehicles = [
+        {
+            "vin": f"VIN{i}",
+            "model": rng.choice(["Civic", "Mustang", "Pilot", "F-150"]),
+            "year": rng.choice([2005, 2015, 2022]),
+            "annualMileage": rng.choice([5000, 12000, 18000, 30000]),
+        }
+        for i in range(vehicle_count)
+    ]
+    drivers = []
+    for _ in range(driver_count):
+        assigned = rng.sample(range(vehicle_count), rng.randint(0, min(4, vehicle_count)))
+        drivers.append({
+            "accidents": rng.randint(0, 3),
+            "violations": rng.randint(0, 3),
+            "majorViolation": rng.random() < 0.1,
+            "assignedVehicles": [
+                {"vehicleId": f"VIN{i}", "exposure": rng.choice([0.25, 0.5, 1])} if rng.random() < 0.5 else f"VIN{i}"
+                for i in assigned
+            ],
+        })
+    return {
+        "customer": {"age": rng.choice([19, 30, 80]), "address": {"zip": rng.choice(["50010", "90210"])}},
+        "drivers": drivers,
+        "vehicles": vehicles,
+        "coverage": {"coverageType": "Full", "liabilityLimit": 100000, "deductible": 500},
+        "guidewire": {"state": rng.choice(["IA", "FL", "CA"])},
+    }
+
+
+def expected_scores(payload, aggregation):
+    customer, drivers, vehicles, coverage, guidewire = sections(payload)
+    pairs = {i: [] for i in range(len(vehicles))}
+    for d in drivers:
+        for entry in d.raw.get("assignedVehicles", []):
+            vin = entry["vehicleId"] if isinstance(entry, dict) else entry
+            exposure = entry.get("exposure", 1) if isinstance(entry, dict) else 1
+            i = int(vin[3:])
+            pairs[i].append((pair_score(customer, d, vehicles[i], coverage, guidewire), exposure))
+
+    scores = []
+    for i, vehicle in enumerate(vehicles):
+        if not pairs[i]:
+            scores.append(pair_score(customer, drivers[0], vehicle, coverage, guidewire))
+        elif aggregation == "max":
+            scores.append(min(s for s, _ in pairs[i]))
+        else:
+            scores.append(round(sum(s * w for s, w in pairs[i]) / sum(w for _, w in pairs[i])))
+    return scores
+
+
+def test_matches_pairwise_scalar():
+    rng = random.Random(23)
+    for _ in range(300):
+        payload = random_fleet(rng, rng.randint(1, 8), rng.randint(1, 6))
+        for aggregation in ("max", "exposure_mean"):
+            fleet = score_fleet(*sections(payload), aggregation=aggregation)
+            assert fleet["scores"] == expected_scores(payload, aggregation)
+
+
+def test_unassigned_policy_matches_policy_score():
+    payload = random_fleet(random.Random(1), 3, 2)
+    for d in payload["drivers"]:
+        d.pop("assignedVehicles")
+    records = sections(payload)
+    with contextlib.redirect_stdout(io.StringIO()):
+        policy_score = calculate_risk_score(*records)
+    assert score_fleet(*records)["scores"][0] == policy_score
+
+    # No drivers at all: vehicles are rated on policy + vehicle factors
+    payload.pop("drivers")
+    assert len(score_fleet(*sections(payload))["scores"]) == 3
+
+
+def test_premiums_and_details():
+    payload = {
+        "drivers": [
+            {"accidents": 0, "assignedVehicles": ["A"]},
+            {"accidents": 3, "assignedVehicles": ["B"]},
+        ],
+        "vehicles": [{"vin": "A"}, {"vin": "B"}, {"vehicleId": "C"}],
+        "coverage": {"coverageType": "Liability", "liabilityLimit": 100000, "deductible": 500},
+    }
+    customer, drivers, vehicles, coverage, guidewire = sections(payload)
+    fleet = score_fleet(customer, drivers, vehicles, coverage, guidewire, base_premium=1000)
+    assert fleet["scores"] == [710, 510, 710]
+    assert fleet["premiums"] == [round(1000 * 700 / 710, 2), round(1000 * 700 / 510, 2), round(1000 * 700 / 710, 2)]
+    assert score_fleet(customer, drivers, vehicles, coverage, guidewire)["premiums"] == [None] * 3
+
+    details = json.loads(json.dumps(
+        build_underwriting_details(drivers, vehicles, 710, 1000, fleet), default=json_default
+    ))
+    assert [v["riskScore"] for v in details["vehicles"]] == [710, 510, 710]
+    assert details["vehicles"][1]["premium"] == fleet["premiums"][1]
+
+    try:
+        score_fleet(customer, drivers, vehicles, coverage, guidewire, aggregation="mean")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown aggregation accepted")
+
+
+def test_exposure_values_are_coerced():
+    payload = {
+        "drivers": [
+            {"accidents": 0, "assignedVehicles": [{"vin": "A", "exposure": "0.5"}, {"vin": "B", "exposure": "abc"}]},
+            {"accidents": 3, "assignedVehicles": [{"vin": "A", "exposure": 0.5}, {"vin": "B", "exposure": None}]},
+            {"accidents": 3, "assignedVehicles": [{"vin": "B", "exposure": -1}, {"vin": "C", "exposure": "nan"}]},
+        ],
+        "vehicles": [{"vin": "A"}, {"vin": "B"}, {"vin": "C"}],
+        "coverage": {"coverageType": "Liability", "liabilityLimit": 100000, "deductible": 500},
+    }
+    fleet = score_fleet(*sections(payload), aggregation="exposure_mean")
+    # A: "0.5" weighs like 0.5; B and C: no usable exposure, rated with the first driver
+    assert fleet["scores"] == [610, 710, 710]
+
+
+def test_process_data_prices_every_vehicle():
+    table = active_rating_table()
+    coverage = {"coverageType": "Liability", "liabilityLimit": 100000, "deductible": 500}
+    fleet_payload = {
+        "customer": {"firstName": "Fleet"},
+        "drivers": [
+            {"firstName": "Ann", "accidents": 0, "assignedVehicles": ["A"]},
+            {"firstName": "Bo", "accidents": 3, "assignedVehicles": ["B"]},
+        ],
+        "vehicles": [{"vin": "A"}, {"vin": "B"}],
+    }
+    # coverage.basePremium, and the pricing.base aliases when it is absent
+    for payload, base in (
+        (dict(fleet_payload, coverage=dict(coverage, basePremium=1000)), 1000),
+        (dict(fleet_payload, coverage=coverage, pricing={"base": 800}), 800),
+        (dict(fleet_payload, coverage=coverage, basePremium="900"), 900),
+    ):
+        with stub_ai(), contextlib.redirect_stdout(io.StringIO()):
+            decision = json.loads(json.dumps(process_data(payload), default=json_default))
+        rows = decision["underwriting"]["details"]["vehicles"]
+        assert [r["riskScore"] for r in rows] == [710, 510]
+        assert [r["premium"] for r in rows] == [table.premium(base, 710), table.premium(base, 510)]
+        assert None not in [r["premium"] for r in rows]
+
+
+if __name__ == "__main__":
+    test_matches_pairwise_scalar()
+    test_unassigned_policy_matches_policy_score()
+    test_premiums_and_details()
+    test_exposure_values_are_coerced()
+    test_process_data_prices_every_vehicle()
+    print("RESULT: fleet scores match pairwise calculate_risk_score")
@@ -0,0 +1,126 @@
+# groq_stub: answers in the formats the engine parses (delimited, batch,
+# JSON, SSE stream), and injects errors, throttling, malformed replies and
+# latency as configured.
+
+import json
+import time
+
+import httpx
+
+from app.processor.ai_engine import split_batch_output
+from app.processor.ai_insights import InsightStreamParser, is_well_formed, parse_json_insights
+from groq_stub import parse_latency, start_stub_server
+
+PATH = "/openai/v1/chat/completions"
+
+
+def post(server, body):
+    return httpx.post(server.base_url + PATH, json=body, timeout=10)
+
+
+def chat(content, **extra):
+    return {"model": "stub", "messages": [{"role": "user", "content": content}], **extra}
+
+
+def reply(response):
+    return response.json()["choices"][0]["message"]["content"]
+
+
+def test_answers_are_deterministic_and_well_formed():
+    server = start_stub_server()
+    try:
+        first = reply(post(server, chat("context A")))
+        assert reply(post(server, chat("context A"))) == first
+        assert reply(post(server, chat("context B"))) != first
+        assert is_well_formed(first)
+
+        batch = reply(post(server, chat("### ITEM 1\ncontext A\n### ITEM 2\ncontext B")))
+        answers = split_batch_output(batch)
+        assert sorted(answers) == [1, 2]
+        assert all(is_well_formed(a) for a in answers.values())
+
+        structured = reply(post(server, chat("context A", response_format={"type": "json_object"})))
+        assert parse_json_insights(structured) is not None
+
+        assert post(server, {"messages": []}).status_code == 200
+        assert httpx.post(server.base_url + "/v1/other", json={}).status_code == 404
+        assert server.stats.requests == 6
+    finally:
+        server.shutdown()
+
+
+def test_stream_matches_the_plain_answer():
+    server = start_stub_server()
+    try:
+        plain = reply(post(server, chat("context A")))
+        with httpx.stream("POST", server.base_url + PATH, json=chat("context A", stream=True)) as response:
+            assert response.headers["content-type"] == "text/event-stream"
+            data = [line[len("data: "):] for line in response.iter_lines() if line.startswith("data: ")]
+    finally:
+        server.shutdown()
+
+    assert data[-1] == "[DONE]"
+    chunks = [json.loads(d) for d in data[:-1]]
+    assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+
+    parser = InsightStreamParser()
+    for c in chunks:
+        parser.feed(c["choices"][0]["delta"].get("content") or "")
+    assert parser.text == plain
+    assert len(parser.finish()) == 1 and parser.index == 4
+
+
+def test_fault_injection():
+    server = start_stub_server(error_rate=1.0)
+    try:
+        response = post(server, chat("x"))
+        assert response.status_code == 500
+        assert response.json()["error"]["type"] == "internal_server_error"
+    finally:
+        server.shutdown()
+
+    server = start_stub_server(throttle_rate=1.0)
+    try:
+        response = post(server, chat("x"))
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "1"
+        assert server.stats.in_flight == 0
+    finally:
+        server.shutdown()
+
+    server = start_stub_server(malformed_rate=1.0)
+    try:
+        assert not is_well_formed(reply(post(server, chat("x"))))
+    finally:
+        server.shutdown()
+
+    server = start_stub_server(latency="fixed:200")
+    try:
+        start = time.perf_counter()
+        post(server, chat("x"))
+        assert time.perf_counter() - start >= 0.2
+    finally:
+        server.shutdown()
+
+
+def test_latency_distributions():
+    assert parse_latency("fixed:250")() == 0.25
+    assert all(0.1 <= parse_latency("uniform:100:200")() <= 0.2 for _ in range(100))
+    assert all(parse_latency("normal:100:500")() >= 0 for _ in range(100))
+    assert all(parse_latency("lognormal:100:0.5")() > 0 for _ in range(100))
+    cycle = parse_latency("cycle:10:20")
+    assert [cycle() for _ in range(3)] == [0.01, 0.02, 0.01]
+    try:
+        parse_latency("pareto:1")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown distribution accepted")
+
+
+if __name__ == "__main__":
+    test_answers_are_deterministic_and_well_formed()
+    test_stream_matches_the_plain_answer()
+    test_fault_injection()
+    test_latency_distributions()
+    print("RESULT: Groq stub formats and fault injection OK")
@@ -0,0 +1,166 @@
+# Insight cache: byte accounting and LRU order of the memory tier, TTL
+# expiry in both tiers, promotion of SQLite hits into memory, and the AI
+# engine caching well-formed replies only; the async path keeps SQLite off
+# the event loop thread.
+
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+
+from app.metrics import snapshot
+from app.processor import ai_engine
+from app.processor.ai_engine import get_ai_engine, shutdown_ai_engine
+from app.processor.insight_cache import InsightCache, MemoryLRU, SQLiteTier, make_cache_key
+from test_ai_engine import context, patched, stub_ai
+
+
+def stored_bytes(tier):
+    return tier._db.execute("SELECT COALESCE(SUM(size), 0) FROM insights").fetchone()[0]
+
+
+def test_memory_lru_byte_accounting():
+    lru = MemoryLRU(max_bytes=100, ttl_seconds=60)
+    lru.set("a", "x" * 29)
+    lru.set("b", "y" * 29)
+    lru.set("c", "z" * 29)
+    assert lru.size == 90
+
+    # Overwrite replaces the old cost
+    lru.set("b", "y" * 9)
+    assert lru.size == 70
+
+    # "a" becomes most recently used, so "c" is evicted next
+    assert lru.get("a") == "x" * 29
+    lru.set("d", "w" * 39)
+    assert lru.get("c") is None
+    assert [k for k in lru._items] == ["b", "a", "d"]
+    assert lru.size == 10 + 30 + 40
+
+    # Larger than the whole budget: not stored, nothing evicted
+    lru.set("e", "v" * 100)
+    assert lru.get("e") is None and lru.size == 80
+
+    lru.clear()
+    assert lru.size == 0 and lru.get("a") is None
+
+
+def test_ttl_expiry():
+    lru = MemoryLRU(max_bytes=1000, ttl_seconds=60)
+    lru.set("old", "value", expires_at=time.time() - 1)
+    lru.set("new", "value")
+    assert lru.get("old") is None
+    assert lru.get("new") == "value"
+    assert lru.size == len("new") + len("value")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tier = SQLiteTier(os.path.join(tmp, "cache.db"), max_bytes=1000, ttl_seconds=-1)
+        tier.set("old", "value")
+        assert tier.size == 8
+        assert tier.get("old") is None
+        assert tier.size == 0 == stored_bytes(tier)
+
+
+def test_sqlite_running_total_and_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.db")
+        tier = SQLiteTier(path, max_bytes=1000, ttl_seconds=60)
+        for i in range(30):
+            tier.set(f"key{i:02d}", "v" * 95)
+            assert tier.size == stored_bytes(tier) <= 1000
+        tier.set("key29", "v" * 45)
+        assert tier.size == stored_bytes(tier)
+
+        # Least recently used rows went first
+        assert tier.get("key00") is None
+        assert tier.get("key29") is not None
+
+        # A second worker on the same file starts from the stored total
+        assert SQLiteTier(path, max_bytes=1000, ttl_seconds=60).size == tier.size
+
+        tier.clear()
+        assert tier.size == 0 == stored_bytes(tier)
+
+
+def test_sqlite_hits_are_promoted_to_memory():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = InsightCache(max_bytes=1000, ttl_seconds=60, sqlite_path=os.path.join(tmp, "cache.db"))
+        cache.set("key", "a || b || c || d")
+        _, expires_at = cache.disk.get("key")
+
+        cache.memory.clear()
+        before = snapshot()["counters"]
+        assert cache.get("key") == "a || b || c || d"
+        assert cache.get("key") == "a || b || c || d"
+        after = snapshot()["counters"]
+
+        assert after["insight_cache_disk_hits"] - before.get("insight_cache_disk_hits", 0) == 1
+        assert after["insight_cache_memory_hits"] - before.get("insight_cache_memory_hits", 0) == 1
+        # The promoted copy keeps the disk entry's expiry
+        assert cache.memory._items["key"][0] == expires_at
+
+
+def test_only_well_formed_replies_are_cached():
+    cache = InsightCache(max_bytes=100000, ttl_seconds=60, sqlite_path=None)
+    key = make_cache_key(os.getenv("GROQ_MODEL"), context(), "delimited")
+
+    with stub_ai(malformed_rate=1.0) as server, patched(ai_engine, get_insight_cache=lambda: cache):
+        with contextlib.redirect_stdout(io.StringIO()):
+            get_ai_engine().generate_insights(context())
+            get_ai_engine().generate_insights(context())
+        assert server.stats.requests == 2
+        assert cache.memory.get(key) is None
+
+    with stub_ai() as server, patched(ai_engine, get_insight_cache=lambda: cache):
+        with contextlib.redirect_stdout(io.StringIO()):
+            first = get_ai_engine().generate_insights(context())
+            assert get_ai_engine().generate_insights(context()) == first
+        assert server.stats.requests == 1
+        assert cache.memory.get(key) == first
+
+
+def test_async_path_runs_sqlite_in_worker_threads():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = InsightCache(max_bytes=100000, ttl_seconds=60, sqlite_path=os.path.join(tmp, "cache.db"))
+        threads = []
+
+        def recorded(method):
+            def call(*args):
+                threads.append(threading.get_ident())
+                return method(*args)
+            return call
+
+        cache.disk.get = recorded(cache.disk.get)
+        cache.disk.set = recorded(cache.disk.set)
+
+        async def run():
+            try:
+                first = await get_ai_engine().agenerate_insights(context())
+                cache.memory.clear()
+                return first, await get_ai_engine().agenerate_insights(context())
+            finally:
+                await shutdown_ai_engine()
+
+        before = snapshot()["counters"].get("insight_cache_disk_hits", 0)
+        with stub_ai() as server, patched(ai_engine, get_insight_cache=lambda: cache):
+            with contextlib.redirect_stdout(io.StringIO()):
+                first, second = asyncio.run(run())
+
+        assert first == second and server.stats.requests == 1
+        assert snapshot()["counters"]["insight_cache_disk_hits"] == before + 1
+        # miss lookup, write, disk hit - none on the event loop thread
+        assert len(threads) == 3
+        assert threading.get_ident() not in threads
+
+
+if __name__ == "__main__":
+    test_memory_lru_byte_accounting()
+    test_ttl_expiry()
+    test_sqlite_running_total_and_eviction()
+    test_sqlite_hits_are_promoted_to_memory()
+    test_only_well_formed_replies_are_cached()
+    test_async_path_runs_sqlite_in_worker_threads()
+    print("RESULT: insight cache accounting, expiry and promotion OK")
@@ -0,0 +1,184 @@
+# Streaming insights: the incremental '||' parser under arbitrary chunk
+# splits, and the /receive/stream event sequence for a complete stream, a
+# stream that fails before any insight, and one that fails midway. A slow
+# SSE client must not eat into the model's latency budget, and a budget
+# that runs out while the client is reading still ends in discard +
+# fallback decision.
+
+import asyncio
+import contextlib
+import io
+import json
+import random
+
+from fastapi.testclient import TestClient
+
+from app.metrics import snapshot
+from app.processor import ai_engine, decision_builder
+from app.processor.ai_insights import AI_FIELDS, InsightStreamParser, parse_ai_output
+from app.processor.processor import process_data_stream
+from test_ai_engine import patched, payload, stub_ai
+from main import app
+
+ANSWER = "Young driver, one accident || Base rate plus surcharge || Score 640 || Take a defensive driving course"
+
+
+def parse_in_chunks(chunks):
+    parser = InsightStreamParser()
+    fields = []
+    for chunk in chunks:
+        fields.extend(parser.feed(chunk))
+    return fields + parser.finish(), parser.text
+
+
+def test_parser_handles_any_chunk_split():
+    expected = list(parse_ai_output(ANSWER).items())
+    assert parse_in_chunks([ANSWER]) == (expected, ANSWER)
+    assert parse_in_chunks(list(ANSWER)) == (expected, ANSWER)
+
+    # Delimiter split across chunks: "... |" + "| ..."
+    cut = ANSWER.index("||") + 1
+    assert parse_in_chunks([ANSWER[:cut], ANSWER[cut:]])[0] == expected
+
+    rng = random.Random(12)
+    for _ in range(500):
+        cuts = sorted(rng.sample(range(1, len(ANSWER)), rng.randint(1, 20)))
+        chunks = [ANSWER[a:b] for a, b in zip([0] + cuts, cuts + [len(ANSWER)])]
+        assert parse_in_chunks(chunks) == (expected, ANSWER)
+
+
+def test_parser_emits_each_field_once_its_delimiter_arrives():
+    parser = InsightStreamParser()
+    assert parser.feed("risk |") == []
+    assert parser.feed("| pricing") == [("driverRiskFactors", "risk")]
+    assert parser.feed(" || expl || impr || extra") == [("pricingRationale", "pricing"), ("explanations", "expl")]
+    # A fifth field stays in the last one, as parse_ai_output cannot split it either
+    assert parser.finish() == [("improvementSuggestions", "impr || extra")]
+    assert parser.finish() == []
+
+
+def sse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def post_stream():
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = TestClient(app).post("/receive/stream", json={"data": payload()})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return sse_events(response.text)
+
+
+class BrokenStreamEngine:
+    """
+    Engine stand-in whose stream sends `text` and then fails.
+    """
+
+    def __init__(self, text):
+        self.text = text
+
+    async def astream_insights(self, underwriting_context):
+        for word in self.text.split(" "):
+            yield word + " "
+        raise ConnectionError("stream dropped")
+
+
+def test_stream_event_sequence():
+    with stub_ai():
+        events = post_stream()
+
+    assert [e for e, _ in events] == ["insight"] * 4 + ["decision"]
+    assert [d["field"] for _, d in events[:4]] == list(AI_FIELDS)
+    decision = events[-1][1]
+    assert decision["aiInsightsMeta"]["source"] == "llm"
+    assert {d["field"]: d["value"] for _, d in events[:4]} == decision["aiInsights"]
+
+
+def test_failure_before_any_insight_falls_back():
+    with patched(ai_engine, _engine=BrokenStreamEngine("no delimiter yet")):
+        events = post_stream()
+
+    assert [e for e, _ in events] == ["decision"]
+    assert events[0][1]["aiInsightsMeta"] == {"source": "fallback", "fallback": True, "reason": "error"}
+
+
+def test_failure_mid_stream_discards_sent_insights():
+    with patched(ai_engine, _engine=BrokenStreamEngine("risk || pricing || partial")):
+        events = post_stream()
+
+    assert [e for e, _ in events] == ["insight", "insight", "discard", "decision"]
+    assert events[2][1] == {"fields": ["driverRiskFactors", "pricingRationale"], "reason": "error"}
+    decision = events[3][1]
+    assert decision["aiInsightsMeta"]["fallback"] is True
+    assert decision["aiInsights"]["driverRiskFactors"] != "risk"
+
+
+class PacedStreamEngine:
+    """
+    Engine stand-in that sends `text` word by word, then waits `hang`
+    seconds before ending the stream.
+    """
+
+    def __init__(self, text, hang=0.0):
+        self.text = text
+        self.hang = hang
+
+    async def astream_insights(self, underwriting_context):
+        for word in self.text.split(" "):
+            yield word + " "
+        await asyncio.sleep(self.hang)
+
+
+def read_slowly(engine, delay, budget):
+    async def run():
+        events = []
+        async for event in process_data_stream(payload()):
+            events.append(event)
+            await asyncio.sleep(delay)
+        return events
+
+    with patched(ai_engine, _engine=engine), patched(decision_builder, AI_LATENCY_BUDGET_SECONDS=budget):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return asyncio.run(run())
+
+
+def llm_call_stats():
+    stage = snapshot()["stages"].get("llm_call", {"count": 0, "sum": 0.0})
+    return stage["count"], stage["sum"]
+
+
+def test_slow_client_does_not_spend_the_budget():
+    count, total = llm_call_stats()
+    # Five events at 0.15s each take longer to read than the 0.3s budget
+    events = read_slowly(PacedStreamEngine(ANSWER), delay=0.15, budget=0.3)
+
+    assert [e for e, _ in events] == ["insight"] * 4 + ["decision"]
+    assert events[-1][1]["aiInsightsMeta"]["source"] == "llm"
+    # The llm_call timer covers the model stream, not the client
+    new_count, new_total = llm_call_stats()
+    assert new_count == count + 1 and new_total - total < 0.15
+
+
+def test_budget_expiring_while_client_reads_still_falls_back():
+    # Two fields arrive at once, then the model stalls past the budget
+    # while the client is still reading the first event
+    events = read_slowly(PacedStreamEngine("risk || pricing || partial", hang=5), delay=0.4, budget=0.2)
+
+    assert [e for e, _ in events] == ["insight", "insight", "discard", "decision"]
+    assert events[2][1] == {"fields": ["driverRiskFactors", "pricingRationale"], "reason": "timeout"}
+    assert events[3][1]["aiInsightsMeta"] == {"source": "fallback", "fallback": True, "reason": "timeout"}
+
+
+if __name__ == "__main__":
+    test_parser_handles_any_chunk_split()
+    test_parser_emits_each_field_once_its_delimiter_arrives()
+    test_stream_event_sequence()
+    test_failure_before_any_insight_falls_back()
+    test_failure_mid_stream_discards_sent_insights()
+    test_slow_client_does_not_spend_the_budget()
+    test_budget_expiring_while_client_reads_still_falls_back()
+    print("RESULT: insight stream parsing and events OK")
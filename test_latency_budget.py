@@ -0,0 +1,118 @@
+# AI latency budget: a slow provider yields fallback insights within the
+# budget, the throttle wait and the call share one request deadline, and a
+# hedged request returns whichever reply comes first.
+
+import asyncio
+import contextlib
+import io
+import time
+
+from app.metrics import snapshot
+from app.processor import ai_engine
+from app.processor.ai_engine import get_ai_engine, shutdown_ai_engine
+from app.processor.processor import process_data, process_data_async
+from test_ai_engine import context, patched, payload, stub_ai
+
+
+class SlowLimiter:
+    """
+    Rate limiter stand-in that takes `delay` seconds to admit each call and
+    records the deadlines it was given.
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.deadlines = []
+
+    def acquire_sync(self, tokens, priority, deadline):
+        self.deadlines.append(deadline)
+        time.sleep(self.delay)
+
+    async def acquire(self, tokens, priority, deadline):
+        self.deadlines.append(deadline)
+        await asyncio.sleep(self.delay)
+
+
+def run_async(coro):
+    async def run():
+        try:
+            return await coro
+        finally:
+            await shutdown_ai_engine()
+    with contextlib.redirect_stdout(io.StringIO()):
+        return asyncio.run(run())
+
+
+def counter(name):
+    return snapshot()["counters"].get(name, 0)
+
+
+def test_slow_provider_falls_back_within_budget():
+    with stub_ai(latency="fixed:1500"), patched(ai_engine, AI_LATENCY_BUDGET_SECONDS=0.3):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            decision = process_data(payload())
+        sync_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        async_decision = run_async(process_data_async(payload()))
+        async_elapsed = time.perf_counter() - start
+
+    for d, elapsed in ((decision, sync_elapsed), (async_decision, async_elapsed)):
+        assert d["aiInsightsMeta"] == {"source": "fallback", "fallback": True, "reason": "timeout"}
+        assert d["aiInsights"]
+        assert elapsed < 1.0, elapsed
+
+
+def test_throttle_wait_counts_against_the_budget():
+    # 0.25s in the limiter + 0.3s provider latency > 0.4s budget, although
+    # each step alone fits it
+    limiter = SlowLimiter(0.25)
+    with stub_ai(latency="fixed:300"), patched(
+        ai_engine, AI_LATENCY_BUDGET_SECONDS=0.4, get_rate_limiter=lambda: limiter
+    ):
+        with contextlib.redirect_stdout(io.StringIO()):
+            decision = process_data(payload())
+    assert decision["aiInsightsMeta"]["reason"] == "timeout"
+
+    limiter = SlowLimiter(0.05)
+    with stub_ai(latency="fixed:50"), patched(
+        ai_engine, AI_LATENCY_BUDGET_SECONDS=0.4, get_rate_limiter=lambda: limiter
+    ):
+        with contextlib.redirect_stdout(io.StringIO()):
+            decision = process_data(payload())
+    assert decision["aiInsightsMeta"]["source"] == "llm"
+
+
+def test_hedged_calls_share_the_request_deadline():
+    limiter = SlowLimiter(0.0)
+    with stub_ai(latency="fixed:300"), patched(
+        ai_engine, AI_HEDGE_AFTER_SECONDS=0.05, AI_LATENCY_BUDGET_SECONDS=5, get_rate_limiter=lambda: limiter
+    ):
+        run_async(get_ai_engine().agenerate_insights(context()))
+    assert len(limiter.deadlines) == 2
+    assert limiter.deadlines[0] == limiter.deadlines[1] is not None
+
+
+def test_hedge_returns_the_faster_response():
+    hedged, wins = counter("ai_hedged_requests"), counter("ai_hedge_wins")
+    with stub_ai(latency="cycle:2000:50") as server, patched(
+        ai_engine, AI_HEDGE_AFTER_SECONDS=0.1, AI_LATENCY_BUDGET_SECONDS=5
+    ):
+        start = time.perf_counter()
+        output = run_async(get_ai_engine().agenerate_insights(context()))
+        elapsed = time.perf_counter() - start
+        assert server.stats.requests == 2
+
+    assert output.count("||") == 3
+    assert elapsed < 1.0, elapsed
+    assert counter("ai_hedged_requests") == hedged + 1
+    assert counter("ai_hedge_wins") == wins + 1
+
+
+if __name__ == "__main__":
+    test_slow_provider_falls_back_within_budget()
+    test_throttle_wait_counts_against_the_budget()
+    test_hedged_calls_share_the_request_deadline()
+    test_hedge_returns_the_faster_response()
+    print("RESULT: latency budget and hedging OK")
@@ -0,0 +1,36 @@
+# loadgen's bundled inputs must be accepted by the pipeline, and a run with
+# errors must fail instead of producing a baseline.
+
+import contextlib
+import io
+
+import loadgen
+from app.pdf_layout.pdf_render import render_pdf_bytes
+from app.processor.processor import prepare_underwriting
+
+
+def test_default_corpus_is_scoreable():
+    corpus = loadgen.load_corpus(loadgen.default_corpus_paths())
+    assert len(corpus) >= 20
+    with contextlib.redirect_stdout(io.StringIO()):
+        for body in corpus:
+            _, underwriting = prepare_underwriting(body["data"])
+            assert underwriting["riskScore"] > 0
+        assert render_pdf_bytes(loadgen.load_pdf_body("phase2_output.json")["processed_data"]).startswith(b"%PDF")
+
+
+def test_errors_fail_the_run():
+    recorder = loadgen.Recorder()
+    for ok in (True, True, False):
+        recorder.record("/receive", 0.01, ok)
+    recorder.record("/generate-compliance-report", 0.02, True)
+    report = loadgen.summarize(recorder, 1.0)
+
+    assert loadgen.error_rate_violations(report, 0.0) == ["/receive: 1/3 errors (33.33%)"]
+    assert loadgen.error_rate_violations(report, 0.5) == []
+
+
+if __name__ == "__main__":
+    test_default_corpus_is_scoreable()
+    test_errors_fail_the_run()
+    print("RESULT: loadgen corpus is scoreable and errors fail the run")
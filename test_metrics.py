@@ -0,0 +1,126 @@
+# GET /metrics must be valid Prometheus text exposition (format 0.0.4):
+# every sample belongs to a family declared by a preceding TYPE line, names
+# and labels are well formed, values parse as floats, no family or series
+# appears twice, and histogram buckets are cumulative up to +Inf = _count.
+
+import re
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.metrics import increment, observe, stage_timer
+
+METRIC_NAME = re.compile(r"[a-zA-Z_:][a-zA-Z0-9_:]*")
+SAMPLE = re.compile(r'([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(.*)\})? (\S+)')
+LABEL = re.compile(r'\s*([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\\n]|\\["\\n])*)"\s*(,|$)')
+TYPES = ("counter", "gauge", "summary", "histogram", "untyped")
+SUFFIXES = {"summary": ("", "_sum", "_count"), "histogram": ("_bucket", "_sum", "_count")}
+
+
+def parse_labels(text):
+    labels, pos = {}, 0
+    while pos < len(text):
+        match = LABEL.match(text, pos)
+        assert match, f"bad label set: {text!r}"
+        assert match.group(1) not in labels, f"duplicate label in {text!r}"
+        labels[match.group(1)] = match.group(2)
+        pos = match.end()
+    return labels
+
+
+def parse_exposition(text):
+    """
+    Validates the exposition and returns {family: type}.
+    """
+    assert text.endswith("\n")
+    families, series = {}, set()
+
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if line.startswith("#"):
+            parts = line.split(None, 3)
+            if len(parts) >= 2 and parts[1] == "TYPE":
+                _, _, name, kind = parts
+                assert METRIC_NAME.fullmatch(name), line
+                assert kind in TYPES, line
+                assert name not in families, f"family declared twice: {name}"
+                families[name] = kind
+            elif len(parts) >= 2 and parts[1] == "HELP":
+                assert METRIC_NAME.fullmatch(parts[2]), line
+            continue
+
+        match = SAMPLE.fullmatch(line)
+        assert match, f"bad sample line: {line!r}"
+        name, _, label_text, value = match.groups()
+        float(value)
+        labels = parse_labels(label_text or "")
+
+        family = next(
+            (f for f, kind in families.items()
+             if any(name == f + suffix for suffix in SUFFIXES.get(kind, ("",)))),
+            None,
+        )
+        assert family is not None, f"sample without a TYPE: {line!r}"
+        if families[family] == "summary" and name == family:
+            assert "quantile" in labels, line
+        if families[family] == "histogram" and name == family + "_bucket":
+            assert "le" in labels, line
+            float(labels["le"])
+
+        key = (name, tuple(sorted(labels.items())))
+        assert key not in series, f"duplicate series: {line!r}"
+        series.add(key)
+
+    return families
+
+
+def histogram(text, family, **labels):
+    """
+    [(le, cumulative count)] and the _count of one histogram series.
+    """
+    selector = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    buckets = [
+        (float(le), float(value))
+        for le, value in re.findall(
+            rf'^{family}_bucket\{{{selector},le="([^"]+)"\}} (\S+)$', text, re.M
+        )
+    ]
+    count = float(re.search(rf'^{family}_count\{{{selector}\}} (\S+)$', text, re.M).group(1))
+    return buckets, count
+
+
+def test_metrics_endpoint_is_valid_exposition():
+    with stage_timer("test_stage"):
+        pass
+    try:
+        with stage_timer("test_stage"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    observe("test_other_stage", 0.25)
+    increment("test_counter", 3)
+
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    families = parse_exposition(response.text)
+
+    assert families["optimaai_stage_seconds"] == "histogram"
+    assert families["optimaai_stage_errors_total"] == "counter"
+    assert families["optimaai_test_counter_total"] == "counter"
+    assert 'optimaai_stage_seconds_count{stage="test_stage"} ' in response.text
+    assert 'optimaai_stage_errors_total{stage="test_stage"} 1\n' in response.text
+
+    buckets, count = histogram(response.text, "optimaai_stage_seconds", stage="test_other_stage")
+    assert [le for le, _ in buckets] == sorted(le for le, _ in buckets) and buckets[-1][0] == float("inf")
+    assert all(a <= b for (_, a), (_, b) in zip(buckets, buckets[1:]))
+    assert buckets[-1][1] == count
+    # 0.25s falls in the le="0.25" bucket, not below it
+    assert dict(buckets)[0.25] - dict(buckets)[0.1] >= 1
+
+
+if __name__ == "__main__":
+    test_metrics_endpoint_is_valid_exposition()
+    print("RESULT: /metrics is valid Prometheus exposition")
@@ -0,0 +1,103 @@
+# normalize_columnar must hold exactly the values normalize_incoming_json
+# produces for the same payloads, one row per submission/driver/vehicle.
+
+import json
+import math
+
+from app.normalizer.columnar import normalize_columnar, to_number
+from app.normalizer.normalizer import normalize_incoming_json
+
+PAYLOADS = [
+    json.load(open("guidewire_request.json"))["data"],
+    {
+        "insured": {"givenName": "John", "age": "44", "location": {"postalCode": "50001", "stateCd": "IA"}},
+        "operatorList": [{"fname": "John", "lname": "Doe", "accHist": 1}, {"fname": "Amy", "age": 19}],
+        "autos": [{"VIN": "X1", "modelYear": 2019, "manufacturer": "Honda", "vehicleModel": "Civic"}],
+        "coverage": {"liabilityLimit": "100,000", "collisionDeductible": 500},
+    },
+    {
+        "sourceSystem": "Guidewire",
+        "customer": {"firstName": "Jane", "address": {"state": "IA", "zip": 50309}},
+        "drivers": [{"firstName": "Jane", "age": 41, "accidents": 2, "majorViolation": True}],
+        "vehicles": [{"vin": "V1", "year": "2018", "make": "Ford", "model": "F-150", "annualMileage": 9000}],
+        "coverage": {"coverageType": "Full", "deductible": "n/a"},
+    },
+    {},
+    {"drivers": [], "vehicles": [{"make": "Honda"}, {"make": "Honda"}]},
+]
+
+
+def same_number(column_value, value):
+    expected = to_number(value)
+    return (math.isnan(column_value) and math.isnan(expected)) or column_value == expected
+
+
+def same_string(column_value, value):
+    return column_value == (None if value is None else str(value))
+
+
+def test_columns_match_normalize_incoming_json():
+    batch = normalize_columnar(iter(PAYLOADS))
+    assert len(batch) == len(PAYLOADS)
+
+    driver_row = vehicle_row = 0
+    for i, payload in enumerate(PAYLOADS):
+        normalized = normalize_incoming_json(payload)
+        subs = batch.submissions
+        assert same_number(subs["customerAge"][i], normalized["customer"]["age"])
+        assert same_number(subs["liabilityLimit"][i], normalized["coverage"]["liabilityLimit"])
+        assert same_number(subs["deductible"][i], normalized["coverage"]["deductible"])
+        assert same_string(subs["state"][i], normalized["customer"]["address"]["state"])
+        assert same_string(subs["zip"][i], normalized["customer"]["address"]["zip"])
+        assert same_string(subs["coverageType"][i], normalized["coverage"]["coverageType"])
+        assert same_string(subs["sourceSystem"][i], normalized["policy"]["sourceSystem"])
+
+        start, end = batch.driver_offsets[i], batch.driver_offsets[i + 1]
+        assert end - start == len(normalized["drivers"])
+        for d in normalized["drivers"]:
+            d = d["normalized"]
+            cols = batch.drivers
+            assert cols["submission"][driver_row] == i
+            for name in ("age", "accidents", "violations"):
+                assert same_number(cols[name][driver_row], d[name]), name
+            assert cols["majorViolation"][driver_row] == bool(d["majorViolation"])
+            for name in ("firstName", "lastName", "licenseNumber"):
+                assert same_string(cols[name][driver_row], d[name]), name
+            driver_row += 1
+
+        start, end = batch.vehicle_offsets[i], batch.vehicle_offsets[i + 1]
+        assert end - start == len(normalized["vehicles"])
+        for v in normalized["vehicles"]:
+            v = v["normalized"]
+            cols = batch.vehicles
+            assert cols["submission"][vehicle_row] == i
+            for name in ("year", "annualMileage"):
+                assert same_number(cols[name][vehicle_row], v[name]), name
+            for name in ("vin", "make", "model"):
+                assert same_string(cols[name][vehicle_row], v[name]), name
+            vehicle_row += 1
+
+    assert driver_row == len(batch.drivers["age"])
+    assert vehicle_row == len(batch.vehicles["year"])
+
+
+def test_string_columns_are_dictionary_encoded():
+    batch = normalize_columnar([{"vehicles": [{"make": "Honda"}] * 3 + [{"make": "Ford"}, {}]}])
+    make = batch.vehicles["make"]
+    assert make.values == ["Honda", "Ford"]
+    assert make.to_list() == ["Honda", "Honda", "Honda", "Ford", None]
+    assert make.equals("Honda").tolist() == [True, True, True, False, False]
+    assert not make.equals("Tesla").any()
+
+
+def test_empty_batch():
+    batch = normalize_columnar([])
+    assert len(batch) == 0
+    assert batch.drivers["age"].shape == (0,)
+
+
+if __name__ == "__main__":
+    test_columns_match_normalize_incoming_json()
+    test_string_columns_are_dictionary_encoded()
+    test_empty_batch()
+    print("RESULT: columnar batch matches normalize_incoming_json")
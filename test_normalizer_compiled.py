@@ -0,0 +1,202 @@
+# Compiled alias paths must resolve exactly like the string-path helpers
+# (find_value / find_list) for every alias variant in ALIAS_PATHS, and the
+# schema-fingerprint plan cache must not change normalization results.
+# Carrier specs must produce the same canonical JSON as the alias search for
+# payloads in the carrier's shape, and fall back to the aliases for fields
+# the spec does not map or the payload does not carry at the spec's path.
+
+from app.metrics import snapshot
+from app.normalizer.alias_paths import ALIAS_PATHS, LIST_FIELDS
+from app.normalizer import normalizer
+from app.normalizer.normalizer import CARRIER_SPECS, COMPILED_PATHS, normalize_incoming_json
+from app.normalizer.spec_compiler import compile_spec
+from app.normalizer.utils.compiled_path import find_list_compiled, find_value_compiled
+from app.normalizer.utils.find_list import find_list
+from app.normalizer.utils.find_value import find_value
+
+# Values that exercise the "first non-None" / "first list" rules.
+PROBE_VALUES = [None, 0, "", False, "value", 42, [], ["item"], {"nested": 1}]
+
+
+def build(path, value):
+    obj = {}
+    current = obj
+    parts = path.split(".")
+    for part in parts[:-1]:
+        current = current.setdefault(part, {})
+    current[parts[-1]] = value
+    return obj
+
+
+def check(field, obj):
+    paths = ALIAS_PATHS[field]
+    if field in LIST_FIELDS:
+        assert find_list_compiled(obj, COMPILED_PATHS[field]) == find_list(obj, paths), (field, obj)
+    else:
+        assert find_value_compiled(obj, COMPILED_PATHS[field]) == find_value(obj, paths), (field, obj)
+
+
+def test_every_alias_variant_matches():
+    for field, paths in ALIAS_PATHS.items():
+        for path in paths:
+            for value in PROBE_VALUES:
+                check(field, build(path, value))
+
+        # Earlier aliases win over later ones
+        for value in PROBE_VALUES:
+            obj = build(paths[-1], "last")
+            obj.update(build(paths[0], value))
+            check(field, obj)
+
+
+def test_non_dict_inputs_match():
+    for field in ALIAS_PATHS:
+        for obj in (None, "text", 7, ["list"], {}):
+            check(field, obj)
+
+
+def full_probe_normalize(raw_json):
+    planners = (normalizer.PAYLOAD_PLANNER, normalizer.DRIVER_PLANNER, normalizer.VEHICLE_PLANNER)
+    for planner in planners:
+        planner.plan_for = planner._probe
+    try:
+        return normalize_incoming_json(raw_json)
+    finally:
+        for planner in planners:
+            del planner.plan_for
+
+
+def test_plan_cache_matches_full_probe():
+    for field, paths in ALIAS_PATHS.items():
+        for path in paths:
+            for value in PROBE_VALUES:
+                if field.startswith("driver."):
+                    payload = {"drivers": [build(path, value)]}
+                elif field.startswith("vehicle."):
+                    payload = {"autos": [build(path, value)]}
+                else:
+                    payload = build(path, value)
+
+                # Same shape twice: the second call is served from the plan cache
+                for _ in range(2):
+                    assert normalize_incoming_json(payload) == full_probe_normalize(payload), (field, payload)
+
+
+def generic_normalize(raw_json):
+    """
+    normalize_incoming_json with no carrier specs registered.
+    """
+    saved = normalizer.CARRIER_SPECS
+    normalizer.CARRIER_SPECS = {}
+    try:
+        return normalize_incoming_json(raw_json)
+    finally:
+        normalizer.CARRIER_SPECS = saved
+
+
+def spec_uses():
+    return snapshot()["counters"].get("normalizer_spec_guidewire", 0)
+
+
+GUIDEWIRE_PAYLOAD = {
+    "sourceSystem": "Guidewire",
+    "customer": {
+        "firstName": "Jane",
+        "lastName": "Roe",
+        "age": 41,
+        "licenseNumber": "D123",
+        "address": {"street": "1 Main", "city": "Des Moines", "state": "IA", "zip": "50309"},
+    },
+    "drivers": [
+        {"firstName": "Jane", "lastName": "Roe", "age": 41, "accidents": 1, "violations": 0},
+        {"firstName": "Sam", "lastName": "Roe", "age": 17, "majorViolation": True},
+    ],
+    "vehicles": [{"vin": "V1", "year": 2018, "make": "Ford", "model": "F-150", "annualMileage": 9000}],
+    "policy": {"state": "IA", "effectiveDate": "2026-01-01", "transactionId": "T1"},
+    "coverage": {"liabilityLimit": 100000, "collisionDeductible": 500},
+}
+
+
+def test_carrier_spec_matches_alias_search():
+    assert "guidewire" in CARRIER_SPECS
+
+    for system in ("Guidewire", "GUIDEWIRE", "PolicyCenter"):
+        payload = dict(GUIDEWIRE_PAYLOAD, sourceSystem=system)
+        assert normalize_incoming_json(payload) == full_probe_normalize(payload), system
+        assert normalize_incoming_json(payload) == generic_normalize(payload), system
+
+    # Missing sections and wrong types behave like a failed alias search
+    for payload in ({"sourceSystem": "Guidewire"},
+                    {"sourceSystem": "Guidewire", "customer": "text", "drivers": {}, "vehicles": None},
+                    {"sourceSystem": "Guidewire", "drivers": [None, 3, {"age": None}]}):
+        assert normalize_incoming_json(payload) == full_probe_normalize(payload), payload
+        assert normalize_incoming_json(payload) == generic_normalize(payload), payload
+
+    # Fields present under several aliases keep the alias search's precedence
+    for payload in ({"sourceSystem": "Guidewire", "policy": {"state": "IA"}, "compliance": {"state": "CA"}},
+                    {"sourceSystem": "Guidewire", "drivers": [{"accHist": 2, "accidents": 0}]},
+                    {"sourceSystem": "Guidewire", "policy": {"state": "IA"}, "compliance": {"state": "CA"},
+                     "drivers": [{"accHist": 2, "accidents": 0}]}):
+        assert normalize_incoming_json(payload) == full_probe_normalize(payload), payload
+        assert normalize_incoming_json(payload) == generic_normalize(payload), payload
+    normalized = normalize_incoming_json(payload)
+    assert normalized["compliance"]["state"] == "CA"
+    assert normalized["drivers"][0]["normalized"]["accidents"] == 2
+
+
+def test_carrier_spec_falls_back_to_aliases():
+    # Tagged through guidewire.sourceSystem, but in another insurer's shape
+    # and carrying sections the spec does not map
+    payload = {
+        "guidewire": {"sourceSystem": "PolicyCenter", "state": "TX"},
+        "insured": {"givenName": "Ann", "familyName": "Lee", "location": {"stateCd": "TX", "postalCode": "75001"}},
+        "operatorList": [{"fname": "Ann", "accHist": 2, "violationCount": 1}],
+        "autos": [{"VIN": "K1", "modelYear": 2020, "manufacturer": "Kia", "vehicleModel": "Soul", "mileage": 12000}],
+        "limits": {"liability": 50000},
+        "deductibles": {"collision": 1000},
+        "premium": {"final": 1500, "base": 1200},
+        "underwriting": {"riskScore": 640, "eligibility": "Refer", "topRiskDrivers": ["accidents"], "summary": "Two accidents"},
+    }
+    before = spec_uses()
+    normalized = normalize_incoming_json(payload)
+    assert spec_uses() == before + 1
+    assert normalized == generic_normalize(payload)
+
+    assert normalized["customer"]["firstName"] == "Ann"
+    assert normalized["drivers"][0]["normalized"]["accidents"] == 2
+    assert normalized["vehicles"][0]["normalized"]["make"] == "Kia"
+    assert normalized["coverage"]["liabilityLimit"] == 50000
+    assert normalized["pricing"]["finalPremium"] == 1500
+    assert normalized["risk"]["score"] == 640 and normalized["risk"]["topDrivers"] == ["accidents"]
+    assert normalized["summary"]["narrative"] == "Two accidents"
+
+
+def test_unknown_source_system_uses_alias_search():
+    payload = {"sourceSystem": "SomethingElse", "insured": {"givenName": "Ann"}}
+    assert normalize_incoming_json(payload)["customer"]["firstName"] == "Ann"
+
+
+def test_spec_compilation_is_cached_and_validated():
+    spec = {"sourceSystem": ["X"], "paths": {"customer.firstName": "a.b"}}
+    assert compile_spec(spec) is compile_spec(dict(spec))
+
+    for bad in ({"sourceSystem": [], "paths": {"customer.firstName": "a"}},
+                {"sourceSystem": ["X"], "paths": {"customer.nickname": "a"}},
+                {"sourceSystem": ["X"], "paths": {"customer.firstName": ""}},
+                {"sourceSystem": ["X"], "paths": {"compliance.state": "policy.state"}}):
+        try:
+            compile_spec(bad)
+        except ValueError:
+            continue
+        raise AssertionError(bad)
+
+
+if __name__ == "__main__":
+    test_every_alias_variant_matches()
+    test_non_dict_inputs_match()
+    test_plan_cache_matches_full_probe()
+    test_carrier_spec_matches_alias_search()
+    test_carrier_spec_falls_back_to_aliases()
+    test_unknown_source_system_uses_alias_search()
+    test_spec_compilation_is_cached_and_validated()
+    print("RESULT: compiled paths and carrier specs match for all alias variants")
@@ -0,0 +1,90 @@
+# The streaming normalizer must emit, record by record, the same drivers,
+# vehicles and submission fields normalize_incoming_json builds, however
+# the body is split into chunks.
+
+import json
+import random
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.normalizer.normalizer import normalize_incoming_json
+from app.normalizer.stream_normalizer import normalize_stream
+
+
+def make_fleet(size):
+    return {
+        "customer": {"firstName": "Fleet", "lastName": "Co", "address": {"state": "IA", "zip": "50309"}},
+        "operatorList": [{"fname": f"Op{i}", "lname": "Driver", "accHist": i % 3} for i in range(size)],
+        "autos": [
+            {"VIN": f"VIN{i}", "modelYear": 2010 + i % 15, "manufacturer": "Ford", "vehicleModel": "Transit",
+             "notes": "quote \" and \\ backslash ü"}
+            for i in range(size)
+        ],
+        "policy": {"state": "IA", "effectiveDate": "2026-01-01"},
+        "coverage": {"liabilityLimit": 1000000, "deductible": 1000},
+    }
+
+
+def chunked(body, rng):
+    i = 0
+    while i < len(body):
+        size = rng.randint(1, 64)
+        yield body[i:i + size]
+        i += size
+
+
+def check(payload, records):
+    expected = normalize_incoming_json(payload)
+    drivers = [r["normalized"] for r in records if r["type"] == "driver"]
+    vehicles = [r["normalized"] for r in records if r["type"] == "vehicle"]
+    assert drivers == [d["normalized"] for d in expected["drivers"]]
+    assert vehicles == [v["normalized"] for v in expected["vehicles"]]
+
+    submission = records[-1]
+    assert submission["type"] == "submission"
+    assert submission["driverCount"] == len(drivers)
+    assert submission["vehicleCount"] == len(vehicles)
+    for section, value in submission["normalized"].items():
+        assert value == expected[section], section
+
+
+def test_stream_matches_normalize_incoming_json():
+    rng = random.Random(5)
+    payloads = [
+        make_fleet(200),
+        # Carrier spec: its list keys win, other aliases are the fallback
+        {"sourceSystem": "Guidewire", "drivers": [{"firstName": "Gw", "age": 30}], **make_fleet(20)},
+        json.load(open("guidewire_request.json"))["data"],
+        {"drivers": [], "vehicles": [None, 3, {"vin": "X"}]},
+        {},
+    ]
+    for payload in payloads:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        check(payload, list(normalize_stream(chunked(body, rng))))
+
+
+def test_first_record_before_body_is_complete():
+    body = json.dumps(make_fleet(1000)).encode("utf-8")
+    stream = normalize_stream(chunked(body, random.Random(1)))
+    first = next(stream)
+    assert first["type"] == "driver" and first["index"] == 0
+
+
+def test_fleet_stream_endpoint():
+    payload = make_fleet(50)
+    client = TestClient(app)
+    response = client.post("/receive/fleet/stream", content=json.dumps({"data": payload}))
+    assert response.status_code == 200
+    check(payload, [json.loads(line) for line in response.text.splitlines()])
+
+    response = client.post("/receive/fleet/stream", content=b'{"data": {"autos": [{"VIN": 1}, ')
+    last = json.loads(response.text.splitlines()[-1])
+    assert last["type"] == "error"
+
+
+if __name__ == "__main__":
+    test_stream_matches_normalize_incoming_json()
+    test_first_record_before_body_is_complete()
+    test_fleet_stream_endpoint()
+    print("RESULT: streaming normalizer matches normalize_incoming_json")
@@ -0,0 +1,86 @@
+# Concurrency stress test for /generate-compliance-report.
+# Fires 50 parallel requests with distinct payloads and checks that each
+# response is exactly the report rendered for its own payload. The app
+# lifespan runs, so reports go through the render process pool.
+
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+# The lifespan creates the shared Groq client, which needs a key
+os.environ.setdefault("GROQ_API_KEY", "stub")
+
+from reportlab import rl_config
+from fastapi.testclient import TestClient
+
+from main import app
+from app.metrics import snapshot
+from app.pdf_layout import render_pool
+from app.pdf_layout.pdf_render import render_pdf_bytes
+
+# Deterministic output (no timestamps / random document IDs) so PDFs can
+# be compared byte-for-byte. The environment variable carries the setting
+# into the spawned render workers.
+rl_config.invariant = 1
+os.environ["RL_invariant"] = "1"
+
+PARALLEL_REQUESTS = 50
+
+
+def make_payload(i):
+    # processed_data in the shape the report pages read
+    return {
+        "applicant": {"name": f"Driver{i} Stress", "state": "IA", "zip": "50001"},
+        "customer": {"firstName": f"Driver{i}", "lastName": "Stress", "age": 30 + i % 40},
+        "drivers": [{"firstName": f"Driver{i}", "lastName": "Stress", "age": 30 + i % 40}],
+        "vehicles": [{"year": 2015 + i % 10, "make": "Honda", "model": "Civic"}],
+        "coverage": {"coverageType": "Full", "liabilityLimit": 100000 + i, "deductible": 500},
+        "risk": {"score": 600 + i, "eligibility": "Eligible"},
+        "pricing": {"finalPremium": 1000 + i, "narrative": f"Premium for report {i}."},
+        "summary": {"narrative": f"Stress report {i}."},
+        "compliance": {"overallStatus": "Pass", "narrative": "No issues."},
+        "aiInsights": {"narrative": f"Insight {i}."},
+    }
+
+
+def test_parallel_reports_are_isolated():
+    payloads = [make_payload(i) for i in range(PARALLEL_REQUESTS)]
+    expected = [render_pdf_bytes(make_payload(i)) for i in range(PARALLEL_REQUESTS)]
+
+    with TestClient(app) as client:
+        assert render_pool._pool is not None
+
+        def post(payload):
+            return client.post("/generate-compliance-report", json={"processed_data": payload})
+
+        with ThreadPoolExecutor(max_workers=PARALLEL_REQUESTS) as pool:
+            responses = list(pool.map(post, payloads))
+
+    for i, response in enumerate(responses):
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.content == expected[i], f"report {i} does not match its payload"
+
+    assert len({r.content for r in responses}) == PARALLEL_REQUESTS
+
+
+def test_pool_recovers_from_a_dead_worker():
+    restarts = snapshot()["counters"].get("pdf_render_pool_restarts", 0)
+    with TestClient(app) as client:
+        broken = render_pool._pool
+        for process in list(broken._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)
+
+        response = client.post("/generate-compliance-report", json={"processed_data": make_payload(1)})
+        assert response.status_code == 200
+        assert response.content == render_pdf_bytes(make_payload(1))
+        assert render_pool._pool is not None and render_pool._pool is not broken
+        assert snapshot()["counters"]["pdf_render_pool_restarts"] == restarts + 1
+
+    assert render_pool._pool is None
+
+
+if __name__ == "__main__":
+    test_parallel_reports_are_isolated()
+    test_pool_recovers_from_a_dead_worker()
+    print("RESULT: 50 parallel reports OK")
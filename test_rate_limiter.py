@@ -0,0 +1,185 @@
+# LLM rate limiter: the SQLite token buckets are shared across instances
+# (workers), batch calls keep out of the interactive reserve and yield to
+# waiting interactive calls, a wait past the deadline is rejected up front,
+# and /receive/batch items are throttled at BATCH priority.
+
+import asyncio
+import contextlib
+import os
+import tempfile
+import time
+
+from app.metrics import snapshot
+from app.processor import ai_engine
+from app.processor.batch_processor import process_batch
+from app.processor.processor import process_data_async
+from app.processor.rate_limiter import (
+    BATCH,
+    INTERACTIVE,
+    MAX_POLL_SECONDS,
+    LLMRateLimiter,
+    RateLimitRejected,
+    SQLiteTokenBuckets,
+)
+from test_ai_engine import patched, payload, stub_ai
+from test_latency_budget import run_async
+
+
+@contextlib.contextmanager
+def buckets(requests, tokens=0, count=1):
+    """
+    `count` SQLiteTokenBuckets over one fresh database file, as separate
+    workers would open it.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "limits.db")
+        opened = [SQLiteTokenBuckets(path, {"requests": requests, "tokens": tokens}) for _ in range(count)]
+        try:
+            yield opened if count > 1 else opened[0]
+        finally:
+            for b in opened:
+                b._db.close()
+
+
+def level(b, name="requests"):
+    return b._db.execute("SELECT level FROM buckets WHERE name = ?", (name,)).fetchone()[0]
+
+
+def rejected():
+    return snapshot()["counters"].get("llm_rate_limit_rejected", 0)
+
+
+class SlowBuckets:
+    """
+    Buckets whose try_take holds the caller for `delay` seconds, like a
+    contended SQLite write lock.
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def try_take(self, costs, reserve_fraction=0.0):
+        time.sleep(self.delay)
+        return 0.0
+
+
+class RecordingLimiter:
+    def __init__(self):
+        self.calls = []
+
+    async def acquire(self, tokens, priority, deadline):
+        self.calls.append((priority, deadline))
+
+
+def test_buckets_take_refill_and_share():
+    with buckets(requests=6, count=2) as (first, second):
+        assert [first.try_take({"requests": 1}) for _ in range(6)] == [0.0] * 6
+        # Empty for both workers: one request refills in 10s at 6/minute
+        wait = second.try_take({"requests": 1})
+        assert 9.5 < wait <= 10.0
+        assert first.try_take({"requests": 1}) > 0
+
+        first._db.execute("UPDATE buckets SET updated = updated - 20")
+        assert second.try_take({"requests": 1}) == 0.0
+        assert second.try_take({"requests": 1}) == 0.0
+        assert first.try_take({"requests": 1}) > 0
+
+    # Token costs larger than the bucket still run once it is full
+    with buckets(requests=0, tokens=1000) as b:
+        assert b.per_minute == {"tokens": 1000}
+        assert b.try_take({"requests": 1, "tokens": 5000}) == 0.0
+        assert b.try_take({"tokens": 1}) > 0
+
+
+def test_batch_keeps_out_of_the_reserve():
+    with buckets(requests=10) as b:
+        limiter = LLMRateLimiter(b, batch_reserve_fraction=0.5)
+        for _ in range(5):
+            limiter.acquire_sync(0, BATCH)
+        assert level(b) < 5.1
+
+        # Only the reserve is left: batch calls wait, interactive ones go
+        try:
+            limiter.acquire_sync(0, BATCH, deadline=time.time() + 1)
+        except RateLimitRejected:
+            pass
+        else:
+            raise AssertionError("batch call dipped into the interactive reserve")
+        for _ in range(5):
+            limiter.acquire_sync(0, INTERACTIVE, deadline=time.time() + 1)
+        assert level(b) < 0.1
+
+
+def test_batch_yields_to_waiting_interactive_calls():
+    with buckets(requests=10) as b:
+        limiter = LLMRateLimiter(b, batch_reserve_fraction=0.0)
+        limiter._enter(INTERACTIVE)
+        assert limiter._try(0, BATCH) == MAX_POLL_SECONDS
+        assert limiter._try(0, INTERACTIVE) == 0.0
+        limiter._leave(INTERACTIVE, time.perf_counter())
+        assert limiter._try(0, BATCH) == 0.0
+        assert 7.9 < level(b) < 8.1
+
+
+def test_wait_past_deadline_is_rejected_early():
+    with buckets(requests=1) as b:
+        limiter = LLMRateLimiter(b)
+        limiter.acquire_sync(0)
+        before = rejected()
+
+        start = time.perf_counter()
+        for attempt in (
+            lambda: limiter.acquire_sync(0, INTERACTIVE, deadline=time.time() + 5),
+            lambda: asyncio.run(limiter.acquire(0, INTERACTIVE, deadline=time.time() + 5)),
+        ):
+            try:
+                attempt()
+            except RateLimitRejected:
+                continue
+            raise AssertionError("a 60s queue wait was accepted against a 5s deadline")
+        assert time.perf_counter() - start < 1.0
+        assert rejected() == before + 2
+        assert limiter._interactive_waiting == 0
+
+
+def test_async_acquire_does_not_block_the_event_loop():
+    limiter = LLMRateLimiter(SlowBuckets(0.3))
+
+    async def run():
+        ticks = 0
+        done = asyncio.ensure_future(limiter.acquire(0))
+        while not done.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        await done
+        return ticks
+
+    assert asyncio.run(run()) > 10
+
+
+def test_batch_items_are_throttled_at_batch_priority():
+    limiter = RecordingLimiter()
+
+    async def run():
+        results = [r async for r in process_batch([(payload(i), None) for i in range(3)])]
+        decision = await process_data_async(payload(9))
+        return results, decision
+
+    with stub_ai(), patched(ai_engine, get_rate_limiter=lambda: limiter):
+        results, decision = run_async(run())
+
+    assert all(r["status"] == "ok" for r in results)
+    assert decision["aiInsightsMeta"]["source"] == "llm"
+    # Batch calls carry no latency budget
+    assert limiter.calls[:3] == [(BATCH, None)] * 3
+    assert limiter.calls[3][0] == INTERACTIVE
+
+
+if __name__ == "__main__":
+    test_buckets_take_refill_and_share()
+    test_batch_keeps_out_of_the_reserve()
+    test_batch_yields_to_waiting_interactive_calls()
+    test_wait_past_deadline_is_rejected_early()
+    test_async_acquire_does_not_block_the_event_loop()
+    test_batch_items_are_throttled_at_batch_priority()
+    print("RESULT: rate limiter shares buckets and honours priority")
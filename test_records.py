@@ -0,0 +1,62 @@
+# Canonical records must serialize to exactly the JSON the nested-dict
+# pipeline produced.
+
+import json
+
+from app.models.records import json_default
+from app.normalizer.normalizer import normalize_incoming_json, normalize_records
+from app.services.underwriting_engine import build_underwriting_details
+
+PAYLOADS = [
+    json.load(open("guidewire_request.json"))["data"],
+    {
+        "insured": {"givenName": "John", "familyName": "Doe", "location": {"postalCode": "50001", "stateCd": "IA"}},
+        "operatorList": [{"fname": "John", "lname": "Doe", "accHist": 1}],
+        "autos": [{"VIN": "X1", "modelYear": 2019, "manufacturer": "Honda", "vehicleModel": "Civic"}],
+        "coverage": {"liabilityLimit": 100000, "deductible": 500},
+        "guidewire": {"state": "IA"},
+    },
+    {"sourceSystem": "Guidewire", "customer": {"firstName": "Jane"}, "drivers": [{"age": 30}], "policy": {"state": "NY"}},
+    {},
+]
+
+
+def test_records_serialize_like_normalize_incoming_json():
+    for payload in PAYLOADS:
+        expected = normalize_incoming_json(payload)
+        records = normalize_records(payload)
+        encoded = json.loads(json.dumps(records, default=json_default))
+        for section in ("customer", "drivers", "vehicles", "coverage", "policy", "guidewire"):
+            assert encoded[section] == json.loads(json.dumps(expected[section])), section
+
+
+def test_detail_rows_serialize_to_legacy_shape():
+    payload = {
+        "drivers": [{"firstName": "Ann", "age": 30, "yearsLicensed": 9, "isPrimaryDriver": True}],
+        "vehicles": [{"vin": "V1", "year": 2020, "model": "Civic"}],
+    }
+    records = normalize_records(payload)
+    expected = normalize_incoming_json(payload)
+    details = json.loads(json.dumps(
+        build_underwriting_details(records["drivers"], records["vehicles"], 710, 1200), default=json_default
+    ))
+
+    assert details["vehicles"] == [{
+        "raw": expected["vehicles"][0]["raw"],
+        "normalized": expected["vehicles"][0]["normalized"],
+        "rulesResult": {"rulesFired": [], "status": "rules evaluated (placeholder)"},
+        "riskScore": 710,
+        "premium": 1200,
+        "eligibility": "Eligible",
+    }]
+    driver = details["drivers"][0]
+    assert driver["raw"] == payload["drivers"][0]
+    assert driver["normalized"] == expected["drivers"][0]["normalized"]
+    assert (driver["firstName"], driver["yearsLicensed"], driver["claims"]) == ("Ann", 9, None)
+    assert details["riskScore"] == 710 and details["eligibility"] == "Eligible"
+
+
+if __name__ == "__main__":
+    test_records_serialize_like_normalize_incoming_json()
+    test_detail_rows_serialize_to_legacy_shape()
+    print("RESULT: records serialize to the canonical JSON")
@@ -0,0 +1,115 @@
+# VehicleClassifier: the Aho-Corasick matcher must agree with a plain
+# substring scan, and make / year restrictions, aliases and the cache must
+# behave as documented.
+
+import random
+import string
+
+from app.services.vehicle_classifier import VehicleClassifier, get_vehicle_classifier, validate_classes
+
+
+def brute_force(spec, make, model, year):
+    aliases = {k.lower(): v.lower() for k, v in spec.get("makeAliases", {}).items()}
+    make = aliases.get(make.lower(), make.lower()) if make else None
+    model = (model or "").lower()
+    flags = 0
+    for entry in spec["patterns"]:
+        bit = 1 << spec["classes"].index(entry["class"])
+        if "make" in entry and aliases.get(entry["make"].lower(), entry["make"].lower()) != make:
+            continue
+        if "minYear" in entry or "maxYear" in entry:
+            if year is None or not entry.get("minYear", year) <= year <= entry.get("maxYear", year):
+                continue
+        models = entry.get("models", [])
+        if not models or any(m.lower() in model for m in models):
+            flags |= bit
+    return flags
+
+
+def random_spec(rng):
+    classes = ["c0", "c1", "c2", "c3"]
+    patterns = []
+    for _ in range(rng.randint(1, 40)):
+        entry = {"class": rng.choice(classes)}
+        if rng.random() < 0.9:
+            entry["models"] = ["".join(rng.choice("abc-") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 3))]
+        if rng.random() < 0.2 or "models" not in entry:
+            entry["make"] = rng.choice(["Ford", "Chevy", "chevrolet"])
+        if rng.random() < 0.2:
+            entry["minYear"] = rng.choice([2000, 2010])
+        if rng.random() < 0.2:
+            entry["maxYear"] = rng.choice([2009, 2020])
+        patterns.append(entry)
+    return {"classes": classes, "makeAliases": {"chevy": "chevrolet"}, "patterns": patterns}
+
+
+def test_matches_substring_scan():
+    rng = random.Random(25)
+    for _ in range(200):
+        spec = random_spec(rng)
+        validate_classes(spec)
+        classifier = VehicleClassifier(spec)
+        for _ in range(100):
+            model = "".join(rng.choice("abc- " + string.ascii_uppercase[:3]) for _ in range(rng.randint(0, 12)))
+            make = rng.choice([None, "Ford", "CHEVY", "Chevrolet", "Honda"])
+            year = rng.choice([None, 1999, 2005, 2015, 2025])
+            assert classifier.classify(make, model, year) == brute_force(spec, make, model, year), (spec, make, model, year)
+
+
+def test_default_classes():
+    classifier = get_vehicle_classifier()
+    assert classifier.classes == ("safe", "family", "sports")
+    assert classifier.class_names(classifier.classify("Honda", "Civic")) == ("safe",)
+    assert classifier.class_names(classifier.classify(None, "CR-V Touring")) == ("family",)
+    assert classifier.class_names(classifier.classify(None, "Civic Mustang")) == ("safe", "sports")
+    assert classifier.classify(None, None) == 0 and classifier.classify("Ford", "F-150", 2020) == 0
+
+
+def test_make_patterns_cache_and_bulk():
+    spec = {
+        "classes": ["sports", "luxury"],
+        "makeAliases": {"Benz": "Mercedes-Benz"},
+        "patterns": [
+            {"class": "sports", "models": ["911"], "make": "Porsche"},
+            {"class": "luxury", "make": "mercedes-benz", "minYear": 2015},
+        ],
+    }
+    classifier = VehicleClassifier(spec, max_entries=2)
+    assert classifier.classify("porsche", "911 Carrera") == 1
+    assert classifier.classify("Ford", "911") == 0
+    assert classifier.classify("BENZ", "C300", "2018") == 2
+    assert classifier.classify("Benz", "C300", 2010) == 0
+    assert len(classifier._cache) == 2
+
+    fleet = [
+        {"make": "Porsche", "model": "911"},
+        {"make": "Benz", "model": "E350", "year": 2020},
+        {"make": "Porsche", "model": "911"},
+        {"make": "Ford"},
+    ]
+    assert classifier.classify_many(fleet) == [1, 2, 1, 0]
+
+
+def test_validation():
+    broken = [
+        {"classes": [], "patterns": []},
+        {"classes": ["a", "a"], "patterns": []},
+        {"classes": ["a"], "patterns": [{"class": "b", "models": ["x"]}]},
+        {"classes": ["a"], "patterns": [{"class": "a"}]},
+        {"classes": ["a"], "patterns": [{"class": "a", "models": [""]}]},
+        {"classes": ["a"], "patterns": [{"class": "a", "models": ["x"], "minYear": "2010"}]},
+    ]
+    for spec in broken:
+        try:
+            validate_classes(spec)
+        except ValueError:
+            continue
+        raise AssertionError(f"invalid class table accepted: {spec}")
+
+
+if __name__ == "__main__":
+    test_matches_substring_scan()
+    test_default_classes()
+    test_make_patterns_cache_and_bulk()
+    test_validation()
+    print("RESULT: vehicle classifier matches substring scan")